@@ -0,0 +1,6 @@
+from lvps.simulation.map_corpus import build_map_corpus
+import logging
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s [%(levelname)s] %(module)s:%(message)s', level=logging.INFO)
+    build_map_corpus('/home/matt/projects/LVPS_Simulation/maps/corpus', num_maps=100_000, shard_size=10_000, seed=1)
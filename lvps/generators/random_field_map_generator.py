@@ -3,9 +3,12 @@ from field.field_map_persistence import FieldMapPersistence
 import numpy as np
 
 class RandomFieldMapGenerator (FieldMapGenerator):
-    def __init__(self, min_width, max_width, min_height, max_height, min_obstacles, max_obstacles, min_obstacle_size_pct, max_obstacle_size_pct, min_deadspots, max_deadspots, min_deadspot_size_pct, max_deadspot_size_pct):
+    def __init__(self, min_width, max_width, min_height, max_height, min_obstacles, max_obstacles, min_obstacle_size_pct, max_obstacle_size_pct, min_deadspots, max_deadspots, min_deadspot_size_pct, max_deadspot_size_pct, rng = None):
         super().__init__()
 
+        # numpy Generator to draw from, falls back to the global numpy random state
+        self.__rng = rng
+
         self.__min_width = min_width
         self.__max_width = max_width
 
@@ -27,6 +30,20 @@ class RandomFieldMapGenerator (FieldMapGenerator):
         self.__min_deadspot_size_pct = min_deadspot_size_pct
         self.__max_deadspot_size_pct = max_deadspot_size_pct
 
+        # sizes and positions are picked from this many evenly spaced values (np.linspace default)
+        self.__num_choices = 50
+        self.__max_moves = 10
+
+
+    def __choice (self, options):
+        if self.__rng is None:
+            return np.random.choice(options)
+        return self.__rng.choice(options)
+
+    def __randint (self, low, high):
+        if self.__rng is None:
+            return np.random.randint(low, high)
+        return self.__rng.integers(low, high)
 
     def generate_map (self):
         map_dict = self.generate_map_dict()
@@ -45,13 +62,131 @@ class RandomFieldMapGenerator (FieldMapGenerator):
 
         return new_map_dict
 
+    # generates n maps at once, as a structured array with one record per map:
+    #   boundaries (xmin, ymin, xmax, ymax), num_obstacles, obstacles[max_obstacles], num_dead_spots, dead_spots[max_deadspots]
+    # only the first num_obstacles / num_dead_spots rects of each map are used.
+    # placement follows the same rules as generate_map_dict, but every map's candidate rect is drawn and
+    # checked together, so the work per rect is a handful of array operations no matter how many maps there are
+    def generate_map_arrays (self, n):
+        rect_dtype = RandomFieldMapGenerator.get_rect_dtype()
+        maps = np.zeros((n,), dtype=np.dtype([
+            ('boundaries', rect_dtype),
+            ('num_obstacles', np.int32),
+            ('obstacles', rect_dtype, (self.__max_obstacles,)),
+            ('num_dead_spots', np.int32),
+            ('dead_spots', rect_dtype, (self.__max_deadspots,))
+        ]))
+
+        center_x = self.__choose_batch(self.__center_x_min, self.__center_x_max, n)
+        center_y = self.__choose_batch(self.__center_y_min, self.__center_y_max, n)
+        width = self.__choose_batch(self.__min_width, self.__max_width, n)
+        height = self.__choose_batch(self.__min_height, self.__max_height, n)
+        boundaries = np.stack([center_x - (width / 2), center_y - (height / 2), center_x + (width / 2), center_y + (height / 2)], axis=1)
+        self.__set_rects(maps['boundaries'], boundaries)
+
+        maps['num_obstacles'] = self.__randints(self.__min_obstacles, self.__max_obstacles + 1, n)
+        self.__set_rects(maps['obstacles'], self.__place_rects_batch(boundaries, maps['num_obstacles'], self.__max_obstacles, self.__min_obstacle_size_pct, self.__max_obstacle_size_pct))
+
+        maps['num_dead_spots'] = self.__randints(self.__min_deadspots, self.__max_deadspots + 1, n)
+        self.__set_rects(maps['dead_spots'], self.__place_rects_batch(boundaries, maps['num_dead_spots'], self.__max_deadspots, self.__min_deadspot_size_pct, self.__max_deadspot_size_pct))
+
+        return maps
+
+    # generates n maps at once, as map dicts (same form as generate_map_dict)
+    def generate_map_dicts (self, n):
+        return [RandomFieldMapGenerator.to_map_dict(m) for m in self.generate_map_arrays(n)]
+
+    @staticmethod
+    def get_rect_dtype ():
+        return np.dtype([('xmin', np.float64), ('ymin', np.float64), ('xmax', np.float64), ('ymax', np.float64)])
+
+    # converts one record of generate_map_arrays to a map dict
+    @staticmethod
+    def to_map_dict (map_record):
+        def to_rect_dict (r):
+            return {'xmin':float(r['xmin']), 'ymin':float(r['ymin']), 'xmax':float(r['xmax']), 'ymax':float(r['ymax'])}
+
+        return {
+            'shape':'rectangle',
+            'boundaries':to_rect_dict(map_record['boundaries']),
+            'landmarks':{},
+            'obstacles':{f'obstacle_{o}':to_rect_dict(map_record['obstacles'][o]) for o in range(map_record['num_obstacles'])},
+            'dead_spots':{f'ds_{o}':to_rect_dict(map_record['dead_spots'][o]) for o in range(map_record['num_dead_spots'])}
+        }
+
+    def __set_rects (self, rect_records, rects):
+        rect_records['xmin'] = rects[...,0]
+        rect_records['ymin'] = rects[...,1]
+        rect_records['xmax'] = rects[...,2]
+        rect_records['ymax'] = rects[...,3]
+
+    def __randints (self, low, high, size):
+        if self.__rng is None:
+            return np.random.randint(low, high, size)
+        return self.__rng.integers(low, high, size)
+
+    # vectorized self.__choice(np.linspace(low, high)), low and high can be arrays
+    def __choose_batch (self, low, high, size):
+        return low + (high - low) * (self.__randints(0, self.__num_choices, size) / (self.__num_choices - 1))
+
+    # places up to max_rects rects in each map, returns an (n, max_rects, 4) array
+    def __place_rects_batch (self, boundaries, num_rects, max_rects, min_size_pct, max_size_pct):
+        n = boundaries.shape[0]
+        rects = np.zeros((n, max_rects, 4), dtype=np.float64)
+        bounds_width = boundaries[:,2] - boundaries[:,0]
+        bounds_height = boundaries[:,3] - boundaries[:,1]
+
+        for r in range(max_rects):
+            pending = np.flatnonzero(num_rects > r)
+            if len(pending) == 0:
+                break
+
+            height = self.__choose_batch(min_size_pct * bounds_height[pending], max_size_pct * bounds_height[pending], len(pending))
+            width = self.__choose_batch(min_size_pct * bounds_width[pending], max_size_pct * bounds_width[pending], len(pending))
+
+            attempt = 0
+            while len(pending) > 0:
+                b = boundaries[pending]
+                if attempt % self.__max_moves == 0:
+                    # a fresh spot anywhere in the boundaries
+                    center_x = self.__choose_batch(b[:,0], b[:,2], len(pending))
+                    center_y = self.__choose_batch(b[:,1], b[:,3], len(pending))
+                else:
+                    # moved to a random spot, the same range generate_map_dict moves within
+                    center_x = self.__choose_batch(-bounds_width[pending] / 2, bounds_width[pending] / 2, len(pending))
+                    center_y = self.__choose_batch(-bounds_height[pending] / 2, bounds_height[pending] / 2, len(pending))
+
+                candidates = np.stack([center_x - (width / 2), center_y - (height / 2), center_x + (width / 2), center_y + (height / 2)], axis=1)
+                fits = self.__objects_fit_batch(candidates, b, rects[pending,:r])
+
+                rects[pending[fits], r] = candidates[fits]
+                pending = pending[~fits]
+                height = height[~fits]
+                width = width[~fits]
+                attempt += 1
+
+        return rects
+
+    # vectorized __object_fits, candidates is (p, 4), boundaries (p, 4), used spaces (p, k, 4)
+    def __objects_fit_batch (self, candidates, boundaries, used_spaces):
+        min_x, min_y, max_x, max_y = [candidates[:,i,np.newaxis] for i in range(4)]
+        in_bounds = (candidates[:,0] >= boundaries[:,0]) & (candidates[:,2] <= boundaries[:,2]) & (candidates[:,1] >= boundaries[:,1]) & (candidates[:,3] <= boundaries[:,3])
+
+        sp_xmin, sp_ymin, sp_xmax, sp_ymax = [used_spaces[:,:,i] for i in range(4)]
+        x_overlaps = ((sp_xmin > min_x) & (sp_xmin < max_x)) | ((sp_xmax > min_x) & (sp_xmax < max_x))
+        y_overlaps = ((sp_ymin > min_y) & (sp_ymin < max_y)) | ((sp_ymax > min_y) & (sp_ymax < max_y))
+        overlaps = np.any(x_overlaps & y_overlaps, axis=1)
+
+        # same as __object_fits, anything outside the boundaries is accepted as is
+        return ~in_bounds | ~overlaps
+
     def __add_boundaries (self, map_json):
         # center the map in a random location
-        center_x = np.random.choice(np.linspace(self.__center_x_min, self.__center_x_max))
-        center_y = np.random.choice(np.linspace(self.__center_y_min, self.__center_y_max))
+        center_x = self.__choice(np.linspace(self.__center_x_min, self.__center_x_max))
+        center_y = self.__choice(np.linspace(self.__center_y_min, self.__center_y_max))
 
-        width = np.random.choice(np.linspace(self.__min_width, self.__max_width))
-        height = np.random.choice(np.linspace(self.__min_height, self.__max_height))
+        width = self.__choice(np.linspace(self.__min_width, self.__max_width))
+        height = self.__choice(np.linspace(self.__min_height, self.__max_height))
 
         map_json['boundaries'] = {
             'xmin':center_x - (width / 2),
@@ -65,7 +200,7 @@ class RandomFieldMapGenerator (FieldMapGenerator):
 
     def __add_dead_spots (self, map_json):
         map_json['dead_spots'] = {}
-        num_deadspots = np.random.randint(self.__min_deadspots, self.__max_deadspots+1)
+        num_deadspots = self.__randint(self.__min_deadspots, self.__max_deadspots+1)
         boundaries = map_json['boundaries']
 
         min_ds_width = self.__min_deadspot_size_pct * (boundaries['xmax'] - boundaries['xmin'])
@@ -86,7 +221,7 @@ class RandomFieldMapGenerator (FieldMapGenerator):
 
     def __add_obstacles (self, map_json):
         map_json['obstacles'] = {}
-        num_obstacles = np.random.randint(self.__min_obstacles, self.__max_obstacles+1)
+        num_obstacles = self.__randint(self.__min_obstacles, self.__max_obstacles+1)
         boundaries = map_json['boundaries']
 
         min_obstacle_width = self.__min_obstacle_size_pct * (boundaries['xmax'] - boundaries['xmin'])
@@ -107,8 +242,8 @@ class RandomFieldMapGenerator (FieldMapGenerator):
             
     
     def __get_coords_random_size_shape (self, min_height : float, max_height : float, min_width : float, max_width : float, boundaries : tuple, used_spaces : list, overlap_allowed : bool):
-        height = np.random.choice(np.linspace(min_height, max_height))
-        width = np.random.choice(np.linspace(min_width, max_width))
+        height = self.__choice(np.linspace(min_height, max_height))
+        width = self.__choice(np.linspace(min_width, max_width))
         obj_min_x = None
         obj_min_y = None
         obj_max_x = None
@@ -117,8 +252,8 @@ class RandomFieldMapGenerator (FieldMapGenerator):
         # randomly select a different center x until the given width fits in an area not already taken
         found_fit = False
         while found_fit == False:
-            center_x = np.random.choice(np.linspace(boundaries['xmin'], boundaries['xmax']))
-            center_y = np.random.choice(np.linspace(boundaries['ymin'], boundaries['ymax']))
+            center_x = self.__choice(np.linspace(boundaries['xmin'], boundaries['xmax']))
+            center_y = self.__choice(np.linspace(boundaries['ymin'], boundaries['ymax']))
             obj_min_x, obj_min_y, obj_max_x, obj_max_y = self.__get_centered_coords(center_x=center_x, center_y=center_y, height=height, width=width)
 
             max_moves = 10
@@ -137,8 +272,8 @@ class RandomFieldMapGenerator (FieldMapGenerator):
                 
                 if found_fit == False:
                     # move the center of the object in a random direction
-                    center_x = np.random.choice(potential_x_moves)
-                    center_y = np.random.choice(potential_y_moves)                    
+                    center_x = self.__choice(potential_x_moves)
+                    center_y = self.__choice(potential_y_moves)                    
                     obj_min_x, obj_min_y, obj_max_x, obj_max_y = self.__get_centered_coords(center_x=center_x, center_y=center_y, height=height, width=width)
                 move_count += 1
         
@@ -2,6 +2,7 @@ import unittest
 from lvps.generators.random_field_map_generator import RandomFieldMapGenerator
 import logging
 import json
+import numpy as np
 
 class RandomMapGeneratorTest(unittest.TestCase):
     def setUp(self) -> None:
@@ -24,4 +25,53 @@ class RandomMapGeneratorTest(unittest.TestCase):
             max_deadspot_size_pct=0.05
         )
 
-        logging.getLogger(__name__).info(f"Generated: {json.dumps(generator.generate_map_dict())}")
\ No newline at end of file
+        logging.getLogger(__name__).info(f"Generated: {json.dumps(generator.generate_map_dict())}")
+
+    def __create_generator (self, seed):
+        return RandomFieldMapGenerator(
+            min_width=150,
+            max_width=500,
+            min_height=150,
+            max_height=500,
+            min_obstacles=3,
+            max_obstacles=10,
+            min_obstacle_size_pct=0.01,
+            max_obstacle_size_pct=0.25,
+            min_deadspots=2,
+            max_deadspots=10,
+            min_deadspot_size_pct = 0.01,
+            max_deadspot_size_pct=0.05,
+            rng=np.random.default_rng(seed)
+        )
+
+    def test_batch (self):
+        maps = self.__create_generator(seed=5).generate_map_arrays(200)
+        self.assertEqual((200,), maps.shape)
+        self.assertTrue(np.all((maps['num_obstacles'] >= 3) & (maps['num_obstacles'] <= 10)))
+        self.assertTrue(np.all((maps['num_dead_spots'] >= 2) & (maps['num_dead_spots'] <= 10)))
+
+        widths = maps['boundaries']['xmax'] - maps['boundaries']['xmin']
+        self.assertTrue(np.all((widths >= 150 - 1e-9) & (widths <= 500 + 1e-9)))
+
+        for m in maps:
+            # obstacles that landed inside the boundaries never overlap one placed before them
+            b = m['boundaries']
+            placed = []
+            for o in m['obstacles'][:m['num_obstacles']]:
+                in_bounds = o['xmin'] >= b['xmin'] and o['xmax'] <= b['xmax'] and o['ymin'] >= b['ymin'] and o['ymax'] <= b['ymax']
+                if in_bounds:
+                    for p in placed:
+                        x_overlap = (o['xmin'] < p['xmin'] < o['xmax']) or (o['xmin'] < p['xmax'] < o['xmax'])
+                        y_overlap = (o['ymin'] < p['ymin'] < o['ymax']) or (o['ymin'] < p['ymax'] < o['ymax'])
+                        self.assertFalse(x_overlap and y_overlap)
+                placed.append(o)
+
+    def test_batch_dicts (self):
+        map_dicts = self.__create_generator(seed=5).generate_map_dicts(20)
+        self.assertEqual(20, len(map_dicts))
+        for map_dict in map_dicts:
+            self.assertEqual(set(['shape', 'boundaries', 'landmarks', 'obstacles', 'dead_spots']), set(map_dict.keys()))
+            self.assertTrue(3 <= len(map_dict['obstacles']) <= 10)
+
+        # same seed, same maps
+        self.assertEqual(map_dicts, self.__create_generator(seed=5).generate_map_dicts(20))
@@ -0,0 +1,18 @@
+import multiprocessing
+
+# helpers shared by the process pool batch runners (LvpsEvaluator, SearchBatchRunner)
+
+# runs func over every item of work in a pool of up to num_workers processes, yielding results in completion order.
+# initializer / initargs set up each worker process, as with multiprocessing.Pool
+def iterate_pool_results (func, work, num_workers, start_method = 'spawn', initializer = None, initargs = ()):
+    if len(work) == 0:
+        return
+
+    context = multiprocessing.get_context(start_method)
+    with context.Pool(processes=min(num_workers, len(work)), initializer=initializer, initargs=initargs) as pool:
+        for result in pool.imap_unordered(func, work):
+            yield result
+
+# a statistic for a report, 'n/a' when there is none
+def format_stat (value, digits = 4):
+    return 'n/a' if value is None else round(value, digits)
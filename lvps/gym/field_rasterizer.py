@@ -0,0 +1,326 @@
+import math
+import logging
+import numpy as np
+from PIL import Image
+
+# pure numpy replacement for the matplotlib based FieldRenderer.
+# it exposes the same methods the simulation and strategies use (update_agent_state, update_search_state,
+# render_field_image_to_array, save_field_image, get_map_scaler), so it can be handed to SimulatedAgent
+# in place of a FieldRenderer. Images are drawn straight into a preallocated uint8 array.
+# Axes are oriented the way the map scaler maps lvps coords to image coords (without one, the way the field image
+# scaler every map builds does: both axes inverted, so north is up and lvps x grows to the left).
+# The output is not pixel-identical to the matplotlib rendering, so models trained with one should not
+# be evaluated with the other.
+
+class RasterLayers:
+    OutOfBounds = 0
+    Free = 1
+    DeadSpot = 2
+    Obstacle = 3
+    Looked = 4
+    FoundTarget = 5
+    OtherAgent = 6
+    Agent = 7
+
+    Grayscale = {
+        OutOfBounds : 20,
+        Free : 255,
+        DeadSpot : 170,
+        Obstacle : 60,
+        Looked : 215,
+        FoundTarget : 110,
+        OtherAgent : 140,
+        Agent : 0
+    }
+
+    Color = {
+        OutOfBounds : (20, 20, 20),
+        Free : (255, 255, 255),
+        DeadSpot : (230, 200, 120),
+        Obstacle : (40, 40, 200),
+        Looked : (200, 240, 200),
+        FoundTarget : (220, 30, 30),
+        OtherAgent : (120, 120, 120),
+        Agent : (0, 150, 0)
+    }
+
+class FieldRasterizer:
+    def __init__(self, field_map_dict, map_scaler = None, grayscale = True):
+        self.__map_scaler = map_scaler
+        self.__grayscale = grayscale
+
+        boundaries = field_map_dict['boundaries']
+        self.__boundaries = (boundaries['xmin'], boundaries['ymin'], boundaries['xmax'], boundaries['ymax'])
+        self.__obstacles = self.__get_rects(field_map_dict, 'obstacles')
+        self.__dead_spots = self.__get_rects(field_map_dict, 'dead_spots')
+        self.__col_direction, self.__row_direction = self.__get_axis_directions(map_scaler)
+
+        # same fit the field image scaler uses, map takes up 90% of the shorter image side
+        self.__fill_pct = 0.9
+        self.__min_marker_pixels = 2
+
+        self.__agent_positions = {}
+        self.__agent_looks = {}
+        self.__found_targets = []
+
+        # everything below is cached per image shape (height, width)
+        self.__transforms = {}
+        self.__static_layers = {}
+        self.__game_state_layers = {}
+        self.__frames = {}
+        self.__palette = self.__build_palette(grayscale)
+
+    def __get_rects (self, field_map_dict, key):
+        rects = []
+        if key in field_map_dict and field_map_dict[key] is not None:
+            for rect_id in field_map_dict[key]:
+                r = field_map_dict[key][rect_id]
+                rects.append((r['xmin'], r['ymin'], r['xmax'], r['ymax']))
+        return rects
+
+    # image col and row direction (1 or -1) per unit of lvps x and y
+    def __get_axis_directions (self, map_scaler):
+        if map_scaler is None:
+            return -1, -1
+        xmin, ymin, xmax, ymax = self.__boundaries
+        col_min, row_min = map_scaler.get_scaled_coords(lvps_x=xmin, lvps_y=ymin)
+        col_max, row_max = map_scaler.get_scaled_coords(lvps_x=xmax, lvps_y=ymax)
+        return (1 if col_max >= col_min else -1), (1 if row_max >= row_min else -1)
+
+    def __build_palette (self, grayscale):
+        if grayscale:
+            palette = np.zeros((256,), dtype=np.uint8)
+            for layer, value in RasterLayers.Grayscale.items():
+                palette[layer] = value
+        else:
+            palette = np.zeros((256, 3), dtype=np.uint8)
+            for layer, value in RasterLayers.Color.items():
+                palette[layer] = value
+        return palette
+
+    def get_map_scaler (self):
+        return self.__map_scaler
+
+    def update_agent_state (self, agent_id, position_history, look_history):
+        self.__agent_positions[agent_id] = position_history[-1] if len(position_history) > 0 else None
+        self.__agent_looks[agent_id] = look_history
+
+    def update_search_state (self, agent_id, target_type, x, y):
+        self.__found_targets.append((agent_id, target_type, x, y))
+
+    # snapshot of the game state that gets drawn. Look histories are referenced rather than copied, agents hand over
+    # a new list on every update. found targets are only ever appended, so the count marks where the snapshot ends
+    def get_render_state (self):
+        return {
+            'positions':{aid:(None if p is None else (p[0], p[1], p[2])) for aid, p in self.__agent_positions.items()},
+            'looks':dict(self.__agent_looks),
+            'found_targets':self.__found_targets,
+            'num_found_targets':len(self.__found_targets)
+        }
+
+    # replaces the game state wholesale, for redrawing earlier states.
+    # positions are (x, y, heading) or None per agent id, looks are oldest first per agent id, found targets are (agent id, type, x, y)
+    def set_render_state (self, positions, looks, found_targets):
+        self.__agent_positions = dict(positions)
+        self.__agent_looks = dict(looks)
+        self.__found_targets = found_targets
+
+    # renders the static map layers for the given image size ahead of time, so the first observation
+    # of an episode doesn't pay for it
+    def prepare (self, width_inches = 4, height_inches = 4, dpi = 100):
+        self.__get_static_layers(round(height_inches * dpi), round(width_inches * dpi))
+
+    def render_field_image_to_array (self, add_game_state = True, agent_id = None, other_agents_visible = True, width_inches = 4, height_inches = 4, dpi = 100):
+        height = round(height_inches * dpi)
+        width = round(width_inches * dpi)
+        static_layers = self.__get_static_layers(height, width)
+        if not add_game_state:
+            return self.__to_image_array(static_layers)
+
+        frame = self.__get_frame(height, width)
+        if other_agents_visible:
+            # looks and found targets only ever accumulate, so they are kept on a cached copy of the static layers
+            # and only the moving agents are drawn per render
+            np.copyto(frame, self.__get_game_state_layers(height, width))
+        else:
+            np.copyto(frame, static_layers)
+            if agent_id in self.__agent_looks:
+                for look in self.__agent_looks[agent_id]:
+                    self.__draw_look(frame, look)
+            for _, _, x, y in self.__found_targets:
+                self.__draw_marker(frame, x, y, RasterLayers.FoundTarget)
+
+        for aid in self.__get_visible_agents(agent_id, other_agents_visible):
+            position = self.__agent_positions[aid]
+            if position is not None:
+                self.__draw_agent(frame, position, RasterLayers.Agent if aid == agent_id else RasterLayers.OtherAgent)
+
+        return self.__to_image_array(frame)
+
+    def save_field_image (self, image_file, add_game_state = True, agent_id = None, other_agents_visible = True, width_inches = 4, height_inches = 4, dpi = 100):
+        image_array = self.render_field_image_to_array(
+            add_game_state=add_game_state,
+            agent_id=agent_id,
+            other_agents_visible=other_agents_visible,
+            width_inches=width_inches,
+            height_inches=height_inches,
+            dpi=dpi)
+        Image.fromarray(image_array[:,:,0] if self.__grayscale else image_array).save(image_file)
+
+    def __get_visible_agents (self, agent_id, other_agents_visible):
+        if other_agents_visible:
+            return list(self.__agent_positions.keys())
+        return [agent_id] if agent_id in self.__agent_positions else []
+
+    def __get_transform (self, shape):
+        if shape not in self.__transforms:
+            height, width = shape
+            xmin, ymin, xmax, ymax = self.__boundaries
+            self.__transforms[shape] = (
+                (min(height, width) * self.__fill_pct) / max(xmax - xmin, ymax - ymin), # scale
+                width / 2, # center col
+                height / 2, # center row
+                xmin + (xmax - xmin) / 2, # center x
+                ymin + (ymax - ymin) / 2) # center y
+        return self.__transforms[shape]
+
+    def __get_frame (self, height, width):
+        # the working frame holds layer ids, it is reused across renders
+        if (height, width) not in self.__frames:
+            self.__frames[(height, width)] = np.empty((height, width), dtype=np.uint8)
+        return self.__frames[(height, width)]
+
+    def __get_static_layers (self, height, width):
+        if (height, width) not in self.__static_layers:
+            static_layers = np.empty((height, width), dtype=np.uint8)
+            self.__draw_static_layers(static_layers)
+            self.__static_layers[(height, width)] = static_layers
+        return self.__static_layers[(height, width)]
+
+    # brings the cached static + look + found target layers up to date with the latest agent state.
+    # only looks and finds that arrived since the last render are drawn
+    def __get_game_state_layers (self, height, width):
+        shape = (height, width)
+        if shape not in self.__game_state_layers:
+            self.__game_state_layers[shape] = {
+                'layers':self.__get_static_layers(height, width).copy(),
+                'looks_drawn':{},
+                'targets_drawn':0
+            }
+        cached = self.__game_state_layers[shape]
+        if len(self.__found_targets) < cached['targets_drawn']:
+            # found targets were replaced, start over
+            del self.__game_state_layers[shape]
+            return self.__get_game_state_layers(height, width)
+
+        for aid, looks in self.__agent_looks.items():
+            drawn_count, last_drawn = cached['looks_drawn'].get(aid, (0, None))
+            if len(looks) < drawn_count or (drawn_count > 0 and looks[drawn_count - 1] != last_drawn):
+                # history was replaced rather than extended, start over
+                del self.__game_state_layers[shape]
+                return self.__get_game_state_layers(height, width)
+
+            for look in looks[drawn_count:]:
+                self.__draw_look(cached['layers'], look)
+            if len(looks) > 0:
+                cached['looks_drawn'][aid] = (len(looks), looks[-1])
+
+        for _, _, x, y in self.__found_targets[cached['targets_drawn']:]:
+            self.__draw_marker(cached['layers'], x, y, RasterLayers.FoundTarget)
+        cached['targets_drawn'] = len(self.__found_targets)
+
+        return cached['layers']
+
+    def __to_image_array (self, frame):
+        # palette lookup creates a new array, so callers never see the working frame change underneath them
+        image_array = self.__palette[frame]
+        if self.__grayscale:
+            return image_array[:,:,np.newaxis]
+        return image_array
+
+    def __to_pixel (self, frame, x, y):
+        scale, center_col, center_row, center_x, center_y = self.__get_transform(frame.shape)
+        return center_col + self.__col_direction * (x - center_x) * scale, center_row + self.__row_direction * (y - center_y) * scale
+
+    def __to_pixel_box (self, frame, xmin, ymin, xmax, ymax):
+        col_a, row_a = self.__to_pixel(frame, xmin, ymin)
+        col_b, row_b = self.__to_pixel(frame, xmax, ymax)
+        col_min, col_max = min(col_a, col_b), max(col_a, col_b)
+        row_min, row_max = min(row_a, row_b), max(row_a, row_b)
+        height, width = frame.shape
+        return (
+            max(0, min(height, int(math.floor(row_min)))),
+            max(0, min(height, int(math.ceil(row_max)))),
+            max(0, min(width, int(math.floor(col_min)))),
+            max(0, min(width, int(math.ceil(col_max)))))
+
+    def __fill_rect (self, frame, rect, layer):
+        r0, r1, c0, c1 = self.__to_pixel_box(frame, *rect)
+        frame[r0:r1, c0:c1] = layer
+
+    def __draw_static_layers (self, frame):
+        frame.fill(RasterLayers.OutOfBounds)
+        self.__fill_rect(frame, self.__boundaries, RasterLayers.Free)
+        for ds in self.__dead_spots:
+            self.__fill_rect(frame, ds, RasterLayers.DeadSpot)
+        for o in self.__obstacles:
+            self.__fill_rect(frame, o, RasterLayers.Obstacle)
+
+    def __get_disc_window (self, frame, x, y, radius):
+        # returns the frame window around the given lvps coords, along with lvps offsets of each pixel center
+        r0, r1, c0, c1 = self.__to_pixel_box(frame, x - radius, y - radius, x + radius, y + radius)
+        if r0 >= r1 or c0 >= c1:
+            return None, None, None
+        scale = self.__get_transform(frame.shape)[0]
+        col, row = self.__to_pixel(frame, x, y)
+        dx = self.__col_direction * ((np.arange(c0, c1) + 0.5) - col) / scale
+        dy = self.__row_direction * ((np.arange(r0, r1) + 0.5) - row) / scale
+        return frame[r0:r1, c0:c1], dx[np.newaxis,:], dy[:,np.newaxis]
+
+    def __draw_look (self, frame, look):
+        x, y, heading, relative_begin, relative_end, distance = look
+        if x is None or y is None or heading is None:
+            return
+
+        window, dx, dy = self.__get_disc_window(frame, x, y, distance)
+        if window is None:
+            return
+
+        # zero is north, positive headings are clockwise
+        relative = np.degrees(np.arctan2(dx, dy)) - heading
+        relative = (relative + 180.0) % 360.0 - 180.0
+        in_look = ((dx ** 2 + dy ** 2) <= distance ** 2) & (relative >= relative_begin) & (relative <= relative_end)
+
+        # looking only shades open field
+        window[in_look & (window == RasterLayers.Free)] = RasterLayers.Looked
+
+    def __get_marker_radius (self, frame):
+        return max(self.__min_marker_pixels / self.__get_transform(frame.shape)[0], 2.0)
+
+    def __draw_marker (self, frame, x, y, layer):
+        radius = self.__get_marker_radius(frame)
+        r0, r1, c0, c1 = self.__to_pixel_box(frame, x - radius, y - radius, x + radius, y + radius)
+        frame[r0:r1, c0:c1] = layer
+
+    def __draw_agent (self, frame, position, layer):
+        x, y, heading = position[0], position[1], position[2]
+        if x is None or y is None:
+            return
+
+        radius = self.__get_marker_radius(frame) * 1.5
+        window, dx, dy = self.__get_disc_window(frame, x, y, radius)
+        if window is not None:
+            window[(dx ** 2 + dy ** 2) <= radius ** 2] = layer
+
+        # heading tick, so the direction the agent faces is part of the observation
+        if heading is not None:
+            tick_length = radius * 2.5
+            steps = max(2, int(math.ceil(tick_length * self.__get_transform(frame.shape)[0])))
+            distances = np.linspace(radius, tick_length, steps)
+            cols, rows = self.__to_pixel(frame,
+                x + distances * math.sin(math.radians(heading)),
+                y + distances * math.cos(math.radians(heading)))
+            rows = rows.astype(np.int64)
+            cols = cols.astype(np.int64)
+            on_frame = (rows >= 0) & (rows < frame.shape[0]) & (cols >= 0) & (cols < frame.shape[1])
+            frame[rows[on_frame], cols[on_frame]] = layer
@@ -0,0 +1,153 @@
+import logging
+import os
+import time
+import numpy as np
+from .rbean_utils import RunningStats
+from .batch_utils import iterate_pool_results, format_stat
+
+# evaluates a saved model over many seeded episodes, spread across a pool of processes.
+# each worker builds its own LvpsGymEnv and loads the model once, then plays whichever episode seeds it is handed.
+# only a small result per episode comes back, and the statistics are accumulated as results arrive,
+# so memory stays flat regardless of how many episodes are run
+
+# per process worker state, set up by _init_worker
+_worker_env = None
+_worker_model = None
+_worker_deterministic = True
+
+def _init_worker (model_path, model_class, env_kwargs, deterministic):
+    global _worker_env, _worker_model, _worker_deterministic
+
+    # imported here, so the parent process doesn't need the simulation loaded to hand out work
+    from .lvps_gym_env import LvpsGymEnv
+
+    # each worker is already one of many processes, more torch threads per worker only compete
+    import torch
+    torch.set_num_threads(1)
+
+    _worker_env = LvpsGymEnv(**env_kwargs)
+    _worker_model = model_class.load(model_path, device='cpu')
+    _worker_deterministic = deterministic
+
+def _run_episode (episode_args):
+    seed, max_steps, gamma = episode_args
+    return run_episode(_worker_env, _worker_model, seed=seed, max_steps=max_steps, gamma=gamma, deterministic=_worker_deterministic)
+
+# plays one episode of the model in the env, keeping only the summary of it
+def run_episode (env, model, seed, max_steps = 1000, gamma = 1.0, deterministic = True):
+    started = time.time()
+    observation, info = env.reset(seed=int(seed))
+
+    episode_return = 0.0
+    discount = 1.0
+    length = 0
+    targets_found = 0
+    first_find_step = None
+    terminated = False
+
+    while length < max_steps:
+        action, _ = model.predict(observation, deterministic=deterministic)
+        observation, reward, terminated, truncated, info = env.step(action)
+        length += 1
+
+        episode_return += discount * reward
+        discount *= gamma
+
+        targets_found = info.get('targets_found', targets_found)
+        if first_find_step is None and targets_found > 0:
+            first_find_step = length
+
+        if terminated or truncated:
+            break
+
+    return {
+        'seed':int(seed),
+        'return':float(episode_return),
+        'length':length,
+        'targets_found':targets_found,
+        'first_find_step':first_find_step,
+        'success':bool(terminated),
+        'seconds':time.time() - started
+    }
+
+class LvpsEvaluator:
+    # model_class is the SB3 algorithm the model was saved with (DQN, A2C, ..)
+    # env_kwargs are passed to each worker's LvpsGymEnv
+    # num_workers defaults to one per cpu
+    def __init__(self, model_path, model_class = None, env_kwargs = None, num_workers = None, deterministic = True, start_method = 'spawn'):
+        if model_class is None:
+            from stable_baselines3 import DQN
+            model_class = DQN
+
+        self.__model_path = model_path
+        self.__model_class = model_class
+        self.__env_kwargs = {} if env_kwargs is None else env_kwargs
+        self.__num_workers = num_workers if num_workers is not None else os.cpu_count()
+        self.__deterministic = deterministic
+        self.__start_method = start_method
+
+    # returns the episode seeds evaluate uses, drawn the same way for a given seed
+    def get_episode_seeds (self, episodes, seed = None):
+        return np.random.default_rng(seed).integers(0, 10**6, size=episodes)
+
+    # yields each episode's result as soon as a worker finishes it (in completion order, not seed order)
+    def iterate_results (self, episodes, max_steps = 1000, gamma = 1.0, seed = None):
+        work = [(int(s), max_steps, gamma) for s in self.get_episode_seeds(episodes, seed)]
+
+        yield from iterate_pool_results(
+            _run_episode,
+            work,
+            num_workers=self.__num_workers,
+            start_method=self.__start_method,
+            initializer=_init_worker,
+            initargs=(self.__model_path, self.__model_class, self.__env_kwargs, self.__deterministic))
+
+    def evaluate (self, episodes, max_steps = 1000, gamma = 1.0, seed = None, show_report = True):
+        returns = RunningStats()
+        lengths = RunningStats()
+        targets_found = RunningStats()
+        first_find_steps = RunningStats()
+        num_success = 0
+        num_found_any = 0
+
+        for result in self.iterate_results(episodes=episodes, max_steps=max_steps, gamma=gamma, seed=seed):
+            returns.push(result['return'])
+            lengths.push(result['length'])
+            targets_found.push(result['targets_found'])
+            if result['first_find_step'] is not None:
+                first_find_steps.push(result['first_find_step'])
+                num_found_any += 1
+            if result['success']:
+                num_success += 1
+
+            logging.getLogger(__name__).debug(f"Episode (seed {result['seed']}) finished: {result}")
+
+        stats = {
+            'episodes':returns.count,
+            'mean_return':returns.get_mean(),
+            'stdev_return':returns.get_stdev(),
+            'mean_length':lengths.get_mean(),
+            'stdev_length':lengths.get_stdev(),
+            'mean_targets_found':targets_found.get_mean(),
+            'find_rate':None if returns.count == 0 else num_found_any / returns.count,
+            'mean_first_find_step':first_find_steps.get_mean(),
+            'stdev_first_find_step':first_find_steps.get_stdev(),
+            'sr':None if returns.count == 0 else num_success / returns.count
+        }
+
+        if show_report:
+            self.print_report(stats)
+
+        return stats
+
+    def print_report (self, stats):
+        fmt = format_stat
+        print(f'Episodes:            {stats["episodes"]}')
+        print(f'Mean Return:         {fmt(stats["mean_return"])}')
+        print(f'StdDev Return:       {fmt(stats["stdev_return"])}')
+        print(f'Mean Length:         {fmt(stats["mean_length"])}')
+        print(f'StdDev Length:       {fmt(stats["stdev_length"])}')
+        print(f'Mean Targets Found:  {fmt(stats["mean_targets_found"])}')
+        print(f'Find Rate:           {fmt(stats["find_rate"])}')
+        print(f'Mean First Find:     {fmt(stats["mean_first_find_step"])}')
+        print(f'Success Rate:        {fmt(stats["sr"])}')
@@ -9,15 +9,35 @@ from lvps.simulation.agent_types import AgentTypes
 from lvps.simulation.sim_events import SimEventType
 from field.field_renderer import FieldRenderer
 from .lvps_gym_rewards import LvpsGymRewards
-import random
+from .field_rasterizer import FieldRasterizer
+from lvps.simulation.trajectory_recorder import TrajectoryRecorder
 import numpy as np
 import logging
+import uuid
 
 class LvpsGymEnv(gym.Env):
     metadata = {"render_modes": ["console"]}
 
-    def __init__(self, render_mode=None):
+    # observation_renderer selects how observations are drawn:
+    #   'matplotlib' - FieldRenderer, the original figure based rendering
+    #   'numpy' - FieldRasterizer, draws directly into a uint8 array (much faster)
+    # map_pool is an optional MapPool (or MapCorpus) that resets take ready made maps from
+    # render_state_info adds the state each observation was drawn from to the step info (numpy renderer only),
+    # so a replay buffer can store that instead of the image (see LvpsStateReplayBuffer)
+    # trajectory_dir, if given, is where every episode is recorded (see TrajectoryRecorder / TrajectoryReplayer)
+    def __init__(self, render_mode=None, observation_renderer='matplotlib', map_pool=None, render_state_info=False, trajectory_dir=None):
         super().__init__()
+        self.__map_pool = map_pool
+        self.__trajectory_recorder = TrajectoryRecorder(trajectory_dir) if trajectory_dir is not None else None
+
+        if observation_renderer not in ['matplotlib', 'numpy']:
+            raise ValueError(f"Unknown observation renderer: {observation_renderer}")
+        if render_state_info and observation_renderer != 'numpy':
+            raise ValueError("Render state info requires the numpy observation renderer")
+        self.__observation_renderer = observation_renderer
+        self.__render_state_info = render_state_info
+        self.__episode_id = None
+        self.__last_render_state = None
 
         self.__scaled_map_height = 400
         self.__scaled_map_width = 400
@@ -27,6 +47,9 @@ class LvpsGymEnv(gym.Env):
         self.__observation_image_width_inches = 4
         self.__observation_image_dpi = 100
 
+        # observations can be switched off (step and reset return None) to fast forward through an episode
+        self.__render_observations = True
+
         # Define action and observation space
         self.action_space = spaces.Discrete(AgentActions.NumTrainableActions)
 
@@ -53,6 +76,7 @@ class LvpsGymEnv(gym.Env):
         self.__num_targets = 2
         self.__lvps_sim_step = 0
         self.__reset_count = 0
+        self.__lvps_env_seed = None
 
     def step(self, action):
         self.__lvps_sim_step += 1
@@ -70,6 +94,7 @@ class LvpsGymEnv(gym.Env):
         )
         
         self.__update_agent_coords(agent=self.__training_agent, force_refresh=True)
+        self.get_lvps_environment().record_action(self.__training_agent.get_id(), action, action_result)
         agent_step_targets_found = len(self.__found_targets)
         end_nearest_unfound_target_id, end_nearest_unfound_target_dist, end_nearest_unfound_heading = self.__training_agent.get_nearest_unfound_target_distance()
 
@@ -106,6 +131,7 @@ class LvpsGymEnv(gym.Env):
             self.__drone_last_action[d.get_id()] = next_drone_action
             self.__drone_last_result[d.get_id()] = drone_result
             self.__update_agent_coords(agent=d, force_refresh=True)
+            self.get_lvps_environment().record_action(d.get_id(), next_drone_action, drone_result)
 
         complete_step_targets_found = len(self.__found_targets)
 
@@ -136,12 +162,24 @@ class LvpsGymEnv(gym.Env):
         )
 
         terminated = len(self.__found_targets) == self.__num_targets
-        info = {}
+        info = {'targets_found':len(self.__found_targets)}
 
         if reward > 0:
             logging.getLogger(__name__).info(f"Action: {self.__get_action_name(action)}, Result: {action_result}, Reward: {reward}")
 
-        return self.__get_agent_observation(self.__training_agent), reward, terminated, truncated, info
+        observation = self.__get_agent_observation(self.__training_agent)
+        if self.__render_state_info:
+            render_state = self.__training_agent.get_field_renderer().get_render_state()
+            info['lvps_render_state'] = {
+                'episode_id':self.__episode_id,
+                'map_dict':self.get_lvps_environment().get_map_dict(),
+                'agent_id':self.__training_agent.get_id(),
+                'obs':self.__last_render_state,
+                'next_obs':render_state
+            }
+            self.__last_render_state = render_state
+
+        return observation, reward, terminated, truncated, info
     
     def __get_action_name(self, action):
         if type(action) is np.array or type(action) is np.ndarray:
@@ -256,6 +294,10 @@ class LvpsGymEnv(gym.Env):
         self.__next_agent_id = 0
         self.__lvps_sim_step = 0
 
+        # the simulation gets its own random stream, drawn from the env's (seeded) generator,
+        # so a given reset seed always produces the same episode
+        self.__lvps_env_seed = int(self.np_random.integers(0, 2**63 - 1))
+
         # add all agents
         self.__add_agents()
 
@@ -268,18 +310,39 @@ class LvpsGymEnv(gym.Env):
         self.get_lvps_environment().add_event_subscription (event_type = SimEventType.AgentMoved, listener = self)
         self.get_lvps_environment().add_event_subscription (event_type = SimEventType.TargetFound, listener = self)
 
+        if self.__trajectory_recorder is not None:
+            self.get_lvps_environment().set_trajectory_recorder(self.__trajectory_recorder)
+
         # any auxilary/debugging/etc info to be carried forward
         info = {}
 
-        return self.__get_agent_observation(self.__training_agent), info
+        observation = self.__get_agent_observation(self.__training_agent)
+        if self.__render_state_info:
+            self.__episode_id = uuid.uuid4().hex
+            self.__last_render_state = self.__training_agent.get_field_renderer().get_render_state()
+
+        return observation, info
 
     def render(self):
         pass
 
+    def set_render_observations (self, render_observations):
+        self.__render_observations = render_observations
+
+    def is_render_observations (self):
+        return self.__render_observations
+
+    # whether maps come from a map pool, rather than being generated from the simulation's seed
+    def has_map_pool (self):
+        return self.__map_pool is not None
+
     def close(self):
-        pass
+        if self.__trajectory_recorder is not None:
+            self.__trajectory_recorder.close()
 
     def __get_agent_observation (self, agent):
+        if not self.__render_observations:
+            return None
         return agent.get_field_renderer().render_field_image_to_array(
             add_game_state=True,
             agent_id=agent.get_id(),
@@ -289,14 +352,14 @@ class LvpsGymEnv(gym.Env):
             dpi=self.__observation_image_dpi)
 
     def __create_and_add_single_agent (self, field_renderer):
-        lvps_x,lvps_y = self.get_lvps_environment().get_field_image_scaler().get_random_traversable_coords()
-        lvps_heading = random.randrange(-1800,1800)/10 # pick a random starting heading
+        lvps_x,lvps_y = self.get_lvps_environment().get_random_traversable_coords()
+        lvps_heading = self.get_lvps_environment().get_random().randrange(-1800,1800)/10 # pick a random starting heading
         new_agent_id = self.__get_unique_id()
 
         # this agent receives a paired agent simulation
         lvps_agent = SimulatedAgent(
             agent_id=new_agent_id, 
-            agent_type=np.random.choice([AgentTypes.MecCar, AgentTypes.Tank]),
+            agent_type=self.get_lvps_environment().get_random().choice([AgentTypes.MecCar, AgentTypes.Tank]),
             field_renderer=field_renderer,
             lvps_env=self.get_lvps_environment())
 
@@ -304,12 +367,28 @@ class LvpsGymEnv(gym.Env):
         self.get_lvps_environment().add_agent (lvps_agent, lvps_x, lvps_y, lvps_heading)
         return lvps_agent
 
-    def __add_agents (self):
-        field_renderer = FieldRenderer(
+    def __create_field_renderer (self):
+        if self.__observation_renderer == 'numpy':
+            field_rasterizer = FieldRasterizer(
+                field_map_dict = self.get_lvps_environment().get_map_dict(),
+                map_scaler=self.get_lvps_environment().get_field_image_scaler(),
+                grayscale=self.__grayscale)
+
+            # the map doesn't change during the episode, so its layers are drawn once here
+            field_rasterizer.prepare(
+                width_inches=self.__observation_image_width_inches,
+                height_inches=self.__observation_image_height_inches,
+                dpi=self.__observation_image_dpi)
+            return field_rasterizer
+
+        return FieldRenderer(
             field_map = self.get_lvps_environment().get_map(),
             map_scaler=self.get_lvps_environment().get_field_image_scaler(),
             grayscale=self.__grayscale)
 
+    def __add_agents (self):
+        field_renderer = self.__create_field_renderer()
+
         # add the agent in training
         self.__training_agent = self.__create_and_add_single_agent(field_renderer=field_renderer)
         logging.getLogger(__name__).info("Added training agent.")
@@ -324,7 +403,7 @@ class LvpsGymEnv(gym.Env):
     def __add_targets (self):
         # create targets
         for i in range(self.__num_targets):
-            lvps_x,lvps_y = self.get_lvps_environment().get_field_image_scaler().get_random_traversable_coords()
+            lvps_x,lvps_y = self.get_lvps_environment().get_random_traversable_coords()
             target_id = self.__get_unique_id()
             self.get_lvps_environment().add_target(
                 target_id=target_id,
@@ -351,7 +430,10 @@ class LvpsGymEnv(gym.Env):
 
     def get_lvps_environment (self):
         if self.__lvps_env is None:
-            self.__lvps_env = LvpsSimEnvironment(id=self.__reset_count)
+            self.__lvps_env = LvpsSimEnvironment(
+                id=self.__reset_count,
+                seed=self.__lvps_env_seed,
+                prepared_map=self.__map_pool.get() if self.__map_pool is not None else None)
         return self.__lvps_env
 
     def __get_total_distance_traveled (self):
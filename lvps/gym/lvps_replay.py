@@ -0,0 +1,250 @@
+import hashlib
+import json
+import logging
+import os
+import gymnasium
+import numpy as np
+from .lvps_gym_env import LvpsGymEnv
+from lvps.simulation.map_pool import PreparedMap
+
+# record / replay of LvpsGymEnv episodes, for reproducing exactly what happened during a step.
+#
+# an LvpsGymEnv episode is fully determined by its reset seed, its map and the training agent's actions: everything
+# random in the simulation (and in the drone strategies) comes from the simulation's own stream, seeded at reset.
+# a recording holds those, plus what each step returned (reward, terminated, truncated, a digest of the observation),
+# so a replay can check it is really reproducing the episode.
+#
+# maps that the simulation generated itself are drawn from its random stream, so those are generated again on replay
+# (and checked against the recorded map). Maps that came from a map pool are handed back to the simulation as they were
+
+class EpisodeRecording:
+    Version = 1
+
+    def __init__(self, seed, map_dict, map_from_pool, env_kwargs = None):
+        self.__seed = seed
+        self.__map_dict = EpisodeRecording.to_saved_map_dict(map_dict)
+        self.__map_from_pool = map_from_pool
+        self.__env_kwargs = env_kwargs if env_kwargs is not None else {}
+        self.__actions = []
+        self.__rewards = []
+        self.__terminated = []
+        self.__truncated = []
+        self.__observation_digests = []
+
+    @staticmethod
+    def get_observation_digest (observation):
+        if observation is None:
+            return None
+        return hashlib.sha1(np.ascontiguousarray(observation).tobytes()).hexdigest()
+
+    # the map dict as it reads back from a saved recording (plain lists, ints and floats)
+    @staticmethod
+    def to_saved_map_dict (map_dict):
+        return json.loads(json.dumps(map_dict, default=EpisodeRecording.__to_json))
+
+    def get_seed (self):
+        return self.__seed
+
+    def get_map_dict (self):
+        return self.__map_dict
+
+    def is_map_from_pool (self):
+        return self.__map_from_pool
+
+    # the LvpsGymEnv keyword arguments (renderer, etc) the episode was recorded with
+    def get_env_kwargs (self):
+        return self.__env_kwargs
+
+    def get_num_steps (self):
+        return len(self.__actions)
+
+    def get_action (self, step):
+        return self.__actions[step]
+
+    # what the given step (0 based) returned: reward, terminated, truncated, observation digest
+    def get_step_result (self, step):
+        return self.__rewards[step], self.__terminated[step], self.__truncated[step], self.__observation_digests[step]
+
+    def add_step (self, action, reward, terminated, truncated, observation):
+        self.__actions.append(int(np.asarray(action).max()))
+        self.__rewards.append(float(reward))
+        self.__terminated.append(bool(terminated))
+        self.__truncated.append(bool(truncated))
+        self.__observation_digests.append(EpisodeRecording.get_observation_digest(observation))
+
+    def save (self, file_name):
+        with open(file_name, 'w') as f:
+            json.dump({
+                'version':EpisodeRecording.Version,
+                'seed':self.__seed,
+                'map_dict':self.__map_dict,
+                'map_from_pool':self.__map_from_pool,
+                'env_kwargs':self.__env_kwargs,
+                'actions':self.__actions,
+                'rewards':self.__rewards,
+                'terminated':self.__terminated,
+                'truncated':self.__truncated,
+                'observation_digests':self.__observation_digests
+            }, f, default=EpisodeRecording.__to_json)
+
+    @staticmethod
+    def __to_json (value):
+        # generated maps may hold numpy scalars
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Can't record value of type {type(value)}")
+
+    @staticmethod
+    def load (file_name):
+        with open(file_name, 'r') as f:
+            saved = json.load(f)
+        if saved['version'] != EpisodeRecording.Version:
+            raise ValueError(f"Unsupported episode recording version: {saved['version']}")
+
+        recording = EpisodeRecording(
+            seed=saved['seed'],
+            map_dict=saved['map_dict'],
+            map_from_pool=saved['map_from_pool'],
+            env_kwargs=saved['env_kwargs'])
+        for i, action in enumerate(saved['actions']):
+            recording.__actions.append(action)
+            recording.__rewards.append(saved['rewards'][i])
+            recording.__terminated.append(saved['terminated'][i])
+            recording.__truncated.append(saved['truncated'][i])
+            recording.__observation_digests.append(saved['observation_digests'][i])
+        return recording
+
+# records each episode of an LvpsGymEnv to {output_dir}/{name_prefix}_{n}.json.
+# resets without a seed are given one, since the seed is what makes the episode reproducible.
+# env_kwargs are the (plain valued) LvpsGymEnv arguments a replay should use, a map pool is not one of them
+class RecordLvpsEpisodesWrapper(gymnasium.Wrapper):
+    def __init__(self, env, output_dir, name_prefix = 'episode', env_kwargs = None):
+        super().__init__(env)
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.__output_dir = output_dir
+        self.__name_prefix = name_prefix
+        self.__env_kwargs = env_kwargs
+        self.__seeds = np.random.default_rng()
+        self.__recording = None
+        self.__episode_count = 0
+
+    def get_recording (self):
+        return self.__recording
+
+    def reset (self, seed = None, **kwargs):
+        self.__save_recording()
+        if seed is None:
+            seed = int(self.__seeds.integers(0, 2**31 - 1))
+        observation, info = self.env.reset(seed=seed, **kwargs)
+
+        self.__recording = EpisodeRecording(
+            seed=seed,
+            map_dict=self.env.unwrapped.get_lvps_environment().get_map_dict(),
+            map_from_pool=self.env.unwrapped.has_map_pool(),
+            env_kwargs=self.__env_kwargs)
+        return observation, info
+
+    def step (self, action):
+        observation, reward, terminated, truncated, info = self.env.step(action)
+        if self.__recording is not None:
+            self.__recording.add_step(action, reward, terminated, truncated, observation)
+            if terminated or truncated:
+                self.__save_recording()
+
+        return observation, reward, terminated, truncated, info
+
+    def close (self):
+        self.__save_recording()
+        return super().close()
+
+    def __save_recording (self):
+        if self.__recording is not None and self.__recording.get_num_steps() > 0:
+            self.__recording.save(os.path.join(self.__output_dir, f'{self.__name_prefix}_{self.__episode_count}.json'))
+            self.__episode_count += 1
+        self.__recording = None
+
+# hands the same map to every simulation, so a replay runs on the recorded map
+class RecordedMapPool:
+    def __init__(self, map_dict):
+        self.__map_dict = map_dict
+
+    def get (self, timeout = None):
+        return PreparedMap(self.__map_dict)
+
+# plays a recorded episode back through a fresh LvpsGymEnv.
+# step() takes the next recorded action and returns exactly what the recorded step returned.
+# seek(n) fast forwards to just after step n without rendering any observations along the way
+class LvpsEpisodeReplay:
+    def __init__(self, recording : EpisodeRecording, env_kwargs = None):
+        self.__recording = recording
+        env_kwargs = dict(recording.get_env_kwargs() if env_kwargs is None else env_kwargs)
+        if recording.is_map_from_pool():
+            env_kwargs['map_pool'] = RecordedMapPool(recording.get_map_dict())
+
+        self.__env = LvpsGymEnv(**env_kwargs)
+        self.__step = None
+
+    def get_env (self):
+        return self.__env
+
+    # the simulation being replayed, to inspect agents, targets, etc
+    def get_lvps_environment (self):
+        return self.__env.get_lvps_environment()
+
+    def get_recording (self):
+        return self.__recording
+
+    # number of steps taken since reset
+    def get_step (self):
+        return self.__step
+
+    def reset (self):
+        observation, info = self.__env.reset(seed=self.__recording.get_seed())
+        if not self.__recording.is_map_from_pool() and EpisodeRecording.to_saved_map_dict(self.__env.get_lvps_environment().get_map_dict()) != self.__recording.get_map_dict():
+            raise ValueError(f"Seed {self.__recording.get_seed()} no longer generates the recorded map")
+
+        self.__step = 0
+        return observation, info
+
+    def step (self):
+        if self.__step is None:
+            raise ValueError("Replay has to be reset before stepping")
+        if self.__step >= self.__recording.get_num_steps():
+            raise ValueError(f"Recording has only {self.__recording.get_num_steps()} steps")
+
+        result = self.__env.step(self.__recording.get_action(self.__step))
+        self.__step += 1
+        return result
+
+    # replays up to and including step n (1 based, matching the env's step count), and returns that step's result.
+    # only step n's observation is rendered
+    def seek (self, n):
+        if n < 1 or n > self.__recording.get_num_steps():
+            raise ValueError(f"Can't seek to step {n}, recording has {self.__recording.get_num_steps()} steps")
+
+        if self.__step is None or self.__step >= n:
+            self.reset()
+
+        self.__env.set_render_observations(False)
+        try:
+            while self.__step < n - 1:
+                self.step()
+        finally:
+            self.__env.set_render_observations(True)
+        return self.step()
+
+    # replays the whole episode, comparing every step to the recording.
+    # returns the first step (1 based) that came out differently, or None if the episode was reproduced exactly
+    def verify (self):
+        self.reset()
+        while self.__step < self.__recording.get_num_steps():
+            observation, reward, terminated, truncated, _ = self.step()
+            recorded_reward, recorded_terminated, recorded_truncated, recorded_digest = self.__recording.get_step_result(self.__step - 1)
+            if (reward, terminated, truncated) != (recorded_reward, recorded_terminated, recorded_truncated) or (recorded_digest is not None and EpisodeRecording.get_observation_digest(observation) != recorded_digest):
+                logging.getLogger(__name__).warning(f"Replay of seed {self.__recording.get_seed()} diverged at step {self.__step}")
+                return self.__step
+        return None
+
+    def close (self):
+        self.__env.close()
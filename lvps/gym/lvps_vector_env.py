@@ -0,0 +1,183 @@
+import numpy as np
+from gymnasium.vector import VectorEnv
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+from .lvps_gym_env import LvpsGymEnv
+
+# steps N LVPS simulations in one process, without a wrapper chain (TimeLimit, AutoReset, Monitor, ...) per env.
+# episode time limits and auto-reset are handled here, following the gymnasium SyncVectorEnv conventions:
+# when an env finishes, it is reset right away and the observation returned is the first of the new episode,
+# with the last observation/info of the finished episode in final_observation/final_info
+
+class LvpsVectorEnv(VectorEnv):
+    def __init__(self, num_envs, max_episode_steps = 1000, **env_kwargs):
+        self.__envs = [LvpsGymEnv(**env_kwargs) for _ in range(num_envs)]
+        self.__max_episode_steps = max_episode_steps
+
+        super().__init__(
+            num_envs=num_envs,
+            observation_space=self.__envs[0].observation_space,
+            action_space=self.__envs[0].action_space)
+
+        self.__observations = np.zeros((num_envs, *self.single_observation_space.shape), dtype=self.single_observation_space.dtype)
+        self.__rewards = np.zeros((num_envs,), dtype=np.float64)
+        self.__terminateds = np.zeros((num_envs,), dtype=np.bool_)
+        self.__truncateds = np.zeros((num_envs,), dtype=np.bool_)
+        self.__episode_steps = np.zeros((num_envs,), dtype=np.int64)
+        self.__actions = None
+
+    def get_envs (self):
+        return self.__envs
+
+    def get_max_episode_steps (self):
+        return self.__max_episode_steps
+
+    def reset_async (self, seed = None, options = None):
+        # resets happen synchronously in reset_wait
+        pass
+
+    def reset_wait (self, seed = None, options = None):
+        observations, infos_list = self.reset_envs(seed=seed, options=options)
+
+        infos = {}
+        for i, info in enumerate(infos_list):
+            infos = self._add_info(infos, info, i)
+        return observations.copy(), infos
+
+    # resets all envs, returning the stacked observations and a list of per-env infos
+    def reset_envs (self, seed = None, options = None):
+        seeds = seed
+        if seed is None:
+            seeds = [None for _ in range(self.num_envs)]
+        elif isinstance(seed, int):
+            seeds = [seed + i for i in range(self.num_envs)]
+
+        infos_list = []
+        for i, env in enumerate(self.__envs):
+            self.__observations[i], info = env.reset(seed=seeds[i], options=options)
+            infos_list.append(info)
+
+        self.__episode_steps[:] = 0
+        return self.__observations, infos_list
+
+    def step_async (self, actions):
+        self.__actions = actions
+
+    def step_wait (self):
+        observations, rewards, terminateds, truncateds, infos_list = self.step_envs(self.__actions)
+
+        infos = {}
+        for i, info in enumerate(infos_list):
+            infos = self._add_info(infos, info, i)
+        return observations.copy(), rewards.copy(), terminateds.copy(), truncateds.copy(), infos
+
+    # advances every simulation by one step, auto-resetting those that finished.
+    # returns the (reused) batch buffers and a list of per-env infos
+    def step_envs (self, actions):
+        infos_list = []
+        self.__episode_steps += 1
+
+        for i, env in enumerate(self.__envs):
+            observation, self.__rewards[i], self.__terminateds[i], self.__truncateds[i], info = env.step(actions[i])
+
+            if self.__episode_steps[i] >= self.__max_episode_steps:
+                self.__truncateds[i] = True
+
+            if self.__terminateds[i] or self.__truncateds[i]:
+                final_observation, final_info = observation, info
+                observation, info = env.reset()
+                info['final_observation'] = final_observation
+                info['final_info'] = final_info
+                self.__episode_steps[i] = 0
+
+            self.__observations[i] = observation
+            infos_list.append(info)
+
+        return self.__observations, self.__rewards, self.__terminateds, self.__truncateds, infos_list
+
+    def call (self, name, *args, **kwargs):
+        results = []
+        for env in self.__envs:
+            attr = getattr(env, name)
+            results.append(attr(*args, **kwargs) if callable(attr) else attr)
+        return tuple(results)
+
+    def get_attr (self, name):
+        return self.call(name)
+
+    def set_attr (self, name, values):
+        if not isinstance(values, (list, tuple)):
+            values = [values for _ in range(self.num_envs)]
+        for env, value in zip(self.__envs, values):
+            setattr(env, name, value)
+
+    def close_extras (self, **kwargs):
+        for env in self.__envs:
+            env.close()
+
+# exposes LvpsVectorEnv through the stable baselines VecEnv api, so DQN/A2C can collect
+# a batch of experience per step straight from it
+class LvpsSb3VecEnv(VecEnv):
+    def __init__(self, lvps_vector_env : LvpsVectorEnv):
+        self.__vector_env = lvps_vector_env
+        self.__actions = None
+
+        super().__init__(
+            num_envs=lvps_vector_env.num_envs,
+            observation_space=lvps_vector_env.single_observation_space,
+            action_space=lvps_vector_env.single_action_space)
+
+    def reset (self):
+        seeds = [s for s in self._seeds]
+        for i, env in enumerate(self.__vector_env.get_envs()):
+            if seeds[i] is not None:
+                env.action_space.seed(seeds[i])
+
+        observations, infos_list = self.__vector_env.reset_envs(seed=seeds)
+        self.reset_infos = infos_list
+
+        # seeds are only used once
+        self._reset_seeds()
+        self._reset_options()
+        return observations.copy()
+
+    def step_async (self, actions):
+        self.__actions = actions
+
+    def step_wait (self):
+        observations, rewards, terminateds, truncateds, infos_list = self.__vector_env.step_envs(self.__actions)
+
+        dones = terminateds | truncateds
+        for i, info in enumerate(infos_list):
+            if dones[i]:
+                # convert to the SB3 terminal observation convention
+                final_info = info.pop('final_info')
+                final_info['terminal_observation'] = info.pop('final_observation')
+                final_info['TimeLimit.truncated'] = bool(truncateds[i] and not terminateds[i])
+                self.reset_infos[i] = info
+                infos_list[i] = final_info
+            else:
+                info['TimeLimit.truncated'] = False
+
+        return observations.copy(), rewards.astype(np.float32), dones.copy(), infos_list
+
+    def close (self):
+        self.__vector_env.close()
+
+    def get_attr (self, attr_name, indices = None):
+        envs = self.__get_target_envs(indices)
+        return [getattr(env, attr_name) for env in envs]
+
+    def set_attr (self, attr_name, value, indices = None):
+        for env in self.__get_target_envs(indices):
+            setattr(env, attr_name, value)
+
+    def env_method (self, method_name, *method_args, indices = None, **method_kwargs):
+        return [getattr(env, method_name)(*method_args, **method_kwargs) for env in self.__get_target_envs(indices)]
+
+    def env_is_wrapped (self, wrapper_class, indices = None):
+        # the envs are stepped directly, never wrapped
+        return [False for _ in self.__get_target_envs(indices)]
+
+    def __get_target_envs (self, indices):
+        envs = self.__vector_env.get_envs()
+        return [envs[i] for i in self._get_indices(indices)]
@@ -0,0 +1,153 @@
+import logging
+import os
+import numpy as np
+from stable_baselines3.common.buffers import BaseBuffer, ReplayBuffer
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.type_aliases import ReplayBufferSamples
+
+# DQN replay buffer that keeps the observation images in memory mapped .npy files on disk, and only the
+# small per transition fields (actions, rewards, dones, timeouts) in memory.
+# the buffer can outgrow RAM, and survives restarts: save_state writes out everything needed to pick up
+# where it left off, and resume reads it back in.
+#
+# the files are opened in place whenever they match the buffer's shape, so a model reloaded with
+# DQN.load reattaches to the same files (call resume to get the transitions back)
+
+class LvpsMemmapReplayBuffer(ReplayBuffer):
+    ObservationsFile = 'observations.npy'
+    NextObservationsFile = 'next_observations.npy'
+    TransitionsFile = 'transitions.npz'
+
+    def __init__(
+        self,
+        buffer_size,
+        observation_space,
+        action_space,
+        device = 'auto',
+        n_envs = 1,
+        optimize_memory_usage = False,
+        handle_timeout_termination = True,
+        storage_dir = None):
+        # ReplayBuffer's init would allocate the observations in memory, so it's skipped
+        BaseBuffer.__init__(self, buffer_size, observation_space, action_space, device, n_envs=n_envs)
+
+        if storage_dir is None:
+            raise ValueError("LvpsMemmapReplayBuffer needs a storage_dir")
+        if optimize_memory_usage:
+            raise ValueError("LvpsMemmapReplayBuffer does not support optimize_memory_usage")
+
+        # same convention as ReplayBuffer, buffer_size is the total across envs
+        self.buffer_size = max(buffer_size // n_envs, 1)
+        self.optimize_memory_usage = False
+        self.handle_timeout_termination = handle_timeout_termination
+        self.storage_dir = storage_dir
+
+        self.__open_observations()
+
+        self.actions = np.zeros((self.buffer_size, self.n_envs, self.action_dim), dtype=self._maybe_cast_dtype(action_space.dtype))
+        self.rewards = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+        self.dones = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+        self.timeouts = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+
+    def __get_observations_shape (self):
+        return (self.buffer_size, self.n_envs, *self.obs_shape)
+
+    def __open_memmap (self, file_name):
+        path = os.path.join(self.storage_dir, file_name)
+        shape = self.__get_observations_shape()
+        dtype = self.observation_space.dtype
+
+        if os.path.exists(path):
+            existing = np.load(path, mmap_mode='r+')
+            if existing.shape == shape and existing.dtype == dtype:
+                return existing
+            logging.getLogger(__name__).warning(f"Replay buffer file {path} has shape {existing.shape} {existing.dtype}, expected {shape} {dtype}. Recreating it.")
+            del existing
+
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+    def __open_observations (self):
+        os.makedirs(self.storage_dir, exist_ok=True)
+        self.observations = self.__open_memmap(LvpsMemmapReplayBuffer.ObservationsFile)
+        self.next_observations = self.__open_memmap(LvpsMemmapReplayBuffer.NextObservationsFile)
+
+    # writes out everything needed to resume: observations are flushed, the small fields are written next to them
+    def save_state (self):
+        self.observations.flush()
+        self.next_observations.flush()
+
+        # written to a temp file first, so a crash mid-save leaves the previous state intact
+        path = os.path.join(self.storage_dir, LvpsMemmapReplayBuffer.TransitionsFile)
+        temp_path = f'{path}.tmp.npz'
+        np.savez(
+            temp_path,
+            pos=np.array(self.pos),
+            full=np.array(self.full),
+            actions=self.actions,
+            rewards=self.rewards,
+            dones=self.dones,
+            timeouts=self.timeouts)
+        os.replace(temp_path, path)
+
+    # restores the state written by save_state. returns False if there is none
+    def resume (self):
+        path = os.path.join(self.storage_dir, LvpsMemmapReplayBuffer.TransitionsFile)
+        if not os.path.exists(path):
+            return False
+
+        with np.load(path) as saved:
+            if saved['actions'].shape != self.actions.shape:
+                raise ValueError(f"Saved replay buffer has shape {saved['actions'].shape}, expected {self.actions.shape}")
+            self.pos = int(saved['pos'])
+            self.full = bool(saved['full'])
+            self.actions[:] = saved['actions']
+            self.rewards[:] = saved['rewards']
+            self.dones[:] = saved['dones']
+            self.timeouts[:] = saved['timeouts']
+
+        logging.getLogger(__name__).info(f"Resumed replay buffer with {self.size() * self.n_envs} transitions from {self.storage_dir}")
+        return True
+
+    def _get_samples (self, batch_inds, env = None):
+        # gather in file order, so reads from the memory mapped files are as sequential as they can be
+        env_indices = np.random.randint(0, high=self.n_envs, size=(len(batch_inds),))
+        order = np.lexsort((env_indices, batch_inds))
+        batch_inds = batch_inds[order]
+        env_indices = env_indices[order]
+
+        data = (
+            self._normalize_obs(self.observations[batch_inds, env_indices, :], env),
+            self.actions[batch_inds, env_indices, :],
+            self._normalize_obs(self.next_observations[batch_inds, env_indices, :], env),
+            # Only use dones that are not due to timeouts
+            # deactivated by default (timeouts is initialized as an array of False)
+            (self.dones[batch_inds, env_indices] * (1 - self.timeouts[batch_inds, env_indices])).reshape(-1, 1),
+            self._normalize_reward(self.rewards[batch_inds, env_indices].reshape(-1, 1), env),
+        )
+        return ReplayBufferSamples(*tuple(map(self.to_torch, data)))
+
+    # pickling (model.save_replay_buffer) leaves the observations on disk rather than copying them into the pickle
+    def __getstate__ (self):
+        self.save_state()
+        state = self.__dict__.copy()
+        del state['observations']
+        del state['next_observations']
+        return state
+
+    def __setstate__ (self, state):
+        self.__dict__.update(state)
+        self.__open_observations()
+
+# saves the replay buffer state every save_freq steps, and when training ends
+class MemmapReplayBufferCheckpoint(BaseCallback):
+    def __init__(self, save_freq, verbose = 0):
+        super().__init__(verbose)
+        self.__save_freq = save_freq
+
+    def _on_step (self):
+        if self.n_calls % self.__save_freq == 0:
+            self.model.replay_buffer.save_state()
+        return True
+
+    def _on_training_end (self):
+        self.model.replay_buffer.save_state()
@@ -59,151 +59,256 @@ def unset_seed(np_state):
     np.random.set_state(np_state)
 
 
-def generate_episode(
+class RunningStats:
+    '''
+    Accumulates count, mean, standard deviation, min and max one value at a
+    time (Welford's method), so statistics over many episodes take constant memory.
+    Standard deviation is the population one, the same as np.std.
+    '''
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def push(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+
+    def get_mean(self):
+        return None if self.count == 0 else self.mean
+
+    def get_stdev(self):
+        import math
+        return None if self.count == 0 else math.sqrt(self.m2 / self.count)
+
+
+def iterate_episode(
     env, agent,  max_steps=None, init_state=None, random_init_action=False, 
-    epsilon=0.0, seed=None, verbose=False, atari=False):
-    
+    epsilon=0.0, seed=None, atari=False):
+    '''
+    Plays an episode, yielding each transition as soon as it happens, as a dict:
+    -- t: step number, starting at 1
+    -- state: state the action was selected in
+    -- action, reward, done, truncated, info
+    -- next_state: state after the action
+    Nothing is kept between steps, so the caller decides what to hold on to.
+    The episode ends on done, or after max_steps.
+    '''
     import numpy as np
-    import time
     
     #--------------------------------------------------------
     # Set seeds
     #--------------------------------------------------------
     np_state = set_seed(seed)
     
-    
-    #-----------------------------------------------------------------------
-    # Check to see if environment is framestacked
-    #-----------------------------------------------------------------------
-    frame_stacked = True if 'VecFrameStack' in str(type(env)) else False
-    
-    #--------------------------------------------------------
-    # Reset Environment
-    #--------------------------------------------------------
-    if frame_stacked:
-        # Reset the base environment, providing a seed
-        if seed is not None:
-            env.unwrapped.envs[0].unwrapped.reset(seed=int(seed))  
-            env.action_space.seed(int(seed))
-        else:
-            env.unwrapped.envs[0].unwrapped.reset()   
-        # Reset vec_env
-        state = env.reset()
+    try:
+        #-----------------------------------------------------------------------
+        # Check to see if environment is framestacked
+        #-----------------------------------------------------------------------
+        frame_stacked = True if 'VecFrameStack' in str(type(env)) else False
         
-    else:
-        if seed is not None:
-            state, info = env.reset(seed=int(seed))
-            env.action_space.seed(int(seed))
+        #--------------------------------------------------------
+        # Reset Environment
+        #--------------------------------------------------------
+        if frame_stacked:
+            # Reset the base environment, providing a seed
+            if seed is not None:
+                env.unwrapped.envs[0].unwrapped.reset(seed=int(seed))  
+                env.action_space.seed(int(seed))
+            else:
+                env.unwrapped.envs[0].unwrapped.reset()   
+            # Reset vec_env
+            state = env.reset()
+            
         else:
-            state, info = env.reset()
-    
+            if seed is not None:
+                state, info = env.reset(seed=int(seed))
+                env.action_space.seed(int(seed))
+            else:
+                state, info = env.reset()
+                            
+        #--------------------------------------------------------
+        # Set initial state (Used for exploring starts)
+        #--------------------------------------------------------
+        if init_state is not None:
+            env.unwrapped.s = init_state
+            state = init_state
+        
+        #--------------------------------------------------------
+        # Loop for max steps episodes
+        #--------------------------------------------------------
+        t = 0
+        lives = None            # Used to track when life lost for Atari
+        new_lives = None        # Used to track when life lost for Atari
+        if max_steps is None:
+            max_steps = float('inf')
+        while t < max_steps:
+            t += 1
+            
+            #--------------------------------------------------------
+            # Determine if action should be selected at random. 
+            # True if using exp starts and t==1, or if roll < epsilon
+            # For sake of efficiiency, don't roll unless needed.
+            #--------------------------------------------------------
+            random_action = False
+            if random_init_action and t == 1:
+                random_action = True
+            if epsilon > 0:
+                roll = np.random.uniform(0,1)
+                if roll < epsilon:
+                    random_action = True
+            
+            #--------------------------------------------------------
+            # Select action
+            #--------------------------------------------------------
+            if random_action:
+                action = env.action_space.sample()
+            else:
+                action = agent.select_action(state)
+            
+            #--------------------------------------------------------
+            # Check to see if reset is needed for Atari Environment
+            # Required when a life is lost
+            #--------------------------------------------------------
+            if frame_stacked:
+                if t == 2:              
+                    lives = new_lives   # Both start as None
+                if lives != new_lives:
+                    action = 1                
+                lives = new_lives
+            
+            
+            #--------------------------------------------------------
+            # Apply action
+            #--------------------------------------------------------
+            if frame_stacked:
+                # SB3 models will retun the action in a list already
+                # But random agents will not. 
+                if not isinstance(action, np.ndarray) and not isinstance(action, list):
+                    action = [action]
+                next_state, reward, done, info = env.step(action)
+                reward = reward[0]
+                done = done[0]
+                truncated = False
+                new_lives = info[0]['lives']
+            else:
+                next_state, reward, done, truncated, info = env.step(action)
+            
+            yield {
+                't' : t,
+                'state' : state,
+                'action' : action,
+                'reward' : reward,
+                'done' : done,
+                'truncated' : truncated,
+                'info' : info,
+                'next_state' : next_state
+            }
+            state = next_state
+            
+            if done:
+                break
+
+    finally:
+        #------------------------------------------------------------
+        # Unset the seed, even if the caller stops early
+        #------------------------------------------------------------
+        unset_seed(np_state)
+
+
+class ReturnReducer:
     '''
-    #--------------------------------------------------------
-    # Reset Environment
-    #--------------------------------------------------------
-    if atari:
-        # Reset the base environment, providing a seed
-        if seed is not None:
-            env.unwrapped.envs[0].unwrapped.reset(seed=int(seed))  
-            env.action_space.seed(int(seed))
-        else:
-            env.unwrapped.envs[0].unwrapped.reset()  
-        # Reset vec_env
-        state = env.reset()
-    
-    else:
-        if seed is not None:
-            state, info = env.reset(seed=int(seed))
-            env.action_space.seed(int(seed))
-        else:
-            state, info = env.reset(seed=int(seed))
+    Discounted return from the initial state.
     '''
-                        
-    #--------------------------------------------------------
-    # Set initial state (Used for exploring starts)
-    #--------------------------------------------------------
-    if init_state is not None:
-        env.unwrapped.s = init_state
-        state = init_state
+    def __init__(self, gamma=1.0):
+        self.gamma = gamma
+        self.discount = 1.0
+        self.value = 0.0
+    def push(self, transition):
+        self.value += self.discount * transition['reward']
+        self.discount *= self.gamma
+    def result(self):
+        return self.value
+
+class LengthReducer:
+    '''
+    Number of steps taken.
+    '''
+    def __init__(self):
+        self.value = 0
+    def push(self, transition):
+        self.value += 1
+    def result(self):
+        return self.value
+
+class RewardHistogramReducer:
+    '''
+    Counts of rewards received. With bin edges, counts per bin (as np.histogram, 
+    rewards outside the edges are not counted), otherwise counts per distinct reward.
+    '''
+    def __init__(self, bins=None):
+        import numpy as np
+        self.bins = None if bins is None else np.asarray(bins)
+        self.counts = {} if bins is None else np.zeros(len(bins) - 1, dtype=np.int64)
+    def push(self, transition):
+        import numpy as np
+        reward = float(transition['reward'])
+        if self.bins is None:
+            self.counts[reward] = self.counts.get(reward, 0) + 1
+        elif self.bins[0] <= reward <= self.bins[-1]:
+            i = min(int(np.searchsorted(self.bins, reward, side='right')) - 1, len(self.counts) - 1)
+            self.counts[i] += 1
+    def result(self):
+        return self.counts
+
+
+def reduce_episode(env, agent, reducers, max_steps=None, epsilon=0.0, seed=None, atari=False):
+    '''
+    Plays an episode, feeding each transition to the reducers and keeping nothing else.
+    reducers is a dict of name -> reducer, the result is a dict of name -> reducer result.
+    '''
+    for transition in iterate_episode(
+        env=env, agent=agent, max_steps=max_steps, epsilon=epsilon, 
+        seed=seed, atari=atari):
+        for reducer in reducers.values():
+            reducer.push(transition)
     
-    # In case init state was not specified, store it for later.
-    init_state = state
+    return {name : reducer.result() for name, reducer in reducers.items()}
+
 
+def generate_episode(
+    env, agent,  max_steps=None, init_state=None, random_init_action=False, 
+    epsilon=0.0, seed=None, verbose=False, atari=False, keep_states=True):
+    
     #--------------------------------------------------------
     # Lists to store information
     #--------------------------------------------------------
     s_list, a_list, r_list, d_list, c_list, i_list =\
         [], [], [], [], [], []
     
-    #--------------------------------------------------------
-    # Loop for max steps episodes
-    #--------------------------------------------------------
     t = 0
-    lives = None            # Used to track when life lost for Atari
-    new_lives = None        # Used to track when life lost for Atari
-    if max_steps is None:
-        max_steps = float('inf')
-    while t < max_steps:
-        t += 1
+    for transition in iterate_episode(
+        env=env, agent=agent, max_steps=max_steps, init_state=init_state, 
+        random_init_action=random_init_action, epsilon=epsilon, seed=seed, atari=atari):
         
-        #--------------------------------------------------------
-        # Determine if action should be selected at random. 
-        # True if using exp starts and t==1, or if roll < epsilon
-        # For sake of efficiiency, don't roll unless needed.
-        #--------------------------------------------------------
-        random_action = False
-        if random_init_action and t == 1:
-            random_action = True
-        if epsilon > 0:
-            roll = np.random.uniform(0,1)
-            if roll < epsilon:
-                random_action = True
+        # In case init state was not specified, store it for later.
+        if t == 0:
+            init_state = transition['state']
+        t = transition['t']
         
-        #--------------------------------------------------------
-        # Select action
-        #--------------------------------------------------------
-        if random_action:
-            action = env.action_space.sample()
-        else:
-            action = agent.select_action(state)
-        
-        #--------------------------------------------------------
-        # Check to see if reset is needed for Atari Environment
-        # Required when a life is lost
-        #--------------------------------------------------------
-        if frame_stacked:
-            if t == 2:              
-                lives = new_lives   # Both start as None
-            if lives != new_lives:
-                action = 1                
-            lives = new_lives
-        
-        
-        #--------------------------------------------------------
-        # Apply action
-        #--------------------------------------------------------
-        if frame_stacked:
-            # SB3 models will retun the action in a list already
-            # But random agents will not. 
-            if not isinstance(action, np.ndarray) and not isinstance(action, list):
-                action = [action]
-            state, reward, done, info = env.step(action)
-            reward = reward[0]
-            done = done[0]
-            truncated = False
-            new_lives = info[0]['lives']
-        else:
-            state, reward, done, truncated, info = env.step(action)
-        
-        a_list.append(action)
-        s_list.append(state)
-        r_list.append(reward)
-        d_list.append(done)
-        c_list.append(truncated)
-        i_list.append(info)
-        
-        if done:
-            break
+        a_list.append(transition['action'])
+        if keep_states or verbose:
+            s_list.append(transition['next_state'])
+        r_list.append(transition['reward'])
+        d_list.append(transition['done'])
+        c_list.append(transition['truncated'])
+        i_list.append(transition['info'])
 
     if verbose:
         ss_list = [state_str(env, s) for s in s_list] # format_states
@@ -240,17 +345,13 @@ def generate_episode(
     #--------------------------------------------------------
     # Create history dictionary 
     # Note: States will be one longer than the others.
+    # Without keep_states, only the initial state is kept.
     #--------------------------------------------------------
     history = {
         'states' : [init_state] + s_list,
         'actions' : a_list,
         'rewards' : r_list 
     } 
-    
-    #------------------------------------------------------------
-    # Unset the seed
-    #------------------------------------------------------------
-    unset_seed(np_state)
        
     return history
         
@@ -271,18 +372,16 @@ def evaluate(env, agent, gamma, episodes, max_steps=1000, seed=None,
     
     for n in range(episodes):
         ep_seed = np.random.choice(10**6)
-        history = generate_episode(
-            env=env, agent=agent, max_steps=max_steps, epsilon=0.0, 
-            seed=ep_seed, verbose=False, atari=atari
-        )
-        
         #------------------------------------------------------------
-        # Calcuate return at initial state
+        # Calcuate return at initial state, without keeping the episode
         #------------------------------------------------------------
-        num_steps = len(history['actions'])
-        G0 = 0
-        for t in reversed(range(num_steps)):
-            G0 = history['rewards'][t] + gamma * G0
+        results = reduce_episode(
+            env=env, agent=agent, max_steps=max_steps, epsilon=0.0, 
+            seed=ep_seed, atari=atari,
+            reducers={'return' : ReturnReducer(gamma), 'length' : LengthReducer()}
+        )
+        G0 = results['return']
+        num_steps = results['length']
         
         returns.append(G0)
         lengths.append(num_steps)
@@ -295,10 +394,10 @@ def evaluate(env, agent, gamma, episodes, max_steps=1000, seed=None,
             success.append(True if env.status == 'success' else False)
             if env.status == 'success':
                 num_success += 1
-                len_success += len(history['actions'])
+                len_success += num_steps
             else:
                 num_failure += 1
-                len_failure += len(history['actions'])
+                len_failure += num_steps
     
     #------------------------------------------------------------
     # Build stats report
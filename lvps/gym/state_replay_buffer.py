@@ -0,0 +1,230 @@
+import collections
+import numpy as np
+from stable_baselines3.common.buffers import BaseBuffer
+from stable_baselines3.common.type_aliases import ReplayBufferSamples
+from .field_rasterizer import FieldRasterizer
+
+# DQN replay buffer that stores the state each observation was drawn from, rather than the image.
+# a 400x400 observation is 160KB, the state behind it (agent poses, how many looks and found targets there were)
+# is a couple hundred bytes. Looks and found targets are kept once per episode, transitions only keep counts into them.
+# when a minibatch is sampled, its observations are drawn again with a FieldRasterizer.
+#
+# the env has to be LvpsGymEnv(observation_renderer='numpy', render_state_info=True), and the drawing settings
+# here have to match the env's. Sampling costs a render per observation, so this trades training speed for memory.
+
+class LvpsStateReplayBuffer(BaseBuffer):
+    def __init__(
+        self,
+        buffer_size,
+        observation_space,
+        action_space,
+        device = 'auto',
+        n_envs = 1,
+        optimize_memory_usage = False,
+        handle_timeout_termination = True,
+        max_agents = 4,
+        grayscale = True,
+        width_inches = 4,
+        height_inches = 4,
+        dpi = 100,
+        max_cached_renderers = 32):
+        super().__init__(buffer_size, observation_space, action_space, device, n_envs=n_envs)
+
+        if optimize_memory_usage:
+            raise ValueError("LvpsStateReplayBuffer does not support optimize_memory_usage, it never stores observations")
+
+        # same convention as ReplayBuffer, buffer_size is the total across envs
+        self.buffer_size = max(buffer_size // n_envs, 1)
+        self.optimize_memory_usage = False
+        self.handle_timeout_termination = handle_timeout_termination
+
+        self.__max_agents = max_agents
+        self.__grayscale = grayscale
+        self.__width_inches = width_inches
+        self.__height_inches = height_inches
+        self.__dpi = dpi
+
+        self.actions = np.zeros((self.buffer_size, self.n_envs, self.action_dim), dtype=self._maybe_cast_dtype(action_space.dtype))
+        self.rewards = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+        self.dones = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+        self.timeouts = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+
+        # per transition state. the middle axis of the observation fields is 0 = obs, 1 = next obs
+        self.__episode_nums = np.full((self.buffer_size, self.n_envs), -1, dtype=np.int64)
+        self.__observer_ids = np.zeros((self.buffer_size, self.n_envs), dtype=np.int32)
+        self.__agent_ids = np.full((self.buffer_size, self.n_envs, max_agents), -1, dtype=np.int32)
+        self.__poses = np.full((self.buffer_size, self.n_envs, 2, max_agents, 3), np.nan, dtype=np.float64)
+        self.__look_counts = np.zeros((self.buffer_size, self.n_envs, 2, max_agents), dtype=np.int32)
+        self.__found_counts = np.zeros((self.buffer_size, self.n_envs, 2), dtype=np.int32)
+
+        # episode num -> map dict, looks per agent, found targets, number of transitions still in the buffer
+        self.__episodes = {}
+        self.__episode_nums_by_id = {}
+        self.__next_episode_num = 0
+
+        self.__renderers = collections.OrderedDict()
+        self.__max_cached_renderers = max_cached_renderers
+
+    @staticmethod
+    def _maybe_cast_dtype (dtype):
+        # same as ReplayBuffer, float64 actions are stored as float32
+        if dtype == np.float64:
+            return np.float32
+        return dtype
+
+    def get_num_episodes (self):
+        return len(self.__episodes)
+
+    def add (self, obs, next_obs, action, reward, done, infos):
+        # observations are ignored, everything comes from the render state in the infos
+        self.__release_slot(self.pos)
+
+        for env_num, info in enumerate(infos):
+            if 'lvps_render_state' not in info:
+                raise ValueError("Step info has no lvps_render_state, the env needs LvpsGymEnv(observation_renderer='numpy', render_state_info=True)")
+            render_state = info['lvps_render_state']
+
+            episode_num = self.__get_episode_num(render_state)
+            episode = self.__episodes[episode_num]
+            episode['transitions'] += 1
+            if done[env_num]:
+                episode['finished'] = True
+
+            self.__episode_nums[self.pos, env_num] = episode_num
+            self.__observer_ids[self.pos, env_num] = render_state['agent_id']
+            self.__agent_ids[self.pos, env_num] = -1
+            for agent_slot, agent_id in enumerate(render_state['next_obs']['positions'].keys()):
+                if agent_slot >= self.__max_agents:
+                    raise ValueError(f"More than {self.__max_agents} agents in the simulation, raise max_agents")
+                self.__agent_ids[self.pos, env_num, agent_slot] = agent_id
+
+            for state_num, state in enumerate([render_state['obs'], render_state['next_obs']]):
+                self.__record_state(episode, state, self.pos, env_num, state_num)
+
+        self.actions[self.pos] = np.array(action).reshape((self.n_envs, self.action_dim))
+        self.rewards[self.pos] = np.array(reward)
+        self.dones[self.pos] = np.array(done)
+        if self.handle_timeout_termination:
+            self.timeouts[self.pos] = np.array([info.get("TimeLimit.truncated", False) for info in infos])
+
+        self.pos += 1
+        if self.pos == self.buffer_size:
+            self.full = True
+            self.pos = 0
+
+    def __get_episode_num (self, render_state):
+        episode_id = render_state['episode_id']
+        if episode_id not in self.__episode_nums_by_id:
+            self.__episode_nums_by_id[episode_id] = self.__next_episode_num
+            self.__episodes[self.__next_episode_num] = {
+                'id':episode_id,
+                'map_dict':render_state['map_dict'],
+                'looks':{},
+                'found_targets':[],
+                'transitions':0,
+                'finished':False
+            }
+            self.__next_episode_num += 1
+        return self.__episode_nums_by_id[episode_id]
+
+    def __record_state (self, episode, state, pos, env_num, state_num):
+        # looks and found targets only grow within an episode, so only what's new gets copied into the episode
+        for agent_slot, agent_id in enumerate(state['positions'].keys()):
+            position = state['positions'][agent_id]
+            if position is not None:
+                self.__poses[pos, env_num, state_num, agent_slot] = position
+            else:
+                self.__poses[pos, env_num, state_num, agent_slot] = np.nan
+
+            looks = state['looks'].get(agent_id, [])
+            episode_looks = episode['looks'].setdefault(agent_id, [])
+            if len(looks) > len(episode_looks):
+                episode_looks.extend(looks[len(episode_looks):])
+            self.__look_counts[pos, env_num, state_num, agent_slot] = len(looks)
+
+        num_found = state['num_found_targets']
+        if num_found > len(episode['found_targets']):
+            episode['found_targets'].extend(state['found_targets'][len(episode['found_targets']):num_found])
+        self.__found_counts[pos, env_num, state_num] = num_found
+
+    # the transitions at pos are about to be overwritten, drop episodes nothing refers to anymore
+    def __release_slot (self, pos):
+        for episode_num in self.__episode_nums[pos]:
+            if episode_num >= 0:
+                episode = self.__episodes[episode_num]
+                episode['transitions'] -= 1
+                if episode['transitions'] == 0 and episode['finished']:
+                    del self.__episode_nums_by_id[episode['id']]
+                    del self.__episodes[episode_num]
+                    self.__renderers.pop(episode_num, None)
+
+    def _get_samples (self, batch_inds, env = None):
+        env_indices = np.random.randint(0, high=self.n_envs, size=(len(batch_inds),))
+        observations, next_observations = self.render_observations(batch_inds, env_indices)
+
+        data = (
+            self._normalize_obs(observations, env),
+            self.actions[batch_inds, env_indices, :],
+            self._normalize_obs(next_observations, env),
+            # Only use dones that are not due to timeouts
+            # deactivated by default (timeouts is initialized as an array of False)
+            (self.dones[batch_inds, env_indices] * (1 - self.timeouts[batch_inds, env_indices])).reshape(-1, 1),
+            self._normalize_reward(self.rewards[batch_inds, env_indices].reshape(-1, 1), env),
+        )
+        return ReplayBufferSamples(*tuple(map(self.to_torch, data)))
+
+    # draws the observations and next observations of the given transitions
+    def render_observations (self, batch_inds, env_indices):
+        batch_size = len(batch_inds)
+        rendered = np.empty((2, batch_size, *self.obs_shape), dtype=self.observation_space.dtype)
+
+        # draw states in episode order, and in order of progress within each episode,
+        # so the renderer's cached look/found target layers only ever need to be extended
+        state_nums = np.repeat([0, 1], batch_size)
+        rows = np.tile(np.arange(batch_size), 2)
+        pos = np.tile(batch_inds, 2)
+        envs = np.tile(env_indices, 2)
+        progress = self.__look_counts[pos, envs, state_nums].sum(axis=1) + self.__found_counts[pos, envs, state_nums]
+        order = np.lexsort((progress, self.__episode_nums[pos, envs]))
+
+        for i in order:
+            rendered[state_nums[i], rows[i]] = self.__render_state(pos[i], envs[i], state_nums[i])
+
+        return rendered[0], rendered[1]
+
+    def __get_renderer (self, episode_num):
+        if episode_num in self.__renderers:
+            self.__renderers.move_to_end(episode_num)
+        else:
+            self.__renderers[episode_num] = FieldRasterizer(self.__episodes[episode_num]['map_dict'], grayscale=self.__grayscale)
+            if len(self.__renderers) > self.__max_cached_renderers:
+                self.__renderers.popitem(last=False)
+        return self.__renderers[episode_num]
+
+    def __render_state (self, pos, env_num, state_num):
+        episode_num = self.__episode_nums[pos, env_num]
+        episode = self.__episodes[episode_num]
+
+        positions = {}
+        looks = {}
+        for agent_slot, agent_id in enumerate(self.__agent_ids[pos, env_num]):
+            if agent_id < 0:
+                break
+            pose = self.__poses[pos, env_num, state_num, agent_slot]
+            positions[int(agent_id)] = None if np.isnan(pose[0]) else (float(pose[0]), float(pose[1]), float(pose[2]))
+            looks[int(agent_id)] = episode['looks'].get(int(agent_id), [])[:self.__look_counts[pos, env_num, state_num, agent_slot]]
+
+        renderer = self.__get_renderer(episode_num)
+        renderer.set_render_state(positions, looks, episode['found_targets'][:self.__found_counts[pos, env_num, state_num]])
+        image = renderer.render_field_image_to_array(
+            add_game_state=True,
+            agent_id=int(self.__observer_ids[pos, env_num]),
+            other_agents_visible=True,
+            width_inches=self.__width_inches,
+            height_inches=self.__height_inches,
+            dpi=self.__dpi)
+
+        # the training env may hand SB3 channel first images (VecTransposeImage)
+        if image.shape != self.obs_shape:
+            image = np.transpose(image, (2, 0, 1))
+        return image
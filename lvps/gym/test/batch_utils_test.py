@@ -0,0 +1,16 @@
+import unittest
+from lvps.gym.batch_utils import iterate_pool_results, format_stat
+
+class BatchUtilsTest(unittest.TestCase):
+    def test_pool_results (self):
+        results = list(iterate_pool_results(abs, [-3, 1, -2, 5], num_workers=2))
+        self.assertEqual([1, 2, 3, 5], sorted(results))
+        self.assertEqual([], list(iterate_pool_results(abs, [], num_workers=2)))
+
+    def test_format_stat (self):
+        self.assertEqual('n/a', format_stat(None))
+        self.assertEqual(0.3333, format_stat(1 / 3))
+        self.assertEqual(0.33, format_stat(1 / 3, digits=2))
+
+if __name__ == '__main__':
+    unittest.main()
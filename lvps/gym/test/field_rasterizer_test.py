@@ -0,0 +1,117 @@
+import unittest
+import numpy as np
+from lvps.gym.field_rasterizer import FieldRasterizer, RasterLayers
+
+# 200x200 images of a 200x200 map: the map fills 90% of the image, 0.9 pixels per unit, lvps (0, 0) at the center.
+# with no map scaler both axes are inverted, like the field image scaler: (x, y) is drawn at col 100 - 0.9x, row 100 - 0.9y
+
+# maps lvps coords to image coords without mirroring x, to check the orientation comes from the scaler
+class UnmirroredScaler:
+    def get_scaled_coords (self, lvps_x, lvps_y):
+        return 100 + lvps_x, 100 - lvps_y
+
+class FieldRasterizerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__rasterizer = FieldRasterizer({
+            'boundaries':{'xmin':-100, 'ymin':-100, 'xmax':100, 'ymax':100},
+            'obstacles':{'obstacle_0':{'xmin':20, 'ymin':20, 'xmax':60, 'ymax':60}},
+            'dead_spots':{'ds_0':{'xmin':-60, 'ymin':-60, 'xmax':-20, 'ymax':-20}}
+        })
+        self.__east_look = (0, 0, 90, -20, 20, 50)
+        self.__west_look = (0, 0, 270, -20, 20, 50)
+        return super().setUp()
+
+    def __render (self, agent_id = 1):
+        return self.__rasterizer.render_field_image_to_array(agent_id=agent_id, width_inches=2, height_inches=2, dpi=100)[:,:,0]
+
+    def __pixel (self, image, x, y):
+        return image[int(100 - 0.9 * y), int(100 - 0.9 * x)]
+
+    def __assert_layer (self, layer, image, x, y):
+        self.assertEqual(RasterLayers.Grayscale[layer], self.__pixel(image, x, y), f"({x},{y})")
+
+    def test_static_layers (self):
+        image = self.__rasterizer.render_field_image_to_array(add_game_state=False, width_inches=2, height_inches=2, dpi=100)
+        self.assertEqual((200, 200, 1), image.shape)
+        image = image[:,:,0]
+
+        self.__assert_layer(RasterLayers.Obstacle, image, 40, 40)
+        self.__assert_layer(RasterLayers.DeadSpot, image, -40, -40)
+        self.__assert_layer(RasterLayers.Free, image, 0, 80)
+        self.__assert_layer(RasterLayers.Free, image, 80, -80)
+        # the 5% border around the map is out of bounds
+        self.assertEqual(RasterLayers.Grayscale[RasterLayers.OutOfBounds], image[2, 2])
+        self.assertEqual(RasterLayers.Grayscale[RasterLayers.OutOfBounds], image[197, 100])
+
+    def test_agent_marker (self):
+        self.__rasterizer.update_agent_state(1, [(-50, 50, 0)], [])
+
+        image = self.__render(agent_id=1)
+        self.__assert_layer(RasterLayers.Agent, image, -50, 50)
+        # the heading tick points north, nothing is drawn to the south past the marker
+        self.assertTrue(np.any(image[47:52, 145] == RasterLayers.Grayscale[RasterLayers.Agent]))
+        self.assertTrue(np.all(image[60:64, 145] == RasterLayers.Grayscale[RasterLayers.Free]))
+
+        # seen by another agent
+        image = self.__render(agent_id=2)
+        self.__assert_layer(RasterLayers.OtherAgent, image, -50, 50)
+
+    def test_looks_accumulate (self):
+        self.__rasterizer.update_agent_state(1, [(-50, 50, 0)], [self.__east_look])
+        image = self.__render()
+        self.__assert_layer(RasterLayers.Looked, image, 30, 0)
+        self.__assert_layer(RasterLayers.Free, image, -30, 0)
+        # outside the wedge, and beyond its distance
+        self.__assert_layer(RasterLayers.Free, image, 0, 30)
+        self.__assert_layer(RasterLayers.Free, image, 70, 0)
+
+        self.__rasterizer.update_agent_state(1, [(-50, 50, 0)], [self.__east_look, self.__west_look])
+        image = self.__render()
+        self.__assert_layer(RasterLayers.Looked, image, 30, 0)
+        self.__assert_layer(RasterLayers.Looked, image, -30, 0)
+
+    def test_replaced_looks_reset_cache (self):
+        self.__rasterizer.update_agent_state(1, [(-50, 50, 0)], [self.__east_look])
+        self.__render()
+
+        # a different history, not an extension of the one drawn
+        self.__rasterizer.update_agent_state(1, [(-50, 50, 0)], [self.__west_look])
+        image = self.__render()
+        self.__assert_layer(RasterLayers.Free, image, 30, 0)
+        self.__assert_layer(RasterLayers.Looked, image, -30, 0)
+
+        # and back to no looks at all, through set_render_state
+        self.__rasterizer.set_render_state({1:(-50, 50, 0)}, {1:[]}, [])
+        image = self.__render()
+        self.__assert_layer(RasterLayers.Free, image, -30, 0)
+
+    def test_found_targets (self):
+        self.__rasterizer.update_search_state(1, 'coin', 0, -80)
+        image = self.__render()
+        self.__assert_layer(RasterLayers.FoundTarget, image, 0, -80)
+
+    def __render_corner_obstacle (self, map_scaler = None):
+        rasterizer = FieldRasterizer({
+            'boundaries':{'xmin':-100, 'ymin':-100, 'xmax':100, 'ymax':100},
+            'obstacles':{'north_east':{'xmin':60, 'ymin':60, 'xmax':100, 'ymax':100}}
+        }, map_scaler=map_scaler)
+        image = rasterizer.render_field_image_to_array(add_game_state=False, width_inches=2, height_inches=2, dpi=100)[:,:,0]
+        obstacle = RasterLayers.Grayscale[RasterLayers.Obstacle]
+        return {
+            'top_left':image[20, 20] == obstacle,
+            'top_right':image[20, 180] == obstacle,
+            'bottom_left':image[180, 20] == obstacle,
+            'bottom_right':image[180, 180] == obstacle
+        }
+
+    def test_corner_follows_image_scaler (self):
+        # the north east corner lands top left, the way the field image scaler (x and y inverted) places it
+        corners = self.__render_corner_obstacle()
+        self.assertEqual([c for c, hit in corners.items() if hit], ['top_left'])
+
+    def test_corner_follows_map_scaler (self):
+        corners = self.__render_corner_obstacle(map_scaler=UnmirroredScaler())
+        self.assertEqual([c for c, hit in corners.items() if hit], ['top_right'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import shutil
+import tempfile
+import os
+import numpy as np
+from lvps.gym.lvps_gym_env import LvpsGymEnv
+from lvps.gym.lvps_replay import EpisodeRecording, RecordLvpsEpisodesWrapper, LvpsEpisodeReplay
+
+class LvpsReplayTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.mkdtemp()
+        self.__env_kwargs = {'observation_renderer':'numpy'}
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.__dir)
+        return super().tearDown()
+
+    def __record_episode (self, num_steps = 30):
+        env = RecordLvpsEpisodesWrapper(LvpsGymEnv(**self.__env_kwargs), self.__dir, env_kwargs=self.__env_kwargs)
+        env.reset(seed=11)
+        actions = np.random.default_rng(3).integers(0, env.action_space.n, num_steps)
+        observations = []
+        for a in actions:
+            observation, _, terminated, truncated, _ = env.step(a)
+            observations.append(observation.copy())
+            if terminated or truncated:
+                break
+        env.close()
+        return EpisodeRecording.load(os.path.join(self.__dir, 'episode_0.json')), observations
+
+    def test_save_and_load (self):
+        recording = EpisodeRecording(seed=4, map_dict={'boundaries':{'xmin':np.int64(-10), 'xmax':np.float64(2.5)}}, map_from_pool=True)
+        recording.add_step(np.int64(3), np.float32(0.5), False, False, np.zeros((4, 4, 1), dtype=np.uint8))
+        recording.save(os.path.join(self.__dir, 'r.json'))
+
+        loaded = EpisodeRecording.load(os.path.join(self.__dir, 'r.json'))
+        self.assertEqual(4, loaded.get_seed())
+        self.assertEqual({'boundaries':{'xmin':-10, 'xmax':2.5}}, loaded.get_map_dict())
+        self.assertEqual(3, loaded.get_action(0))
+        self.assertEqual(recording.get_step_result(0), loaded.get_step_result(0))
+
+    def test_replay_matches_recording (self):
+        recording, _ = self.__record_episode()
+        replay = LvpsEpisodeReplay(recording)
+        self.assertIsNone(replay.verify())
+
+    def test_seek (self):
+        recording, observations = self.__record_episode()
+        n = len(observations) // 2
+
+        replay = LvpsEpisodeReplay(recording)
+        observation, reward, _, _, _ = replay.seek(n)
+        self.assertEqual(n, replay.get_step())
+        self.assertEqual(recording.get_step_result(n - 1)[0], reward)
+        self.assertTrue(np.array_equal(observations[n - 1], observation))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from lvps.gym.lvps_vector_env import LvpsVectorEnv, LvpsSb3VecEnv
+from lvps.strategies.agent_actions import AgentActions
+
+class LvpsVectorEnvTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # rotating in place neither finds a target nor leaves the field, so episodes only end on the time limit
+        self.__actions = np.full((2,), AgentActions.RotateLeftSmall)
+        return super().setUp()
+
+    def test_auto_reset (self):
+        vector_env = LvpsVectorEnv(2, max_episode_steps=3, observation_renderer='numpy')
+        observations, _ = vector_env.reset(seed=5)
+        self.assertEqual((2, *vector_env.single_observation_space.shape), observations.shape)
+
+        for _ in range(2):
+            observations, rewards, terminateds, truncateds, infos = vector_env.step(self.__actions)
+            self.assertFalse(np.any(terminateds | truncateds))
+            self.assertNotIn('final_observation', infos)
+
+        observations, rewards, terminateds, truncateds, infos = vector_env.step(self.__actions)
+        self.assertEqual((2, *vector_env.single_observation_space.shape), observations.shape)
+        self.assertEqual((2,), rewards.shape)
+        self.assertFalse(np.any(terminateds))
+        self.assertTrue(np.all(truncateds))
+        self.assertTrue(np.all(infos['_final_observation']))
+        for i in range(2):
+            final_observation = infos['final_observation'][i]
+            self.assertEqual(vector_env.single_observation_space.shape, final_observation.shape)
+            self.assertIn('targets_found', infos['final_info'][i])
+            # the observation handed back is the first of the new episode
+            self.assertFalse(np.array_equal(final_observation, observations[i]))
+
+        # the episode step count starts over
+        _, _, _, truncateds, _ = vector_env.step(self.__actions)
+        self.assertFalse(np.any(truncateds))
+        vector_env.close()
+
+    def test_sb3_adapter (self):
+        vec_env = LvpsSb3VecEnv(LvpsVectorEnv(2, max_episode_steps=2, observation_renderer='numpy'))
+        vec_env.seed(7)
+        first = vec_env.reset()
+        self.assertEqual(2, len(vec_env.reset_infos))
+        # seeds are only used for one reset
+        self.assertEqual([None, None], vec_env._seeds)
+
+        vec_env.seed(7)
+        self.assertTrue(np.array_equal(first, vec_env.reset()))
+
+        _, _, dones, infos = vec_env.step(self.__actions)
+        self.assertFalse(np.any(dones))
+        self.assertFalse(infos[0]['TimeLimit.truncated'])
+
+        observations, rewards, dones, infos = vec_env.step(self.__actions)
+        self.assertEqual(np.float32, rewards.dtype)
+        self.assertTrue(np.all(dones))
+        for i in range(2):
+            self.assertEqual(observations[i].shape, infos[i]['terminal_observation'].shape)
+            self.assertTrue(infos[i]['TimeLimit.truncated'])
+            self.assertNotIn('final_info', infos[i])
+            self.assertNotIn('final_observation', vec_env.reset_infos[i])
+        vec_env.close()
+
+if __name__ == '__main__':
+    unittest.main()
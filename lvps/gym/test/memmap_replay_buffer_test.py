@@ -0,0 +1,89 @@
+import unittest
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+from gymnasium import spaces
+from lvps.gym.memmap_replay_buffer import LvpsMemmapReplayBuffer
+
+class LvpsMemmapReplayBufferTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.mkdtemp()
+        self.__observation_space = spaces.Box(low=0, high=255, shape=(6, 5, 1), dtype=np.uint8)
+        self.__action_space = spaces.Discrete(4)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.__dir)
+        return super().tearDown()
+
+    def __create (self, buffer_size = 8, observation_space = None):
+        return LvpsMemmapReplayBuffer(
+            buffer_size,
+            self.__observation_space if observation_space is None else observation_space,
+            self.__action_space,
+            device='cpu',
+            storage_dir=self.__dir)
+
+    # adds num_transitions transitions, each observation filled with its transition number
+    def __fill (self, buffer, num_transitions):
+        for i in range(num_transitions):
+            obs = np.full((1, *self.__observation_space.shape), i, dtype=np.uint8)
+            buffer.add(obs, obs + 100, np.array([i % 4]), np.array([float(i)]), np.array([i % 5 == 4]), [{}])
+
+    def __assert_same (self, expected, actual):
+        self.assertEqual(expected.pos, actual.pos)
+        self.assertEqual(expected.full, actual.full)
+        self.assertTrue(np.array_equal(expected.actions, actual.actions))
+        self.assertTrue(np.array_equal(expected.rewards, actual.rewards))
+        self.assertTrue(np.array_equal(expected.dones, actual.dones))
+        self.assertTrue(np.array_equal(np.asarray(expected.observations), np.asarray(actual.observations)))
+        self.assertTrue(np.array_equal(np.asarray(expected.next_observations), np.asarray(actual.next_observations)))
+
+    def test_save_and_resume (self):
+        buffer = self.__create()
+        self.__fill(buffer, 11)
+        self.assertTrue(buffer.full)
+        self.assertEqual(3, buffer.pos)
+        buffer.save_state()
+
+        resumed = self.__create()
+        self.assertTrue(resumed.resume())
+        self.__assert_same(buffer, resumed)
+        # the oldest transitions were overwritten
+        self.assertEqual(8, resumed.observations[0, 0, 0, 0, 0])
+        self.assertEqual(3, resumed.observations[3, 0, 0, 0, 0])
+
+    def test_nothing_to_resume (self):
+        self.assertFalse(self.__create().resume())
+
+    def test_mismatched_files_are_recreated (self):
+        buffer = self.__create()
+        self.__fill(buffer, 3)
+        buffer.save_state()
+        del buffer
+
+        other_space = spaces.Box(low=0, high=255, shape=(3, 3, 1), dtype=np.uint8)
+        recreated = self.__create(observation_space=other_space)
+        self.assertEqual((8, 1, 3, 3, 1), recreated.observations.shape)
+        self.assertEqual((8, 1, 3, 3, 1), np.load(os.path.join(self.__dir, LvpsMemmapReplayBuffer.ObservationsFile), mmap_mode='r').shape)
+
+        # a buffer of a different size can't take the saved transitions
+        with self.assertRaises(ValueError):
+            self.__create(buffer_size=4, observation_space=other_space).resume()
+
+    def test_pickle_leaves_observations_on_disk (self):
+        buffer = self.__create()
+        self.__fill(buffer, 10)
+
+        pickled = pickle.dumps(buffer)
+        self.assertLess(len(pickled), buffer.observations.nbytes)
+
+        restored = pickle.loads(pickled)
+        self.__assert_same(buffer, restored)
+        self.assertTrue(restored.resume())
+        self.__assert_same(buffer, restored)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from lvps.gym.rbean_utils import RunningStats, iterate_episode, reduce_episode, generate_episode, ReturnReducer, LengthReducer, RewardHistogramReducer
+import numpy as np
+
+class RunningStatsTest(unittest.TestCase):
+    def test_matches_numpy (self):
+        values = np.random.default_rng(5).normal(loc=40.0, scale=12.0, size=500)
+        stats = RunningStats()
+        for v in values:
+            stats.push(v)
+
+        self.assertEqual(stats.count, 500)
+        self.assertAlmostEqual(stats.get_mean(), np.mean(values))
+        self.assertAlmostEqual(stats.get_stdev(), np.std(values))
+        self.assertEqual(stats.min, values.min())
+        self.assertEqual(stats.max, values.max())
+
+    def test_empty (self):
+        stats = RunningStats()
+        self.assertIsNone(stats.get_mean())
+        self.assertIsNone(stats.get_stdev())
+
+class CountingEnv:
+    # reward is the step number, done after 5 steps
+    def reset(self, seed=None):
+        self.t = 0
+        return 0, {}
+    def step(self, action):
+        self.t += 1
+        return self.t, float(self.t), self.t == 5, False, {}
+
+class ConstantAgent:
+    def select_action(self, state):
+        return 1
+
+class EpisodeReducersTest(unittest.TestCase):
+    def test_iterate_episode (self):
+        transitions = list(iterate_episode(CountingEnv(), ConstantAgent(), max_steps=100))
+        self.assertEqual([t['t'] for t in transitions], [1, 2, 3, 4, 5])
+        self.assertEqual([t['state'] for t in transitions], [0, 1, 2, 3, 4])
+        self.assertEqual([t['next_state'] for t in transitions], [1, 2, 3, 4, 5])
+        self.assertTrue(transitions[-1]['done'])
+
+    def test_reducers (self):
+        results = reduce_episode(CountingEnv(), ConstantAgent(), max_steps=3, reducers={
+            'return':ReturnReducer(gamma=0.5),
+            'length':LengthReducer(),
+            'rewards':RewardHistogramReducer(),
+            'binned':RewardHistogramReducer(bins=[0, 2, 4])
+        })
+        self.assertAlmostEqual(results['return'], 1 + 0.5 * 2 + 0.25 * 3)
+        self.assertEqual(results['length'], 3)
+        self.assertEqual(results['rewards'], {1.0:1, 2.0:1, 3.0:1})
+        self.assertEqual(list(results['binned']), [1, 2])
+
+    def test_generate_episode (self):
+        history = generate_episode(CountingEnv(), ConstantAgent())
+        self.assertEqual(history['states'], [0, 1, 2, 3, 4, 5])
+        self.assertEqual(history['rewards'], [1.0, 2.0, 3.0, 4.0, 5.0])
@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+from lvps.gym.lvps_gym_env import LvpsGymEnv
+from lvps.gym.state_replay_buffer import LvpsStateReplayBuffer
+
+class LvpsStateReplayBufferTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__env = LvpsGymEnv(observation_renderer='numpy', render_state_info=True)
+        self.__buffer_size = 8
+        self.__buffer = LvpsStateReplayBuffer(self.__buffer_size, self.__env.observation_space, self.__env.action_space, device='cpu')
+
+        # what the env drew for each buffer position, and which episode each transition was in
+        self.__observations = [None] * self.__buffer_size
+        self.__episodes = []
+
+        # more transitions than fit, over several short episodes, so the buffer wraps and releases episodes
+        rng = np.random.default_rng(5)
+        episode = 0
+        episode_steps = 0
+        obs, _ = self.__env.reset(seed=1)
+        for step in range(30):
+            action = int(rng.integers(0, self.__env.action_space.n))
+            next_obs, reward, terminated, truncated, info = self.__env.step(action)
+            episode_steps += 1
+            done = terminated or truncated or episode_steps == 5
+
+            self.__observations[self.__buffer.pos] = (obs.copy(), next_obs.copy())
+            self.__episodes.append(episode)
+            self.__buffer.add(obs[None], next_obs[None], np.array([action]), np.array([reward]), np.array([done]), [info])
+
+            obs = next_obs
+            if done:
+                episode += 1
+                episode_steps = 0
+                obs, _ = self.__env.reset(seed=1 + episode)
+        return super().setUp()
+
+    def test_redrawn_observations_match_env (self):
+        self.assertTrue(self.__buffer.full)
+        batch_inds = np.arange(self.__buffer_size)
+        observations, next_observations = self.__buffer.render_observations(batch_inds, np.zeros(self.__buffer_size, dtype=np.int64))
+        for i in batch_inds:
+            self.assertTrue(np.array_equal(self.__observations[i][0], observations[i]), f"observation {i} differs")
+            self.assertTrue(np.array_equal(self.__observations[i][1], next_observations[i]), f"next observation {i} differs")
+
+    def test_samples_match_env (self):
+        batch_inds = np.array([3, 0, 7, 3, 5])
+        samples = self.__buffer._get_samples(batch_inds)
+        observations = samples.observations.cpu().numpy()
+        next_observations = samples.next_observations.cpu().numpy()
+        for row, i in enumerate(batch_inds):
+            self.assertTrue(np.array_equal(self.__observations[i][0], observations[row]))
+            self.assertTrue(np.array_equal(self.__observations[i][1], next_observations[row]))
+
+    def test_overwritten_episodes_are_released (self):
+        # only the episodes of the transitions still in the buffer are kept
+        self.assertEqual(len(set(self.__episodes[-self.__buffer_size:])), self.__buffer.get_num_episodes())
+        self.assertLess(self.__buffer.get_num_episodes(), len(set(self.__episodes)))
+
+if __name__ == '__main__':
+    unittest.main()
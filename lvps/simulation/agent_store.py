@@ -0,0 +1,85 @@
+import numpy as np
+
+# array backed storage for the true agent poses held by the simulation environment.
+# each agent gets a slot; x, y and heading are kept in contiguous float arrays (path width in a small int array)
+# so bulk position queries are array slices instead of loops over dicts
+
+class AgentStore:
+    def __init__(self, initial_capacity = 16):
+        self.__capacity = initial_capacity
+        self.__count = 0
+        self.__slots = {} # agent id -> slot
+        self.__agent_ids = []
+        self.__agents = []
+
+        self.__x = np.zeros((initial_capacity,), dtype=np.float64)
+        self.__y = np.zeros((initial_capacity,), dtype=np.float64)
+        self.__heading = np.zeros((initial_capacity,), dtype=np.float64)
+        self.__path_width = np.zeros((initial_capacity,), dtype=np.int16)
+
+    def __len__ (self):
+        return self.__count
+
+    def __contains__ (self, agent_id):
+        return agent_id in self.__slots
+
+    def add (self, agent, x, y, heading, path_width):
+        if agent.get_id() in self.__slots:
+            slot = self.__slots[agent.get_id()]
+            self.__agents[slot] = agent
+        else:
+            if self.__count == self.__capacity:
+                self.__grow()
+            slot = self.__count
+            self.__slots[agent.get_id()] = slot
+            self.__agent_ids.append(agent.get_id())
+            self.__agents.append(agent)
+            self.__count += 1
+
+        self.__x[slot] = x
+        self.__y[slot] = y
+        self.__heading[slot] = heading
+        self.__path_width[slot] = path_width
+        return slot
+
+    def __grow (self):
+        self.__capacity *= 2
+        self.__x = np.resize(self.__x, (self.__capacity,))
+        self.__y = np.resize(self.__y, (self.__capacity,))
+        self.__heading = np.resize(self.__heading, (self.__capacity,))
+        self.__path_width = np.resize(self.__path_width, (self.__capacity,))
+
+    def get_agent (self, agent_id):
+        return self.__agents[self.__slots[agent_id]]
+
+    def get_agents (self):
+        return self.__agents
+
+    def get_agent_ids (self):
+        return self.__agent_ids
+
+    def get_pose (self, agent_id):
+        slot = self.__slots[agent_id]
+        return float(self.__x[slot]), float(self.__y[slot]), float(self.__heading[slot])
+
+    def set_pose (self, agent_id, x, y, heading):
+        slot = self.__slots[agent_id]
+        self.__x[slot] = x
+        self.__y[slot] = y
+        self.__heading[slot] = heading
+
+    def set_heading (self, agent_id, heading):
+        self.__heading[self.__slots[agent_id]] = heading
+
+    def get_path_width (self, agent_id):
+        return int(self.__path_width[self.__slots[agent_id]])
+
+    # views over the occupied slots, in slot order. These are live, callers should copy if they keep them
+    def get_x (self):
+        return self.__x[:self.__count]
+
+    def get_y (self):
+        return self.__y[:self.__count]
+
+    def get_headings (self):
+        return self.__heading[:self.__count]
@@ -1,40 +1,159 @@
 import logging
 import math
 import numpy as np
-import random
 from lvps.generators.static_field_map_generator import StaticFieldMapGenerator
-from lvps.generators.random_field_map_generator import RandomFieldMapGenerator
-from field.field_scaler import FieldScaler
 from trig.trig import BasicTrigCalc
 from position.confidence import Confidence
 from lvps.strategies.agent_actions import AgentActions
 from lvps.simulation.sim_events import SimEventSubscriptions, SimEventType
+from lvps.simulation.agent_store import AgentStore
+from lvps.simulation.spatial_index import UniformGridIndex
+from lvps.simulation.occupancy_grid import OccupancyLayers, OccupancyGrid
+from lvps.simulation.map_pool import PreparedMap
+from lvps.simulation.sim_random import SimRandom
+from lvps.simulation.null_field_renderer import NullFieldRenderer
 import uuid
 
 class LvpsSimEnvironment:
-    def __init__(self, id = None):
+    # prepared_map is optional, a map (typically from a MapPool) to use instead of generating one
+    def __init__(self, id = None, seed = None, prepared_map = None):
         self.__environment_id = id if id is not None else uuid.uuid1()
+
+        # every random outcome in this simulation (map, success rates, inaccuracies) comes from this stream
+        self.__random = SimRandom(seed)
         self.__targets = {}
         self.__found_targets = {}
-        self.__agents = {}
+        self.__found_reports = {} # target id -> (agent id, reported x, reported y)
+        self.__agents = AgentStore()
+
+        # spatial indexes keep visibility and proximity queries from scanning every target/agent
+        self.__index_cell_size = 25.0
+        self.__target_index = UniformGridIndex(self.__index_cell_size)
+        self.__agent_index = UniformGridIndex(self.__index_cell_size)
+        self.__visibility_query_margin = 1.1 # candidates are gathered a little beyond sight range, the scaler makes the final call
 
         self.__target_find_position_threshold = 0.07 # 'found' position has to be within this distance in order to be considered found
         self.__agent_collision_threshold = 0.05 # can't be this percent close to any other agent
+        self.__prepared_map = prepared_map
         self.__map = None
-        self.__image_scaler = None
 
         self.__event_subscriptions = SimEventSubscriptions()
         self.__trig_calc = BasicTrigCalc()
+        self.__trajectory_recorder = None
 
     def get_id (self):
         return self.__environment_id
 
+    def get_random (self):
+        return self.__random
+
+    # a lightweight copy of this simulation, to look ahead in (rollouts, etc) without affecting it.
+    # the map and the targets are shared rather than copied, since neither changes once the simulation is set up.
+    # agents are forked onto a NullFieldRenderer, and the fork notifies no events and records no trajectory.
+    # seed starts the fork's own random stream
+    def fork (self, seed = None):
+        forked = LvpsSimEnvironment(id=f'{self.__environment_id}-fork', seed=seed, prepared_map=self.get_prepared_map())
+        forked.__map = self.__map
+        forked.__targets = self.__targets
+        forked.__target_index = self.__target_index
+        forked.__found_targets = dict(self.__found_targets)
+        forked.__found_reports = dict(self.__found_reports)
+        forked.__event_subscriptions.set_enabled(False)
+
+        field_renderer = NullFieldRenderer(self.get_field_image_scaler())
+        for agent in self.__agents.get_agents():
+            x, y, heading = self.__agents.get_pose(agent.get_id())
+            forked.add_agent(agent.fork(forked, field_renderer), x, y, heading)
+        return forked
+
+    def get_agent (self, agent_id):
+        return self.__agents.get_agent(agent_id)
+
+    # the state of this simulation as plain values and numpy arrays (see SimSnapshot), renderers and listeners aren't part of it.
+    # the map's occupancy grid is included as rasterized, so restoring doesn't have to draw it again
+    def get_state (self):
+        grid = self.get_occupancy_grid()
+        agent_states = []
+        for agent in self.__agents.get_agents():
+            agent_state = agent.get_state()
+            agent_state['pose'] = list(self.__agents.get_pose(agent.get_id()))
+            agent_states.append(agent_state)
+
+        return {
+            'environment_id':str(self.__environment_id),
+            'map_dict':self.get_map_dict(),
+            'occupancy':{
+                'boundaries':list(grid.get_boundaries()),
+                'origin':list(grid.get_origin()),
+                'cell_size':grid.get_cell_size(),
+                'margin':grid.get_margin(),
+                'cells':grid.get_cells()
+            },
+            'random':self.__random.get_state(),
+            'targets':list(self.__targets.values()),
+            'found_reports':[[target_id, agent_id, x, y] for target_id, (agent_id, x, y) in self.__found_reports.items()],
+            'agents':agent_states
+        }
+
+    # rebuilds a simulation (without its agents) from get_state. Agents are restored separately, see SimSnapshot
+    @staticmethod
+    def from_state (state):
+        occupancy = state['occupancy']
+        grid = OccupancyGrid.from_cells(occupancy['boundaries'], occupancy['cells'], occupancy['origin'], occupancy['cell_size'], occupancy['margin'])
+        lvps_env = LvpsSimEnvironment(id=state['environment_id'], prepared_map=PreparedMap(state['map_dict'], occupancy_grid=grid))
+        lvps_env.__random.set_state(state['random'])
+
+        for t in state['targets']:
+            lvps_env.add_target(target_id=t['id'], target_name=t['name'], target_type=t['type'], target_x=t['x'], target_y=t['y'])
+        for target_id, agent_id, x, y in state['found_reports']:
+            lvps_env.__found_targets[target_id] = lvps_env.__targets[target_id]
+            lvps_env.__found_reports[target_id] = (agent_id, x, y)
+        return lvps_env
+
+    # who reported each found target, and where: target id -> (agent id, x, y)
+    def get_found_reports (self):
+        return self.__found_reports
+
+    # snapshot of what the agents would draw on a field renderer, in the FieldRasterizer render state format,
+    # built from the agents' own histories so it doesn't depend on which renderer they were given
+    def get_render_state (self):
+        positions = {}
+        looks = {}
+        for agent in self.__agents.get_agents():
+            position_history = agent.get_position_history()
+            positions[agent.get_id()] = None if len(position_history) == 0 else tuple(position_history[-1][:3])
+            looks[agent.get_id()] = [* reversed(agent.get_look_history())]
+
+        found_targets = [(agent_id, self.__targets[target_id]['type'], x, y) for target_id, (agent_id, x, y) in self.__found_reports.items()]
+        return {
+            'positions':positions,
+            'looks':looks,
+            'found_targets':found_targets,
+            'num_found_targets':len(found_targets)
+        }
+
     def add_event_subscription (self, event_type, listener):
         self.__event_subscriptions.add_subscription(event_type, listener)
 
     def get_agent_position (self, agent_id):
-        agent = self.__agents[agent_id]
-        return agent['x'], agent['y'], agent['heading']
+        return self.__agents.get_pose(agent_id)
+
+    # starts recording this simulation (a TrajectoryRecorder). Call once the agents and targets are in place
+    def set_trajectory_recorder (self, trajectory_recorder):
+        self.__trajectory_recorder = trajectory_recorder
+        self.__trajectory_recorder.begin_episode(self)
+
+    def get_trajectory_recorder (self):
+        return self.__trajectory_recorder
+
+    # whoever drives the agents reports each action taken, so it can be recorded
+    def record_action (self, agent_id, action, success):
+        if self.__trajectory_recorder is not None:
+            self.__trajectory_recorder.record_action(agent_id, action, success)
+
+    # agents report their looks here, look is (x, y, heading, relative begin, relative end, distance)
+    def notify_agent_looked (self, agent_id, look):
+        self.__event_subscriptions.notify_subscribers(SimEventType.AgentLooked, {'agent_id':agent_id, 'look':look})
 
     # this simulates the get_coords_and_heading method of pilot.
     # this method is in the environment sim reather than agent sim, because agent should never have
@@ -45,19 +164,19 @@ class LvpsSimEnvironment:
         est_heading = None
         confidence = None
 
-        agent = self.__agents[agent_id]
+        agent_x, agent_y, agent_heading = self.__agents.get_pose(agent_id)
 
         # if agent is in a dead spot, positioning will always fail
-        is_dead_spot, dead_spot_id = self.__map.is_in_dead_spot (agent['x'], agent['y'], agent['heading'])
+        is_dead_spot, dead_spot_id = self.is_in_dead_spot (agent_x, agent_y, agent_heading)
         if is_dead_spot:
             logging.getLogger(__name__).info(f"Agent {agent_id} is dead spot {dead_spot_id}, positioning will fail")
         elif self.__does_event_happen(AgentActions.SuccessRate[AgentActions.EstimatePosition]):
             # returns an estimate of the position, with variability
 
-            confidence = np.random.choice([Confidence.CONFIDENCE_HIGH, Confidence.CONFIDENCE_MEDIUM])
-            est_x = self.__get_less_accurate(agent['x'], AgentActions.Accuracy[AgentActions.EstimatePosition][confidence], range_val=self.get_map().get_width())
-            est_y = self.__get_less_accurate(agent['y'], AgentActions.Accuracy[AgentActions.EstimatePosition][confidence], range_val=self.get_map().get_length())
-            est_heading = self.__get_less_accurate(agent['heading'], AgentActions.Accuracy[AgentActions.Heading][confidence], range_val=360)
+            confidence = self.__random.choice([Confidence.CONFIDENCE_HIGH, Confidence.CONFIDENCE_MEDIUM])
+            est_x = self.__get_less_accurate(agent_x, AgentActions.Accuracy[AgentActions.EstimatePosition][confidence], range_val=self.get_map().get_width())
+            est_y = self.__get_less_accurate(agent_y, AgentActions.Accuracy[AgentActions.EstimatePosition][confidence], range_val=self.get_map().get_length())
+            est_heading = self.__get_less_accurate(agent_heading, AgentActions.Accuracy[AgentActions.Heading][confidence], range_val=360)
 
             logging.getLogger(__name__).debug(f"Agent {agent_id} positiong successful. ({est_x},{est_y}) : {round(est_heading,1)} deg ")
         else:
@@ -68,13 +187,13 @@ class LvpsSimEnvironment:
     def rotate (self, agent_id, degrees):
         if self.__does_event_happen(AgentActions.SuccessRate[AgentActions.Rotate]):
             actual_adjust = self.__get_less_accurate(degrees, AgentActions.Accuracy[AgentActions.Rotate], range_val=360)
-            curr_heading = self.__agents[agent_id]['heading']
+            _, _, curr_heading = self.__agents.get_pose(agent_id)
             new_heading = curr_heading + actual_adjust
             if new_heading > 180:
                 new_heading = -1 * (360 - new_heading)
             elif new_heading < -180:
                 new_heading = 360 - abs(new_heading)
-            self.__agents[agent_id]['heading'] = new_heading
+            self.__agents.set_heading(agent_id, new_heading)
 
             self.__event_subscriptions.notify_subscribers(SimEventType.AgentRotated, {'agent_id':agent_id, 'heading':new_heading})
 
@@ -83,10 +202,7 @@ class LvpsSimEnvironment:
 
     # moves forward or backward without affecting rotation
     def __go_straight (self, agent_id, forward, distance, success_rate, accuracy, heading_offset = 0):
-        agent = self.__agents[agent_id]
-        starting_x = agent['x']
-        starting_y = agent['y']
-        heading = agent['heading']
+        starting_x, starting_y, heading = self.__agents.get_pose(agent_id)
 
         adjusted_heading = heading + heading_offset
         if adjusted_heading > 180:
@@ -104,19 +220,15 @@ class LvpsSimEnvironment:
             logging.getLogger(__name__).debug(f"Facing {round(heading)} - going {'forward' if forward else 'reverse'} by {round(distance)} would end up at ({round(next_x)}, {round(next_y)})")
 
             # if path is not open, make the new position on the obstacle, so the agent is penalized
-            is_blocked, obstacle_id = self.__map.is_path_blocked(starting_x, starting_y, next_x, next_y, agent['agent'].get_path_width())
+            is_blocked, obstacle_id = self.is_path_blocked(starting_x, starting_y, next_x, next_y, self.__agents.get_path_width(agent_id))
             if is_blocked:
                 # put in the center of the obstacle
                 logging.getLogger(__name__).debug(f"Agent {agent_id} ran into obstacle {obstacle_id}")
                 o_xmin, o_ymin, o_xmax, o_ymax = self.__map.get_obstacle_bounds(obstacle_id)
-                self.__agents[agent_id]['x'] = o_xmin + .5 * (o_xmax - o_xmin)
-                self.__agents[agent_id]['y'] = o_ymin + .5 * (o_ymax - o_ymin)
-                self.__agents[agent_id]['heading'] = heading
+                self.__set_agent_pose(agent_id, o_xmin + .5 * (o_xmax - o_xmin), o_ymin + .5 * (o_ymax - o_ymin), heading)
             else:
-                logging.getLogger(__name__).debug(f"Agent {agent_id} successfully traveled from {self.__agents[agent_id]['x']},{self.__agents[agent_id]['y']} to {next_x,next_y} and is still facing {heading}")
-                self.__agents[agent_id]['x'] = next_x
-                self.__agents[agent_id]['y'] = next_y
-                self.__agents[agent_id]['heading'] = heading
+                logging.getLogger(__name__).debug(f"Agent {agent_id} successfully traveled from {starting_x},{starting_y} to {next_x,next_y} and is still facing {heading}")
+                self.__set_agent_pose(agent_id, next_x, next_y, heading)
 
             self.__event_subscriptions.notify_subscribers(SimEventType.AgentMoved, {'agent_id':agent_id, 'x':next_x, 'y':next_y, 'heading':heading})
             return True
@@ -174,17 +286,16 @@ class LvpsSimEnvironment:
         adjusted_x = self.__get_less_accurate(target_x, AgentActions.Accuracy[AgentActions.Go], range_val=self.__map.get_width())
         adjusted_y = self.__get_less_accurate(target_y, AgentActions.Accuracy[AgentActions.Go], range_val=self.__map.get_length())
 
+        start_x, start_y, _ = self.__agents.get_pose(agent_id)
         new_heading = self.__get_relative_heading_end (
-            start_x = self.__agents[agent_id]['x'],
-            start_y = self.__agents[agent_id]['y'],
+            start_x = start_x,
+            start_y = start_y,
             end_x = adjusted_x,
             end_y = adjusted_y)
 
         if self.__does_event_happen(AgentActions.SuccessRate[AgentActions.Go]):
-            logging.getLogger(__name__).debug(f"Agent {agent_id} successfully traveled from {self.__agents[agent_id]['x']},{self.__agents[agent_id]['y']} to {adjusted_x,adjusted_y} and is now facing {new_heading}")
-            self.__agents[agent_id]['x'] = adjusted_x
-            self.__agents[agent_id]['y'] = adjusted_y
-            self.__agents[agent_id]['heading'] = new_heading
+            logging.getLogger(__name__).debug(f"Agent {agent_id} successfully traveled from {start_x},{start_y} to {adjusted_x,adjusted_y} and is now facing {new_heading}")
+            self.__set_agent_pose(agent_id, adjusted_x, adjusted_y, new_heading)
 
             self.__event_subscriptions.notify_subscribers(SimEventType.AgentMoved, {'agent_id':agent_id, 'x':adjusted_x, 'y':adjusted_y, 'heading':new_heading})
             return True
@@ -211,56 +322,39 @@ class LvpsSimEnvironment:
         return end_heading
 
     def is_too_close_to_other_agents (self, agent_id):
-        # calculate distance from each other agent
-        closest_id, closest_dist = self.__find_closest_agent (agent_id)
+        # find the closest other agent within collision distance
+        closest_id, closest_dist = self.__find_closest_agent (agent_id, max_distance=min(self.get_map().get_width(), self.get_map().get_length()) * self.__agent_collision_threshold)
         if closest_id is not None: # might be the only agent on the field
-            if closest_dist <= min(self.get_map().get_width(), self.get_map().get_length()) * self.__agent_collision_threshold:
-                logging.getLogger(__name__).info(f"Agent {agent_id} may have collided with {closest_id}!")
-                return True
+            logging.getLogger(__name__).info(f"Agent {agent_id} may have collided with {closest_id}!")
+            return True
         return False
 
 
     def __get_less_accurate(self, good_value, accuracy, range_val):
         # choose a random amount to mess with the calculation
         tolerance = 1 - accuracy
-        adjust_amount = random.randrange(int(-1 * 1000 * tolerance), int(1000 * tolerance)) / 1000
+        adjust_amount = self.__random.randrange(int(-1 * 1000 * tolerance), int(1000 * tolerance)) / 1000
         return good_value + (range_val * adjust_amount)
 
     # returns true if a "random" event should occur, based on the given occurance rate
     def __does_event_happen (self, occurance_rate):
-        return random.randrange(0,100) <= occurance_rate * 100
+        return self.__random.randrange(0,100) <= occurance_rate * 100
 
     def get_field_image_scaler (self):
-        if self.__image_scaler is None:
-            rendered_height = 320
-            rendered_width = 320
-            field_map = self.get_map()
-
-            max_scaled_side_length = (min(rendered_height, rendered_width)) * .9
-            max_map_side = max(field_map.get_width(), field_map.get_length())
-
-            scale_factor = 1
-            while ((max_map_side * scale_factor) > max_scaled_side_length):
-                scale_factor -= 0.05
-
-            logging.getLogger(__name__).debug(f"Rendered map will be scaled down to {scale_factor}")
-
-            self.__image_scaler = FieldScaler(field_map=field_map, scaled_height=rendered_height, scaled_width=rendered_width, scale_factor=scale_factor, invert_x_axis=True, invert_y_axis=True)
-        
-        return self.__image_scaler
+        return self.get_prepared_map().get_field_image_scaler()
 
     def add_agent (self, agent, x, y, heading):
-        self.__agents[agent.get_id()] = {
-            'agent':agent,
-            'x':x,
-            'y':y,
-            'heading':heading
-        }
+        self.__agents.add(agent, x, y, heading, path_width=agent.get_path_width())
+        self.__agent_index.insert(agent.get_id(), x, y)
         logging.getLogger(__name__).debug(f"Agent {agent.get_id()} added at ({x},{y}) facing {heading}")
 
     def get_agent_position(self, agent_id):
-        agent = self.__agents[agent_id]
-        return agent['x'], agent['y'], agent['heading'], Confidence.CONFIDENCE_HIGH
+        x, y, heading = self.__agents.get_pose(agent_id)
+        return x, y, heading, Confidence.CONFIDENCE_HIGH
+
+    # returns ids and true positions of all agents as arrays (copies), in matching order
+    def get_agent_positions (self):
+        return list(self.__agents.get_agent_ids()), self.__agents.get_x().copy(), self.__agents.get_y().copy(), self.__agents.get_headings().copy()
 
     def add_target (self, target_id, target_name, target_type, target_x, target_y):
         self.__targets[target_id] = {
@@ -270,18 +364,22 @@ class LvpsSimEnvironment:
             'x':target_x,
             'y':target_y
         }
+        self.__target_index.insert(target_id, target_x, target_y)
         logging.getLogger(__name__).debug(f"Target {target_id} added at ({target_x},{target_y})")
 
+    # returns all targets, by id
+    def get_targets (self):
+        return self.__targets
+
     # returns targets within sight range of the given agent
     def get_visible_targets (self, agent_id, sight_distance):
         visible_targets = []
         visible_headings = []
-        agent = self.__agents[agent_id]['agent']
-        agent_x = self.__agents[agent_id]['x']
-        agent_y = self.__agents[agent_id]['y']
+        agent = self.__agents.get_agent(agent_id)
+        agent_x, agent_y, _ = self.__agents.get_pose(agent_id)
 
         logging.getLogger(__name__).debug(f"For agent {agent_id}, checking within {sight_distance} dist from {agent_x},{agent_y} for target")
-        for tid in self.__targets:
+        for tid, _ in self.__target_index.query_radius(agent_x, agent_y, sight_distance * self.__visibility_query_margin):
             target = self.__targets[tid]
             if agent.get_field_renderer().get_map_scaler().is_lvps_coord_visible (
                 lvps_perspective_x = agent_x, 
@@ -308,27 +406,76 @@ class LvpsSimEnvironment:
 
         return visible_targets, visible_headings
 
-    def get_map (self):
-        if self.__map is None:
+    # the map along with everything derived from it (dict, scaler, occupancy grid)
+    def get_prepared_map (self):
+        if self.__prepared_map is None:
             #self.__map = StaticFieldMapGenerator().generate_map()
-            self.__map = RandomFieldMapGenerator(
-                min_width=150,
-                max_width=500,
-                min_height=150,
-                max_height=500,
-                min_obstacles=3,
-                max_obstacles=10,
-                min_obstacle_size_pct=0.01,
-                max_obstacle_size_pct=0.25,
-                min_deadspots=2,
-                max_deadspots=10,
-                min_deadspot_size_pct = 0.01,
-                max_deadspot_size_pct=0.05
-            ).generate_map()
+            self.__prepared_map = PreparedMap.generate(rng=self.__random.get_generator())
+        return self.__prepared_map
 
+    def get_map (self):
+        if self.__map is None:
+            self.__map = self.get_prepared_map().get_field_map()
             logging.getLogger(__name__).info(f"Random LVPS Map Height: {self.__map.get_length()}, Width: {self.__map.get_width()}, Boundaries: {self.__map.get_boundaries()}")
         return self.__map
 
+    # returns the map in the dict form it was generated from
+    def get_map_dict (self):
+        return self.get_prepared_map().get_map_dict()
+
+    # rasterized map, answers most bounds/obstacle/dead spot checks without going to the map geometry
+    def get_occupancy_grid (self):
+        return self.get_prepared_map().get_occupancy_grid()
+
+    # the map checks below go to the occupancy grid first, and only fall back to the map geometry
+    # near edges (or for paths wider than the grid margin allows for)
+    def __grid_applies (self, path_width):
+        grid = self.get_occupancy_grid()
+        return path_width + 2 * grid.get_cell_size() <= grid.get_margin()
+
+    def is_in_bounds (self, x, y, path_width):
+        if self.__grid_applies(path_width):
+            in_bounds = self.get_occupancy_grid().is_in_bounds(x, y)
+            if in_bounds is not None:
+                return in_bounds
+        return self.get_map().is_in_bounds(x, y, path_width)
+
+    # returns (blocked, obstacle id). The obstacle id always comes from the map
+    def is_blocked (self, x, y, path_width):
+        if self.__grid_applies(path_width) and self.get_occupancy_grid().is_blocked(x, y) == False:
+            return False, None
+        return self.get_map().is_blocked(x, y, path_width)
+
+    def is_path_blocked (self, start_x, start_y, end_x, end_y, path_width):
+        if self.__grid_applies(path_width) and self.get_occupancy_grid().is_path_clear(start_x, start_y, end_x, end_y):
+            return False, None
+        return self.get_map().is_path_blocked(start_x, start_y, end_x, end_y, path_width)
+
+    def is_in_dead_spot (self, x, y, heading):
+        if not self.get_occupancy_grid().may_be_in_dead_spot(x, y):
+            return False, None
+        return self.get_map().is_in_dead_spot(x, y, heading)
+
+    # picks random coords that are in bounds and clear of obstacles, using this simulation's random stream.
+    # candidates are drawn a batch at a time and checked against the occupancy grid. Dead spots only affect looking,
+    # so they can be picked, and candidates near an edge are resolved by is_in_bounds / is_blocked (through the map)
+    def get_random_traversable_coords (self, max_batches = 10, batch_size = 64):
+        grid = self.get_occupancy_grid()
+        xmin, ymin, xmax, ymax = grid.get_boundaries()
+        for _ in range(max_batches):
+            xs = self.__random.get_generator().uniform(xmin, xmax, batch_size)
+            ys = self.__random.get_generator().uniform(ymin, ymax, batch_size)
+            flags = grid.sample(xs, ys)
+            near = (flags & (OccupancyLayers.NearBoundary | OccupancyLayers.NearObstacle)) != 0
+            clear = ~near & ((flags & (OccupancyLayers.InBounds | OccupancyLayers.Obstacle)) == OccupancyLayers.InBounds)
+            for i in np.flatnonzero(clear | near):
+                x, y = float(xs[i]), float(ys[i])
+                if clear[i] or (self.is_in_bounds(x, y, 0) and not self.is_blocked(x, y, 0)[0]):
+                    return x, y
+
+        # the map is too crowded for the grid to find a clear spot, let the scaler decide
+        return self.get_field_image_scaler().get_random_traversable_coords()
+
     # tells whether the given target is already found
     def is_target_found (self, agent_id, x, y):
         #logging.getLogger(__name__).info(f"Agent {agent_id} checking if target at ({x},{y}) is already found")
@@ -342,8 +489,9 @@ class LvpsSimEnvironment:
         closest_target = self.__find_closest_target(x, y)
         if closest_target is not None and closest_target not in self.__found_targets:
             self.__found_targets[closest_target] = self.__targets[closest_target]
-            self.__agents[agent_id]['agent'].get_field_renderer().update_search_state (agent_id, self.__targets[closest_target]['type'], x, y)
-            self.__event_subscriptions.notify_subscribers(SimEventType.TargetFound, {'agent_id':agent_id, 'target_id':closest_target})
+            self.__found_reports[closest_target] = (agent_id, x, y)
+            self.__agents.get_agent(agent_id).get_field_renderer().update_search_state (agent_id, self.__targets[closest_target]['type'], x, y)
+            self.__event_subscriptions.notify_subscribers(SimEventType.TargetFound, {'agent_id':agent_id, 'target_id':closest_target, 'x':x, 'y':y})
 
         elif closest_target is None:
             logging.getLogger(__name__).info("There is no target at that location")
@@ -359,51 +507,32 @@ class LvpsSimEnvironment:
     # returns actual distance to the target (not estimated).
     # this should only be used for calculating rewards, not making decisions
     def get_agent_target_distance (self, agent_id, target_x, target_y):
+        agent_x, agent_y, _ = self.__agents.get_pose(agent_id)
         return self.__get_distance(
-            self.__agents[agent_id]['x'],
-            self.__agents[agent_id]['y'],
+            agent_x,
+            agent_y,
             target_x,
             target_y
         )
 
     def __find_closest_target (self, x, y):
-        # find the target nearest to the specified coords
-        closest_target = None
-        closest_dist = None
-        for tid in self.__targets:
-            this_target = self.__targets[tid]
-            this_dist = self.__get_distance(x, y, this_target['x'], this_target['y'])
-
-            if closest_dist is None or closest_dist > this_dist:
-                closest_dist = this_dist
-                closest_target = tid
-        
-        if closest_dist is None:
-            return None
-        elif closest_dist <= (self.__target_find_position_threshold) * min(self.get_map().get_width(), self.get_map().get_length()):
-            return closest_target
-        else:
-            logging.getLogger(__name__).debug(f"Target {closest_target} at a distance of {closest_dist} is higher than the threshold dist:  {(self.__target_find_position_threshold) * min(self.get_map().get_width(), self.get_map().get_length())}")
-        return None
-
-    # finds the agent closest to the given agent
-    def __find_closest_agent (self, agent_id):
-        # find the target nearest to the specified coords
-        closest_agent = None
-        closest_dist = None
-        x = self.__agents[agent_id]['x']
-        y = self.__agents[agent_id]['y']
-
-        for aid in self.__agents:
-            if aid != agent_id:
-                curr_agent = self.__agents[aid]
-                this_dist = self.__get_distance(x, y, curr_agent['x'], curr_agent['y'])
-
-                if closest_dist is None or closest_dist > this_dist:
-                    closest_dist = this_dist
-                    closest_agent = aid
-        
-        return closest_agent, closest_dist
+        # find the target nearest to the specified coords, only those within the threshold count
+        threshold_dist = (self.__target_find_position_threshold) * min(self.get_map().get_width(), self.get_map().get_length())
+        closest_target, closest_dist = self.__target_index.nearest(x, y, max_distance=threshold_dist)
+
+        if closest_target is None:
+            logging.getLogger(__name__).debug(f"No target within the threshold dist: {threshold_dist} of ({x},{y})")
+        return closest_target
+
+    # returns id and distance of the closest other agent within max_distance (None, None if there isn't one)
+    def __find_closest_agent (self, agent_id, max_distance):
+        x, y, _ = self.__agents.get_pose(agent_id)
+        return self.__agent_index.nearest(x, y, max_distance=max_distance, exclude_id=agent_id)
+
+    # all agent moves go through here, so the spatial index stays in sync with the agent store
+    def __set_agent_pose (self, agent_id, x, y, heading):
+        self.__agents.set_pose(agent_id, x, y, heading)
+        self.__agent_index.move(agent_id, x, y)
     
 
     def __get_distance(self, x1, y1, x2, y2):
@@ -0,0 +1,221 @@
+import bisect
+import json
+import logging
+import os
+import numpy as np
+from lvps.simulation.map_pool import PreparedMap
+from lvps.simulation.occupancy_grid import OccupancyGrid
+
+# fixed sets of maps stored on disk, for training and evaluating against the same fields every run.
+#
+# a corpus is a directory with an index.json and one directory per shard. Each shard holds plain .npy arrays,
+# so they can be memory mapped, and worker processes reading the same corpus share the pages:
+#   boundaries.npy          (n, 4) float64   xmin, ymin, xmax, ymax
+#   obstacles.npy           (m, 4) float64   every obstacle rect in the shard, map after map
+#   obstacle_offsets.npy    (n + 1,) int64   map i's obstacles are obstacles[offsets[i]:offsets[i+1]]
+#   dead_spots.npy / dead_spot_offsets.npy   same, for dead spots
+#   occupancy.npy           (c,) uint8       every map's occupancy grid cells, flattened, map after map
+#   occupancy_offsets.npy   (n + 1,) int64
+#   occupancy_shapes.npy    (n, 2) int64     rows, cols of each map's grid
+#   occupancy_origins.npy   (n, 2) float64   origin x, y of each map's grid
+
+class MapCorpusFormat:
+    Version = 1
+    IndexFile = 'index.json'
+    Arrays = [
+        'boundaries', 'obstacles', 'obstacle_offsets', 'dead_spots', 'dead_spot_offsets',
+        'occupancy', 'occupancy_offsets', 'occupancy_shapes', 'occupancy_origins'
+    ]
+
+# writes map dicts into a new corpus, a shard at a time
+class MapCorpusWriter:
+    def __init__(self, corpus_dir, shard_size = 10000, cell_size = PreparedMap.OccupancyCellSize, margin = PreparedMap.OccupancyMargin):
+        if os.path.exists(os.path.join(corpus_dir, MapCorpusFormat.IndexFile)):
+            raise ValueError(f"A map corpus already exists at {corpus_dir}")
+        os.makedirs(corpus_dir, exist_ok=True)
+
+        self.__corpus_dir = corpus_dir
+        self.__shard_size = shard_size
+        self.__cell_size = cell_size
+        self.__margin = margin
+        self.__shards = []
+        self.__num_maps = 0
+        self.__pending = []
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    # adds a map to the corpus, returning its index
+    def add (self, map_dict):
+        if 'landmarks' in map_dict and map_dict['landmarks'] is not None and len(map_dict['landmarks']) > 0:
+            raise ValueError("Map corpus does not support maps with landmarks")
+
+        self.__pending.append(map_dict)
+        if len(self.__pending) >= self.__shard_size:
+            self.__write_shard()
+
+        self.__num_maps += 1
+        return self.__num_maps - 1
+
+    def close (self):
+        if len(self.__pending) > 0:
+            self.__write_shard()
+
+        index = {
+            'version':MapCorpusFormat.Version,
+            'num_maps':self.__num_maps,
+            'cell_size':self.__cell_size,
+            'margin':self.__margin,
+            'shards':self.__shards
+        }
+        with open(os.path.join(self.__corpus_dir, MapCorpusFormat.IndexFile), 'w') as index_file:
+            json.dump(index, index_file, indent=2)
+
+        logging.getLogger(__name__).info(f"Map corpus with {self.__num_maps} maps in {len(self.__shards)} shard(s) written to {self.__corpus_dir}")
+
+    def __get_rects (self, map_dict, key):
+        rects = []
+        if key in map_dict and map_dict[key] is not None:
+            for rect_id in map_dict[key]:
+                r = map_dict[key][rect_id]
+                rects.append((r['xmin'], r['ymin'], r['xmax'], r['ymax']))
+        return rects
+
+    def __write_shard (self):
+        shard_name = f'shard_{len(self.__shards):05d}'
+        shard_dir = os.path.join(self.__corpus_dir, shard_name)
+        os.makedirs(shard_dir, exist_ok=True)
+
+        boundaries = []
+        obstacles = []
+        dead_spots = []
+        obstacle_offsets = [0]
+        dead_spot_offsets = [0]
+        occupancy = []
+        occupancy_offsets = [0]
+        occupancy_shapes = []
+        occupancy_origins = []
+
+        for map_dict in self.__pending:
+            b = map_dict['boundaries']
+            boundaries.append((b['xmin'], b['ymin'], b['xmax'], b['ymax']))
+
+            map_obstacles = self.__get_rects(map_dict, 'obstacles')
+            obstacles.extend(map_obstacles)
+            obstacle_offsets.append(obstacle_offsets[-1] + len(map_obstacles))
+
+            map_dead_spots = self.__get_rects(map_dict, 'dead_spots')
+            dead_spots.extend(map_dead_spots)
+            dead_spot_offsets.append(dead_spot_offsets[-1] + len(map_dead_spots))
+
+            grid = OccupancyGrid.from_map_dict(map_dict, cell_size=self.__cell_size, margin=self.__margin)
+            cells = grid.get_cells()
+            occupancy.append(cells.ravel())
+            occupancy_offsets.append(occupancy_offsets[-1] + cells.size)
+            occupancy_shapes.append(cells.shape)
+            occupancy_origins.append(grid.get_origin())
+
+        arrays = {
+            'boundaries':np.array(boundaries, dtype=np.float64).reshape((-1, 4)),
+            'obstacles':np.array(obstacles, dtype=np.float64).reshape((-1, 4)),
+            'obstacle_offsets':np.array(obstacle_offsets, dtype=np.int64),
+            'dead_spots':np.array(dead_spots, dtype=np.float64).reshape((-1, 4)),
+            'dead_spot_offsets':np.array(dead_spot_offsets, dtype=np.int64),
+            'occupancy':np.concatenate(occupancy).astype(np.uint8),
+            'occupancy_offsets':np.array(occupancy_offsets, dtype=np.int64),
+            'occupancy_shapes':np.array(occupancy_shapes, dtype=np.int64).reshape((-1, 2)),
+            'occupancy_origins':np.array(occupancy_origins, dtype=np.float64).reshape((-1, 2))
+        }
+        for name in MapCorpusFormat.Arrays:
+            np.save(os.path.join(shard_dir, f'{name}.npy'), arrays[name])
+
+        self.__shards.append({'dir':shard_name, 'first':sum([s['count'] for s in self.__shards]), 'count':len(self.__pending)})
+        self.__pending = []
+
+# read access to a corpus. Shards are memory mapped when first used.
+# get() hands out the maps in order (wrapping around), so a corpus can stand in for a MapPool
+class MapCorpus:
+    def __init__(self, corpus_dir):
+        with open(os.path.join(corpus_dir, MapCorpusFormat.IndexFile), 'r') as index_file:
+            self.__index = json.load(index_file)
+
+        if self.__index['version'] != MapCorpusFormat.Version:
+            raise ValueError(f"Unsupported map corpus version: {self.__index['version']}")
+
+        self.__corpus_dir = corpus_dir
+        self.__shard_firsts = [s['first'] for s in self.__index['shards']]
+        self.__shard_arrays = {}
+        self.__next_map = 0
+
+    def __len__ (self):
+        return self.__index['num_maps']
+
+    def get_cell_size (self):
+        return self.__index['cell_size']
+
+    def get_margin (self):
+        return self.__index['margin']
+
+    def __get_shard (self, map_index):
+        if map_index < 0 or map_index >= len(self):
+            raise IndexError(f"Map {map_index} is not in the corpus ({len(self)} maps)")
+
+        shard_num = bisect.bisect_right(self.__shard_firsts, map_index) - 1
+        if shard_num not in self.__shard_arrays:
+            shard_dir = os.path.join(self.__corpus_dir, self.__index['shards'][shard_num]['dir'])
+            self.__shard_arrays[shard_num] = {
+                name:np.load(os.path.join(shard_dir, f'{name}.npy'), mmap_mode='r') for name in MapCorpusFormat.Arrays
+            }
+        return self.__shard_arrays[shard_num], map_index - self.__shard_firsts[shard_num]
+
+    def __to_rect_dicts (self, rects, prefix):
+        return {f'{prefix}_{i}':{'xmin':float(r[0]), 'ymin':float(r[1]), 'xmax':float(r[2]), 'ymax':float(r[3])} for i, r in enumerate(rects)}
+
+    def get_map_dict (self, map_index):
+        shard, i = self.__get_shard(map_index)
+        b = shard['boundaries'][i]
+        return {
+            'shape':'rectangle',
+            'boundaries':{'xmin':float(b[0]), 'ymin':float(b[1]), 'xmax':float(b[2]), 'ymax':float(b[3])},
+            'landmarks':{},
+            'obstacles':self.__to_rect_dicts(shard['obstacles'][shard['obstacle_offsets'][i]:shard['obstacle_offsets'][i + 1]], 'obstacle'),
+            'dead_spots':self.__to_rect_dicts(shard['dead_spots'][shard['dead_spot_offsets'][i]:shard['dead_spot_offsets'][i + 1]], 'ds')
+        }
+
+    # the occupancy grid cells are a view into the memory mapped shard
+    def get_occupancy_grid (self, map_index):
+        shard, i = self.__get_shard(map_index)
+        rows, cols = shard['occupancy_shapes'][i]
+        cells = shard['occupancy'][shard['occupancy_offsets'][i]:shard['occupancy_offsets'][i + 1]].reshape((rows, cols))
+        return OccupancyGrid.from_cells(
+            boundaries=[float(v) for v in shard['boundaries'][i]],
+            cells=cells,
+            origin=(float(shard['occupancy_origins'][i][0]), float(shard['occupancy_origins'][i][1])),
+            cell_size=self.get_cell_size(),
+            margin=self.get_margin())
+
+    # returns map i, ready to hand to LvpsSimEnvironment(prepared_map=...)
+    def get_prepared_map (self, map_index):
+        return PreparedMap(self.get_map_dict(map_index), occupancy_grid=self.get_occupancy_grid(map_index))
+
+    # returns the next map in the corpus
+    def get (self, timeout = None):
+        prepared_map = self.get_prepared_map(self.__next_map)
+        self.__next_map = (self.__next_map + 1) % len(self)
+        return prepared_map
+
+    def set_next_map (self, map_index):
+        self.__next_map = map_index
+
+# generates num_maps random maps into a new corpus, a shard's worth at a time
+def build_map_corpus (corpus_dir, num_maps, shard_size = 10000, seed = None):
+    generator = PreparedMap.create_map_generator(np.random.default_rng(seed))
+    with MapCorpusWriter(corpus_dir, shard_size=shard_size) as writer:
+        for first in range(0, num_maps, shard_size):
+            for map_dict in generator.generate_map_dicts(min(shard_size, num_maps - first)):
+                writer.add(map_dict)
+    return MapCorpus(corpus_dir)
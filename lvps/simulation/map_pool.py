@@ -0,0 +1,152 @@
+import logging
+import queue
+import threading
+import numpy as np
+from lvps.generators.random_field_map_generator import RandomFieldMapGenerator
+from field.field_scaler import FieldScaler
+from field.field_map_persistence import FieldMapPersistence
+from lvps.simulation.occupancy_grid import OccupancyGrid
+from lvps.simulation.agent_types import AgentTypes
+
+# a map that is ready for a simulation to use: the map dict it came from, the loaded FieldMap,
+# the FieldScaler used for rendering, and the occupancy grid.
+# the FieldMap and scaler are only built when first asked for (see prepare)
+class PreparedMap:
+    # rendered image size the field image scaler fits the map into
+    RenderedHeight = 320
+    RenderedWidth = 320
+
+    # occupancy grid resolution. the margin covers the widest agent path, plus a couple cells so
+    # path walks can't skip past an edge
+    OccupancyCellSize = 2.0
+    OccupancyMargin = max(AgentTypes.PathWidth.values()) + 2 * OccupancyCellSize
+
+    # occupancy_grid can be passed in if it was already rasterized (map corpus, etc)
+    def __init__(self, map_dict, occupancy_grid = None):
+        self.__map_dict = map_dict
+        self.__field_map = None
+        self.__field_image_scaler = None
+        self.__occupancy_grid = occupancy_grid
+        if self.__occupancy_grid is None:
+            self.__occupancy_grid = OccupancyGrid.from_map_dict(map_dict, cell_size=PreparedMap.OccupancyCellSize, margin=PreparedMap.OccupancyMargin)
+
+    # generates a new random map. rng is a numpy Generator, or None to use the global numpy random state
+    @staticmethod
+    def generate (rng = None):
+        return PreparedMap(PreparedMap.generate_map_dict(rng))
+
+    # generates just the dict of a new random map
+    @staticmethod
+    def generate_map_dict (rng = None):
+        return PreparedMap.create_map_generator(rng).generate_map_dict()
+
+    # the random map generator, set up the way simulations use it
+    @staticmethod
+    def create_map_generator (rng = None):
+        return RandomFieldMapGenerator(
+            min_width=150,
+            max_width=500,
+            min_height=150,
+            max_height=500,
+            min_obstacles=3,
+            max_obstacles=10,
+            min_obstacle_size_pct=0.01,
+            max_obstacle_size_pct=0.25,
+            min_deadspots=2,
+            max_deadspots=10,
+            min_deadspot_size_pct = 0.01,
+            max_deadspot_size_pct=0.05,
+            rng=rng
+        )
+
+    def __create_field_image_scaler (self, field_map):
+        max_scaled_side_length = (min(PreparedMap.RenderedHeight, PreparedMap.RenderedWidth)) * .9
+        max_map_side = max(field_map.get_width(), field_map.get_length())
+
+        scale_factor = 1
+        while ((max_map_side * scale_factor) > max_scaled_side_length):
+            scale_factor -= 0.05
+
+        logging.getLogger(__name__).debug(f"Rendered map will be scaled down to {scale_factor}")
+
+        return FieldScaler(field_map=field_map, scaled_height=PreparedMap.RenderedHeight, scaled_width=PreparedMap.RenderedWidth, scale_factor=scale_factor, invert_x_axis=True, invert_y_axis=True)
+
+    # builds everything that is otherwise built on first use
+    def prepare (self):
+        self.get_field_image_scaler()
+        return self
+
+    def get_map_dict (self):
+        return self.__map_dict
+
+    def get_field_map (self):
+        if self.__field_map is None:
+            self.__field_map = FieldMapPersistence().load_map_from_dict(self.__map_dict)
+        return self.__field_map
+
+    def get_field_image_scaler (self):
+        if self.__field_image_scaler is None:
+            self.__field_image_scaler = self.__create_field_image_scaler(self.get_field_map())
+        return self.__field_image_scaler
+
+    def get_occupancy_grid (self):
+        return self.__occupancy_grid
+
+# keeps a queue of prepared maps filled from a background thread, so simulations being reset
+# pick up a ready map rather than generating one on the spot.
+# one pool can be shared by any number of environments. Each map is handed out once.
+# maps come from the pool's own random stream, so with a pool the map no longer follows the env's reset seed
+class MapPool:
+    def __init__(self, size = 8, seed = None, start = True):
+        self.__queue = queue.Queue(maxsize=size)
+        self.__rng = np.random.default_rng(seed)
+        self.__stop_event = threading.Event()
+        self.__worker = None
+        self.__put_timeout = 0.25
+
+        if start:
+            self.start()
+
+    def start (self):
+        if self.__worker is None or not self.__worker.is_alive():
+            self.__stop_event.clear()
+            self.__worker = threading.Thread(target=self.__fill, name='lvps-map-pool', daemon=True)
+            self.__worker.start()
+
+    def stop (self):
+        self.__stop_event.set()
+        if self.__worker is not None:
+            self.__worker.join()
+            self.__worker = None
+
+    def is_running (self):
+        return self.__worker is not None and self.__worker.is_alive()
+
+    def get_num_ready (self):
+        return self.__queue.qsize()
+
+    # returns the next prepared map. If the worker isn't running, one is generated right away
+    def get (self, timeout = None):
+        if not self.is_running():
+            try:
+                return self.__queue.get_nowait()
+            except queue.Empty:
+                return PreparedMap.generate(self.__rng).prepare()
+
+        return self.__queue.get(timeout=timeout)
+
+    def __fill (self):
+        while not self.__stop_event.is_set():
+            try:
+                prepared_map = PreparedMap.generate(self.__rng).prepare()
+            except Exception:
+                logging.getLogger(__name__).exception("Map pool failed to prepare a map")
+                continue
+
+            # wait for room, but keep an eye out for stop
+            while not self.__stop_event.is_set():
+                try:
+                    self.__queue.put(prepared_map, timeout=self.__put_timeout)
+                    break
+                except queue.Full:
+                    pass
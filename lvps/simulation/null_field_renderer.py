@@ -0,0 +1,22 @@
+# stands in for a FieldRenderer / FieldRasterizer where nothing is ever drawn (forked simulations, etc).
+# agents keep reporting their state to it, it just isn't kept. The map scaler is still handed out, since
+# the simulation uses it for visibility checks
+
+class NullFieldRenderer:
+    def __init__(self, map_scaler):
+        self.__map_scaler = map_scaler
+
+    def get_map_scaler (self):
+        return self.__map_scaler
+
+    def update_agent_state (self, agent_id, position_history, look_history):
+        pass
+
+    def update_search_state (self, agent_id, target_type, x, y):
+        pass
+
+    def save_field_image (self, image_file, add_game_state = True, agent_id = None, other_agents_visible = True, width_inches = 4, height_inches = 4, dpi = 100):
+        pass
+
+    def render_field_image_to_array (self, add_game_state = True, agent_id = None, other_agents_visible = True, width_inches = 4, height_inches = 4, dpi = 100):
+        return None
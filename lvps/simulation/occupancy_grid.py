@@ -0,0 +1,169 @@
+import math
+import numpy as np
+
+# bit layers of each occupancy grid cell
+class OccupancyLayers:
+    InBounds = 1 # cell is inside the boundaries, further than the margin from the edge
+    Obstacle = 2 # cell is inside an obstacle, further than the margin from its edges
+    DeadSpot = 4 # cell touches a dead spot
+    NearBoundary = 8 # cell is within the margin of the boundary edge
+    NearObstacle = 16 # cell is within the margin of an obstacle edge
+
+    Clear = InBounds
+
+# rasterized version of a field map, built once per map, so point and path checks are array lookups
+# instead of walks over the map geometry.
+# Since the map checks take the agent's path width into account, every cell within the margin of an
+# edge is flagged as 'near' that edge. The grid gives a definite answer everywhere else, and returns None
+# for near cells, in which case the caller has to ask the FieldMap itself.
+class OccupancyGrid:
+    def __init__(self, boundaries, obstacles, dead_spots, cell_size = 2.0, margin = 0.0):
+        self.__cell_size = cell_size
+        self.__margin = margin
+        self.__boundaries = boundaries
+
+        # the raster covers everything within the margin of the boundaries, anything outside it is out of bounds
+        xmin, ymin, xmax, ymax = boundaries
+        self.__origin_x = xmin - margin - cell_size
+        self.__origin_y = ymin - margin - cell_size
+        num_cols = int(math.ceil((xmax + margin + cell_size - self.__origin_x) / cell_size))
+        num_rows = int(math.ceil((ymax + margin + cell_size - self.__origin_y) / cell_size))
+        self.__cells = np.zeros((num_rows, num_cols), dtype=np.uint8)
+
+        self.__add_rect(boundaries, OccupancyLayers.InBounds, OccupancyLayers.NearBoundary)
+        for o in obstacles:
+            self.__add_rect(o, OccupancyLayers.Obstacle, OccupancyLayers.NearObstacle)
+        for ds in dead_spots:
+            r0, r1, c0, c1 = self.__get_touching_cells(*ds)
+            self.__cells[r0:r1, c0:c1] |= OccupancyLayers.DeadSpot
+
+    # rebuilds a grid from previously rasterized cells (get_cells / get_origin of an earlier grid), without redrawing it.
+    # the cells array is used as is, so it can be a read only memory mapped array
+    @staticmethod
+    def from_cells (boundaries, cells, origin, cell_size, margin):
+        grid = OccupancyGrid.__new__(OccupancyGrid)
+        grid.__cell_size = cell_size
+        grid.__margin = margin
+        grid.__boundaries = tuple(boundaries)
+        grid.__origin_x, grid.__origin_y = origin
+        grid.__cells = cells
+        return grid
+
+    @staticmethod
+    def from_map_dict (map_dict, cell_size = 2.0, margin = 0.0):
+        b = map_dict['boundaries']
+        return OccupancyGrid(
+            boundaries=(b['xmin'], b['ymin'], b['xmax'], b['ymax']),
+            obstacles=OccupancyGrid.__get_rects(map_dict, 'obstacles'),
+            dead_spots=OccupancyGrid.__get_rects(map_dict, 'dead_spots'),
+            cell_size=cell_size,
+            margin=margin)
+
+    @staticmethod
+    def __get_rects (map_dict, key):
+        rects = []
+        if key in map_dict and map_dict[key] is not None:
+            for rect_id in map_dict[key]:
+                r = map_dict[key][rect_id]
+                rects.append((r['xmin'], r['ymin'], r['xmax'], r['ymax']))
+        return rects
+
+    def get_cells (self):
+        return self.__cells
+
+    def get_cell_size (self):
+        return self.__cell_size
+
+    def get_margin (self):
+        return self.__margin
+
+    def get_origin (self):
+        return self.__origin_x, self.__origin_y
+
+    def get_boundaries (self):
+        return self.__boundaries
+
+    # flags every cell fully inside the rect (shrunk by the margin) with the core layer,
+    # and every other cell within the margin of the rect with the near layer
+    def __add_rect (self, rect, core_layer, near_layer):
+        xmin, ymin, xmax, ymax = rect
+        m = self.__margin
+
+        r0, r1, c0, c1 = self.__get_touching_cells(xmin - m, ymin - m, xmax + m, ymax + m)
+        self.__cells[r0:r1, c0:c1] |= near_layer
+
+        r0, r1, c0, c1 = self.__get_contained_cells(xmin + m, ymin + m, xmax - m, ymax - m)
+        if r0 < r1 and c0 < c1:
+            self.__cells[r0:r1, c0:c1] |= core_layer
+            self.__cells[r0:r1, c0:c1] &= ~np.uint8(near_layer)
+
+    def __clip_rows (self, r):
+        return max(0, min(self.__cells.shape[0], r))
+
+    def __clip_cols (self, c):
+        return max(0, min(self.__cells.shape[1], c))
+
+    # cell index ranges (row start, row end, col start, col end) of cells that touch the given rect
+    def __get_touching_cells (self, xmin, ymin, xmax, ymax):
+        cs = self.__cell_size
+        return (
+            self.__clip_rows(int(math.floor((ymin - self.__origin_y) / cs))),
+            self.__clip_rows(int(math.floor((ymax - self.__origin_y) / cs)) + 1),
+            self.__clip_cols(int(math.floor((xmin - self.__origin_x) / cs))),
+            self.__clip_cols(int(math.floor((xmax - self.__origin_x) / cs)) + 1))
+
+    # cell index ranges of cells that are completely inside the given rect
+    def __get_contained_cells (self, xmin, ymin, xmax, ymax):
+        cs = self.__cell_size
+        return (
+            self.__clip_rows(int(math.ceil((ymin - self.__origin_y) / cs))),
+            self.__clip_rows(int(math.floor((ymax - self.__origin_y) / cs))),
+            self.__clip_cols(int(math.ceil((xmin - self.__origin_x) / cs))),
+            self.__clip_cols(int(math.floor((xmax - self.__origin_x) / cs))))
+
+    # returns the flags of the cell holding the given coords (0 if outside the raster)
+    def get_flags (self, x, y):
+        row = int(math.floor((y - self.__origin_y) / self.__cell_size))
+        col = int(math.floor((x - self.__origin_x) / self.__cell_size))
+        if row < 0 or col < 0 or row >= self.__cells.shape[0] or col >= self.__cells.shape[1]:
+            return 0
+        return int(self.__cells[row, col])
+
+    # vectorized get_flags
+    def sample (self, xs, ys):
+        rows = np.floor((np.asarray(ys, dtype=np.float64) - self.__origin_y) / self.__cell_size).astype(np.int64)
+        cols = np.floor((np.asarray(xs, dtype=np.float64) - self.__origin_x) / self.__cell_size).astype(np.int64)
+        on_grid = (rows >= 0) & (cols >= 0) & (rows < self.__cells.shape[0]) & (cols < self.__cells.shape[1])
+        flags = np.zeros(rows.shape, dtype=np.uint8)
+        flags[on_grid] = self.__cells[rows[on_grid], cols[on_grid]]
+        return flags
+
+    # True / False, or None if the coords are too close to the boundary edge to tell
+    def is_in_bounds (self, x, y):
+        flags = self.get_flags(x, y)
+        if flags & OccupancyLayers.NearBoundary:
+            return None
+        return (flags & OccupancyLayers.InBounds) != 0
+
+    # True / False, or None if the coords are too close to an obstacle edge to tell
+    def is_blocked (self, x, y):
+        flags = self.get_flags(x, y)
+        if flags & OccupancyLayers.NearObstacle:
+            return None
+        return (flags & OccupancyLayers.Obstacle) != 0
+
+    # False if the coords are definitely not in a dead spot. Dead spots can depend on heading, so
+    # True only means the map has to be asked
+    def may_be_in_dead_spot (self, x, y):
+        return (self.get_flags(x, y) & OccupancyLayers.DeadSpot) != 0
+
+    # True if every cell along the path is clear, in bounds and away from any edge. None otherwise,
+    # meaning the map has to decide
+    def is_path_clear (self, start_x, start_y, end_x, end_y):
+        length = math.sqrt((end_x - start_x)**2 + (end_y - start_y)**2)
+        num_samples = max(2, int(math.ceil(length / (self.__cell_size / 2))) + 1)
+        fractions = np.linspace(0.0, 1.0, num_samples)
+        flags = self.sample(start_x + (end_x - start_x) * fractions, start_y + (end_y - start_y) * fractions)
+        if np.all(flags == OccupancyLayers.Clear):
+            return True
+        return None
@@ -7,6 +7,11 @@ class SimEventType:
 class SimEventSubscriptions:
     def __init__(self):
         self.__subscriptions = {}
+        self.__enabled = True
+
+    # while disabled, nobody is notified of anything
+    def set_enabled (self, enabled):
+        self.__enabled = enabled
 
     def add_subscription (self, event_type, listener):
         if event_type not in [SimEventType.AgentMoved, SimEventType.AgentLooked, SimEventType.AgentRotated, SimEventType.TargetFound]:
@@ -17,6 +22,6 @@ class SimEventSubscriptions:
         self.__subscriptions[event_type].append(listener)
 
     def notify_subscribers (self, event_type, event_details):
-        if event_type in self.__subscriptions:
+        if self.__enabled and event_type in self.__subscriptions:
             for s in self.__subscriptions[event_type]:
                 s.handle_event(event_type, event_details)
\ No newline at end of file
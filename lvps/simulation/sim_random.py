@@ -0,0 +1,52 @@
+import math
+import numpy as np
+
+# random number stream owned by a single simulation environment, so simulations running side by side
+# don't share (or disturb) the process wide random state, and a seeded simulation always plays out the same.
+# uniform samples are drawn from the numpy generator a block at a time, individual draws just step through the block
+
+class SimRandom:
+    def __init__(self, seed = None, block_size = 1024):
+        self.__generator = np.random.default_rng(seed)
+        self.__block_size = block_size
+        self.__block = None
+        self.__position = block_size
+
+    # everything needed to continue the stream exactly where it is (generator state, and the current block)
+    def get_state (self):
+        return {
+            'bit_generator':self.__generator.bit_generator.state,
+            'block_size':self.__block_size,
+            'block':None if self.__block is None else self.__block.copy(),
+            'position':self.__position
+        }
+
+    def set_state (self, state):
+        self.__generator.bit_generator.state = state['bit_generator']
+        self.__block_size = state['block_size']
+        self.__block = None if state['block'] is None else np.array(state['block'], dtype=np.float64)
+        self.__position = state['position']
+
+    # the underlying generator, for anything that needs more than the draws below (map generation, etc)
+    def get_generator (self):
+        return self.__generator
+
+    # returns a float in [0, 1)
+    def uniform (self):
+        if self.__position >= self.__block_size:
+            self.__block = self.__generator.random(self.__block_size)
+            self.__position = 0
+
+        value = self.__block[self.__position]
+        self.__position += 1
+        return float(value)
+
+    # same contract as random.randrange(start, stop): an int in [start, stop)
+    def randrange (self, start, stop):
+        if stop <= start:
+            raise ValueError(f"empty range for randrange ({start}, {stop})")
+        return start + int(math.floor(self.uniform() * (stop - start)))
+
+    # returns one of the given options, with equal probability
+    def choice (self, options):
+        return options[int(math.floor(self.uniform() * len(options)))]
@@ -0,0 +1,101 @@
+import io
+import json
+import numpy as np
+from lvps.simulation.lvps_sim_environment import LvpsSimEnvironment
+from lvps.simulation.simulated_agent import SimulatedAgent
+from lvps.simulation.null_field_renderer import NullFieldRenderer
+
+# saves a whole simulation (map, occupancy grid, random stream, targets, found reports, agents and their histories)
+# to a snapshot, and restores it, to pause and resume long runs or to start many workers from the same point.
+#
+# a snapshot is a compressed .npz: 'meta' holds the state as json (utf-8 bytes), and every numpy array in the state
+# (occupancy cells, random block, agent histories) is stored as an array of its own, referenced from the json.
+# renderers, event listeners and trajectory recorders are not part of a snapshot, the caller hands a field renderer
+# to the restored simulation (the agents bring it up to date)
+
+class SimSnapshotFormat:
+    Version = 1
+    MetaKey = 'meta'
+    ArrayRefKey = '__array__'
+
+class SimSnapshot:
+    # file is a file name or a writable binary file
+    @staticmethod
+    def save (lvps_env : LvpsSimEnvironment, file):
+        arrays = {}
+        meta = {
+            'version':SimSnapshotFormat.Version,
+            'state':SimSnapshot.__extract_arrays(lvps_env.get_state(), arrays)
+        }
+        arrays[SimSnapshotFormat.MetaKey] = np.frombuffer(json.dumps(meta, default=SimSnapshot.__to_json).encode('utf-8'), dtype=np.uint8)
+
+        if isinstance(file, str):
+            # a file name would get .npz appended by numpy
+            with open(file, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+        else:
+            np.savez_compressed(file, **arrays)
+
+    # file is a file name or a readable binary file. Without a field renderer, agents get a NullFieldRenderer
+    @staticmethod
+    def load (file, field_renderer = None):
+        with np.load(file, allow_pickle=False) as snapshot:
+            meta = json.loads(snapshot[SimSnapshotFormat.MetaKey].tobytes().decode('utf-8'))
+            if meta['version'] != SimSnapshotFormat.Version:
+                raise ValueError(f"Unsupported simulation snapshot version: {meta['version']}")
+            state = SimSnapshot.__insert_arrays(meta['state'], snapshot)
+
+        lvps_env = LvpsSimEnvironment.from_state(state)
+        if field_renderer is None:
+            field_renderer = NullFieldRenderer(lvps_env.get_field_image_scaler())
+
+        for agent_state in state['agents']:
+            agent = SimulatedAgent.from_state(agent_state, lvps_env, field_renderer)
+            x, y, heading = agent_state['pose']
+            lvps_env.add_agent(agent, x, y, heading)
+
+        targets = lvps_env.get_targets()
+        for target_id, (agent_id, x, y) in lvps_env.get_found_reports().items():
+            field_renderer.update_search_state(agent_id, targets[target_id]['type'], x, y)
+
+        return lvps_env
+
+    # the snapshot as bytes, to hand to other processes
+    @staticmethod
+    def to_bytes (lvps_env : LvpsSimEnvironment):
+        buffer = io.BytesIO()
+        SimSnapshot.save(lvps_env, buffer)
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_bytes (snapshot_bytes, field_renderer = None):
+        return SimSnapshot.load(io.BytesIO(snapshot_bytes), field_renderer=field_renderer)
+
+    # replaces every array in the state with a reference, collecting the arrays by name
+    @staticmethod
+    def __extract_arrays (value, arrays):
+        if isinstance(value, np.ndarray):
+            name = f'array_{len(arrays)}'
+            arrays[name] = value
+            return {SimSnapshotFormat.ArrayRefKey:name}
+        if isinstance(value, dict):
+            return {k:SimSnapshot.__extract_arrays(v, arrays) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [SimSnapshot.__extract_arrays(v, arrays) for v in value]
+        return value
+
+    @staticmethod
+    def __insert_arrays (value, snapshot):
+        if isinstance(value, dict):
+            if SimSnapshotFormat.ArrayRefKey in value:
+                return snapshot[value[SimSnapshotFormat.ArrayRefKey]]
+            return {k:SimSnapshot.__insert_arrays(v, snapshot) for k, v in value.items()}
+        if isinstance(value, list):
+            return [SimSnapshot.__insert_arrays(v, snapshot) for v in value]
+        return value
+
+    @staticmethod
+    def __to_json (value):
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Can't snapshot value of type {type(value)}")
@@ -1,5 +1,4 @@
 import math
-import random
 import mesa
 import logging
 #from .field_guide import FieldGuide
@@ -58,6 +57,60 @@ class SimulatedAgent:
 
         self.__position_history = []
 
+    # a copy of this agent, for a forked simulation (see LvpsSimEnvironment.fork)
+    def fork (self, lvps_env, field_renderer):
+        forked = SimulatedAgent(
+            agent_id=self.__agent_id,
+            agent_type=self.__agent_type,
+            field_renderer=field_renderer,
+            lvps_env=lvps_env,
+            initial_x=self.__lvps_x,
+            initial_y=self.__lvps_y,
+            initial_heading=self.__lvps_heading,
+            initial_confidence=self.__lvps_confidence)
+
+        forked.__total_distance_traveled = self.__total_distance_traveled
+        forked.__last_photo_x = self.__last_photo_x
+        forked.__last_photo_y = self.__last_photo_y
+        forked.__last_photo_heading = self.__last_photo_heading
+        forked.__look_history = list(self.__look_history)
+        forked.__position_history = list(self.__position_history)
+        return forked
+
+    # this agent's state as plain values and numpy arrays, for a snapshot (see SimSnapshot)
+    def get_state (self):
+        return {
+            'agent_id':self.__agent_id,
+            'agent_type':self.__agent_type,
+            'estimated_pose':[self.__lvps_x, self.__lvps_y, self.__lvps_heading, self.__lvps_confidence],
+            'total_distance_traveled':self.__total_distance_traveled,
+            'last_photo':[self.__last_photo_x, self.__last_photo_y, self.__last_photo_heading],
+            'look_history':np.array(self.__look_history, dtype=np.float64).reshape((-1, 6)),
+            'position_history':np.array([p[:3] for p in self.__position_history], dtype=np.float64).reshape((-1, 3)),
+            'position_confidences':[p[3] for p in self.__position_history]
+        }
+
+    # rebuilds an agent from get_state, in the (restored) simulation, and brings the field renderer up to date with it
+    @staticmethod
+    def from_state (state, lvps_env, field_renderer):
+        est_x, est_y, est_heading, est_confidence = state['estimated_pose']
+        agent = SimulatedAgent(
+            agent_id=state['agent_id'],
+            agent_type=state['agent_type'],
+            field_renderer=field_renderer,
+            lvps_env=lvps_env,
+            initial_x=est_x,
+            initial_y=est_y,
+            initial_heading=est_heading,
+            initial_confidence=est_confidence)
+
+        agent.__total_distance_traveled = state['total_distance_traveled']
+        agent.__last_photo_x, agent.__last_photo_y, agent.__last_photo_heading = state['last_photo']
+        agent.__look_history = [tuple(float(v) for v in look) for look in state['look_history']]
+        agent.__position_history = [(float(p[0]), float(p[1]), float(p[2]), state['position_confidences'][i]) for i, p in enumerate(state['position_history'])]
+        agent.__update_agent_rendering()
+        return agent
+
     def get_look_history (self):
         return self.__look_history
 
@@ -126,12 +179,12 @@ class SimulatedAgent:
 
     def is_out_of_bounds (self):
         if self.__lvps_x is not None and self.__lvps_y is not None:
-            return not self.__lvps_env.get_map().is_in_bounds(self.__lvps_x, self.__lvps_y, self.get_path_width())
+            return not self.__lvps_env.is_in_bounds(self.__lvps_x, self.__lvps_y, self.get_path_width())
         return False
 
     def is_in_obstacle (self):
         if self.__lvps_x is not None and self.__lvps_y is not None:
-            blocked, obstacle_id = self.__lvps_env.get_map().is_blocked(self.__lvps_x, self.__lvps_y, self.get_path_width())
+            blocked, obstacle_id = self.__lvps_env.is_blocked(self.__lvps_x, self.__lvps_y, self.get_path_width())
             return blocked
         return False
 
@@ -174,12 +227,12 @@ class SimulatedAgent:
             move_methods.append(self.__lvps_env.strafe_right)
             move_methods.append(self.__lvps_env.strafe_right)
 
-        selected_move = np.random.choice(move_methods)
+        selected_move = self.__lvps_env.get_random().choice(move_methods)
         success = selected_move(self.__agent_id, self.get_short_distance())
 
         # choose a random rotation
         rotations = [-45.0, -33.0, -15.0, 0, 15.0, 33.0, 45.0]
-        success = success or self.__lvps_env.rotate(self.__agent_id, np.random.choice(rotations))
+        success = success or self.__lvps_env.rotate(self.__agent_id, self.__lvps_env.get_random().choice(rotations))
 
         self.__lvps_x = None
         self.__lvps_y = None
@@ -193,6 +246,9 @@ class SimulatedAgent:
     def get_path_width (self):
         return AgentTypes.PathWidth[self.__agent_type]
 
+    def get_agent_type (self):
+        return self.__agent_type
+
     # driving methods, to be utilized by learning algorithm.
     # these are discrete, rather than providing continuous params
     def go_forward_short (self):
@@ -352,6 +408,7 @@ class SimulatedAgent:
         logging.getLogger(__name__).debug(f"Agent {self.__agent_id} Looking (facing {self.__lvps_heading})")
         self.__look_history.insert(0, (self.__lvps_x, self.__lvps_y, self.__lvps_heading, self.__relative_search_begin, self.__relative_search_end, self.get_sight_distance()))
         self.__update_agent_rendering()
+        self.__lvps_env.notify_agent_looked(self.__agent_id, self.__look_history[0])
 
         lvps_target_x, lvps_target_y, lvps_target_heading = self.get_nearest_visible_target_position()
 
@@ -368,7 +425,7 @@ class SimulatedAgent:
        
     # returns true if a "random" event should occur, based on the given occurance rate
     def __does_event_happen (self, occurance_rate):
-        return random.randrange(0,100) <= occurance_rate * 100
+        return self.__lvps_env.get_random().randrange(0,100) <= occurance_rate * 100
     
     def __get_distance(self, x1, y1, x2, y2):
         dx = x1 - x2
@@ -0,0 +1,118 @@
+import math
+
+# uniform grid spatial index over lvps coordinates. Items are bucketed by cell, so range and nearest
+# neighbor queries only look at the cells around the query point instead of every item.
+# insertion order is preserved within a cell, so query results are deterministic.
+
+class UniformGridIndex:
+    def __init__(self, cell_size):
+        self.__cell_size = cell_size
+        self.__cells = {} # (cell x, cell y) -> {item id: (x, y)}
+        self.__items = {} # item id -> (cell x, cell y)
+
+        # bounds of the cells ever occupied, limits how far an unbounded nearest search has to go
+        self.__min_cell = None
+        self.__max_cell = None
+
+    def __len__ (self):
+        return len(self.__items)
+
+    def __contains__ (self, item_id):
+        return item_id in self.__items
+
+    def __get_cell (self, x, y):
+        return (int(math.floor(x / self.__cell_size)), int(math.floor(y / self.__cell_size)))
+
+    def insert (self, item_id, x, y):
+        if item_id in self.__items:
+            self.remove(item_id)
+
+        cell = self.__get_cell(x, y)
+        if cell not in self.__cells:
+            self.__cells[cell] = {}
+        self.__cells[cell][item_id] = (x, y)
+        self.__items[item_id] = cell
+
+        if self.__min_cell is None:
+            self.__min_cell = cell
+            self.__max_cell = cell
+        else:
+            self.__min_cell = (min(self.__min_cell[0], cell[0]), min(self.__min_cell[1], cell[1]))
+            self.__max_cell = (max(self.__max_cell[0], cell[0]), max(self.__max_cell[1], cell[1]))
+
+    def move (self, item_id, x, y):
+        cell = self.__get_cell(x, y)
+        if self.__items.get(item_id) == cell:
+            self.__cells[cell][item_id] = (x, y)
+        else:
+            self.insert(item_id, x, y)
+
+    def remove (self, item_id):
+        cell = self.__items.pop(item_id)
+        del self.__cells[cell][item_id]
+        if len(self.__cells[cell]) == 0:
+            del self.__cells[cell]
+
+    # returns (id, distance) of every item within the given distance, nearest first
+    def query_radius (self, x, y, radius):
+        found = []
+        min_cx, min_cy = self.__get_cell(x - radius, y - radius)
+        max_cx, max_cy = self.__get_cell(x + radius, y + radius)
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                if (cx, cy) in self.__cells:
+                    for item_id, (item_x, item_y) in self.__cells[(cx, cy)].items():
+                        dist = math.sqrt((item_x - x)**2 + (item_y - y)**2)
+                        if dist <= radius:
+                            found.append((item_id, dist))
+
+        found.sort(key=lambda f: f[1])
+        return found
+
+    # returns (id, distance) of the item nearest the given coords, or (None, None) if there is none
+    # within max_distance. exclude_id allows searching around an item without finding itself
+    def nearest (self, x, y, max_distance = None, exclude_id = None):
+        if len(self.__items) == 0:
+            return None, None
+
+        center_cx, center_cy = self.__get_cell(x, y)
+        max_ring = max(
+            abs(center_cx - self.__min_cell[0]), abs(center_cx - self.__max_cell[0]),
+            abs(center_cy - self.__min_cell[1]), abs(center_cy - self.__max_cell[1]))
+        if max_distance is not None:
+            max_ring = min(max_ring, int(math.ceil(max_distance / self.__cell_size)) + 1)
+
+        closest_id = None
+        closest_dist = None
+        for ring in range(max_ring + 1):
+            for cell in self.__get_ring_cells(center_cx, center_cy, ring):
+                if cell in self.__cells:
+                    for item_id, (item_x, item_y) in self.__cells[cell].items():
+                        if item_id == exclude_id:
+                            continue
+                        dist = math.sqrt((item_x - x)**2 + (item_y - y)**2)
+                        if closest_dist is None or dist < closest_dist:
+                            closest_id = item_id
+                            closest_dist = dist
+
+            # anything in the rings further out is at least this far away
+            if closest_dist is not None and closest_dist <= ring * self.__cell_size:
+                break
+
+        if closest_dist is None or (max_distance is not None and closest_dist > max_distance):
+            return None, None
+        return closest_id, closest_dist
+
+    def __get_ring_cells (self, center_cx, center_cy, ring):
+        if ring == 0:
+            return [(center_cx, center_cy)]
+
+        cells = []
+        for cx in range(center_cx - ring, center_cx + ring + 1):
+            cells.append((cx, center_cy - ring))
+            cells.append((cx, center_cy + ring))
+        for cy in range(center_cy - ring + 1, center_cy + ring):
+            cells.append((center_cx - ring, cy))
+            cells.append((center_cx + ring, cy))
+        return cells
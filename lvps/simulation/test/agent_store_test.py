@@ -0,0 +1,51 @@
+import unittest
+from lvps.simulation.agent_store import AgentStore
+
+class FakeAgent:
+    def __init__(self, agent_id):
+        self.__agent_id = agent_id
+
+    def get_id (self):
+        return self.__agent_id
+
+class AgentStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # small capacity, so adding agents grows the arrays
+        self.__store = AgentStore(initial_capacity=2)
+        self.__agents = [FakeAgent(f'agent_{i}') for i in range(5)]
+        for i, agent in enumerate(self.__agents):
+            self.__store.add(agent, x=float(i), y=float(-i), heading=float(10 * i), path_width=4 + i)
+        return super().setUp()
+
+    def test_add_grows (self):
+        self.assertEqual(len(self.__store), 5)
+        self.assertEqual(self.__store.get_agent_ids(), [a.get_id() for a in self.__agents])
+        self.assertEqual(list(self.__store.get_x()), [0.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(list(self.__store.get_y()), [0.0, -1.0, -2.0, -3.0, -4.0])
+        self.assertEqual(list(self.__store.get_headings()), [0.0, 10.0, 20.0, 30.0, 40.0])
+        for i, agent in enumerate(self.__agents):
+            self.assertIn(agent.get_id(), self.__store)
+            self.assertIs(self.__store.get_agent(agent.get_id()), agent)
+            self.assertEqual(self.__store.get_pose(agent.get_id()), (float(i), float(-i), float(10 * i)))
+            self.assertEqual(self.__store.get_path_width(agent.get_id()), 4 + i)
+        self.assertNotIn('agent_5', self.__store)
+
+    def test_readding_keeps_slot (self):
+        replacement = FakeAgent('agent_2')
+        slot = self.__store.add(replacement, x=7.0, y=8.0, heading=9.0, path_width=6)
+
+        self.assertEqual(slot, 2)
+        self.assertEqual(len(self.__store), 5)
+        self.assertIs(self.__store.get_agent('agent_2'), replacement)
+        self.assertEqual(self.__store.get_pose('agent_2'), (7.0, 8.0, 9.0))
+        self.assertEqual(self.__store.get_path_width('agent_2'), 6)
+
+    def test_set_pose (self):
+        self.__store.set_pose('agent_3', 50.0, 60.0, -90.0)
+        self.__store.set_heading('agent_1', 45.0)
+
+        self.assertEqual(self.__store.get_pose('agent_3'), (50.0, 60.0, -90.0))
+        self.assertEqual(self.__store.get_pose('agent_1'), (1.0, -1.0, 45.0))
+        self.assertEqual(self.__store.get_x()[3], 50.0)
+        # other slots are untouched
+        self.assertEqual(self.__store.get_pose('agent_4'), (4.0, -4.0, 40.0))
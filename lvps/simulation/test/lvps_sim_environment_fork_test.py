@@ -0,0 +1,68 @@
+import unittest
+from lvps.simulation.lvps_sim_environment import LvpsSimEnvironment
+from lvps.simulation.simulated_agent import SimulatedAgent
+from lvps.simulation.agent_types import AgentTypes
+from lvps.simulation.null_field_renderer import NullFieldRenderer
+from lvps.simulation.sim_events import SimEventType
+
+class EventCounter:
+    def __init__(self):
+        self.count = 0
+
+    def handle_event (self, event_type, event_details):
+        self.count += 1
+
+class LvpsSimEnvironmentForkTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__env = LvpsSimEnvironment(seed=3)
+        self.__agent = SimulatedAgent(
+            agent_id=1,
+            agent_type=AgentTypes.MecCar,
+            field_renderer=NullFieldRenderer(self.__env.get_field_image_scaler()),
+            lvps_env=self.__env)
+        x, y = self.__env.get_random_traversable_coords()
+        self.__env.add_agent(self.__agent, x, y, 0.0)
+
+        self.__target_x, self.__target_y = self.__env.get_random_traversable_coords()
+        self.__env.add_target(target_id=2, target_name='coin_2', target_type='coin', target_x=self.__target_x, target_y=self.__target_y)
+
+        self.__moves = EventCounter()
+        self.__env.add_event_subscription(SimEventType.AgentMoved, self.__moves)
+        return super().setUp()
+
+    def test_fork_is_independent (self):
+        starting_pose = self.__env.get_agent_position(1)
+        forked = self.__env.fork(seed=5)
+        forked_agent = forked.get_agent(1)
+        self.assertIsNot(self.__agent, forked_agent)
+        self.assertEqual(starting_pose, forked.get_agent_position(1))
+
+        for _ in range(5):
+            forked_agent.estimate_position()
+            forked_agent.look()
+            forked_agent.go_forward_medium()
+
+        self.assertEqual(starting_pose, self.__env.get_agent_position(1))
+        self.assertNotEqual(starting_pose, forked.get_agent_position(1))
+        self.assertEqual(0, len(self.__agent.get_look_history()))
+        self.assertEqual(0, self.__moves.count)
+
+    def test_found_targets_stay_in_fork (self):
+        forked = self.__env.fork(seed=5)
+        forked.report_target_found(1, self.__target_x, self.__target_y)
+        self.assertEqual(1, forked.get_num_found_targets())
+        self.assertEqual(0, self.__env.get_num_found_targets())
+
+    def test_same_seed_same_rollout (self):
+        poses = []
+        for _ in range(2):
+            forked = self.__env.fork(seed=9)
+            agent = forked.get_agent(1)
+            for _ in range(5):
+                agent.go_forward_short()
+                agent.rotate_left_medium()
+            poses.append(forked.get_agent_position(1))
+        self.assertEqual(poses[0], poses[1])
+
+if __name__ == '__main__':
+    unittest.main()
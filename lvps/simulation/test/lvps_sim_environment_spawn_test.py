@@ -0,0 +1,39 @@
+import unittest
+from lvps.simulation.lvps_sim_environment import LvpsSimEnvironment
+from lvps.simulation.map_pool import PreparedMap
+
+class LvpsSimEnvironmentSpawnTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__map_dict = {
+            'shape':'rectangle',
+            'boundaries':{'xmin':-100.0, 'ymin':-100.0, 'xmax':100.0, 'ymax':100.0},
+            'landmarks':{},
+            'obstacles':{
+                'obstacle_0':{'xmin':20.0, 'ymin':20.0, 'xmax':60.0, 'ymax':60.0}
+            },
+            'dead_spots':{
+                'ds_0':{'xmin':-80.0, 'ymin':-80.0, 'xmax':0.0, 'ymax':0.0}
+            }
+        }
+        self.__env = LvpsSimEnvironment(seed=7, prepared_map=PreparedMap(self.__map_dict))
+        return super().setUp()
+
+    def __inside (self, x, y, rect):
+        return rect['xmin'] <= x <= rect['xmax'] and rect['ymin'] <= y <= rect['ymax']
+
+    def test_coords_can_land_in_dead_spots (self):
+        coords = [self.__env.get_random_traversable_coords() for _ in range(200)]
+
+        in_dead_spot = [c for c in coords if self.__inside(c[0], c[1], self.__map_dict['dead_spots']['ds_0'])]
+        self.assertGreater(len(in_dead_spot), 0)
+
+        for x, y in coords:
+            self.assertTrue(self.__inside(x, y, self.__map_dict['boundaries']))
+            self.assertFalse(self.__inside(x, y, self.__map_dict['obstacles']['obstacle_0']))
+
+    def test_coords_can_land_near_edges (self):
+        # the occupancy margin keeps the grid from answering near walls and obstacles, the map decides those
+        margin = PreparedMap.OccupancyMargin
+        coords = [self.__env.get_random_traversable_coords() for _ in range(400)]
+        near_wall = [c for c in coords if max(abs(c[0]), abs(c[1])) > 100.0 - margin]
+        self.assertGreater(len(near_wall), 0)
@@ -0,0 +1,80 @@
+import unittest
+import shutil
+import tempfile
+import numpy as np
+from lvps.simulation.map_corpus import MapCorpus, MapCorpusWriter
+from lvps.simulation.map_pool import PreparedMap
+from lvps.simulation.occupancy_grid import OccupancyGrid
+
+class MapCorpusTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.mkdtemp()
+
+        # rect ids as a generator or map file might name them, the corpus renames them in order
+        self.__map_dicts = []
+        for i in range(5):
+            size = 100.0 + 20 * i
+            self.__map_dicts.append({
+                'shape':'rectangle',
+                'boundaries':{'xmin':-size, 'ymin':-size / 2, 'xmax':size, 'ymax':size / 2},
+                'landmarks':{},
+                'obstacles':{f'box{j}':{'xmin':10.0 * j, 'ymin':-5.0, 'xmax':10.0 * j + 4.5, 'ymax':5.0} for j in range(i)},
+                'dead_spots':{'corner':{'xmin':-size + 1, 'ymin':-size / 2 + 1, 'xmax':-size + 12.25, 'ymax':-size / 2 + 8}}
+            })
+
+        with MapCorpusWriter(self.__dir, shard_size=2) as writer:
+            for i, map_dict in enumerate(self.__map_dicts):
+                self.assertEqual(i, writer.add(map_dict))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.__dir)
+        return super().tearDown()
+
+    def __renamed (self, map_dict):
+        return {
+            'shape':'rectangle',
+            'boundaries':map_dict['boundaries'],
+            'landmarks':{},
+            'obstacles':{f'obstacle_{i}':r for i, r in enumerate(map_dict['obstacles'].values())},
+            'dead_spots':{f'ds_{i}':r for i, r in enumerate(map_dict['dead_spots'].values())}
+        }
+
+    def test_maps_read_back (self):
+        corpus = MapCorpus(self.__dir)
+        self.assertEqual(5, len(corpus))
+
+        # read out of order, so shards are opened as they're needed
+        for i in [4, 0, 3, 1, 2]:
+            self.assertEqual(self.__renamed(self.__map_dicts[i]), corpus.get_map_dict(i))
+
+            expected = OccupancyGrid.from_map_dict(self.__map_dicts[i], cell_size=corpus.get_cell_size(), margin=corpus.get_margin())
+            grid = corpus.get_prepared_map(i).get_occupancy_grid()
+            self.assertTrue(np.array_equal(expected.get_cells(), grid.get_cells()))
+            self.assertEqual(expected.get_origin(), grid.get_origin())
+            self.assertEqual(tuple(expected.get_boundaries()), tuple(grid.get_boundaries()))
+
+        with self.assertRaises(IndexError):
+            corpus.get_map_dict(5)
+
+    def test_get_wraps_around (self):
+        corpus = MapCorpus(self.__dir)
+        corpus.set_next_map(3)
+        boundaries = [corpus.get().get_map_dict()['boundaries']['xmax'] for _ in range(4)]
+        self.assertEqual([160.0, 180.0, 100.0, 120.0], boundaries)
+
+    def test_existing_corpus_and_landmarks_rejected (self):
+        with self.assertRaises(ValueError):
+            MapCorpusWriter(self.__dir)
+
+        other_dir = tempfile.mkdtemp()
+        try:
+            writer = MapCorpusWriter(other_dir)
+            with_landmarks = dict(self.__map_dicts[0], landmarks={'lm':{'x':0, 'y':0}})
+            with self.assertRaises(ValueError):
+                writer.add(with_landmarks)
+        finally:
+            shutil.rmtree(other_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import time
+from lvps.simulation.map_pool import MapPool, PreparedMap
+
+class MapPoolTest(unittest.TestCase):
+    def test_pool_refills (self):
+        pool = MapPool(size=2, seed=4)
+        try:
+            self.assertTrue(pool.is_running())
+
+            # more maps than the pool holds, so the worker has to keep up
+            maps = [pool.get(timeout=30) for _ in range(5)]
+            for prepared_map in maps:
+                self.assertIsInstance(prepared_map, PreparedMap)
+                self.assertIn('boundaries', prepared_map.get_map_dict())
+            self.assertEqual(5, len(set(id(m) for m in maps)))
+
+            # the queue is bounded, the worker waits for room
+            deadline = time.time() + 30
+            while pool.get_num_ready() < 2 and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(2, pool.get_num_ready())
+        finally:
+            pool.stop()
+
+        self.assertFalse(pool.is_running())
+
+    def test_get_without_worker (self):
+        pool = MapPool(size=2, seed=4, start=False)
+        self.assertFalse(pool.is_running())
+        self.assertIsInstance(pool.get(), PreparedMap)
+        pool.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from lvps.simulation.occupancy_grid import OccupancyGrid
+import numpy as np
+
+class OccupancyGridTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__margin = 14.0
+        self.__boundaries = (-100, -80, 120, 90)
+        self.__obstacles = [(-60, -50, -10, 10), (30, 20, 80, 85)]
+        self.__dead_spots = [(50, -70, 70, -40)]
+        self.__grid = OccupancyGrid(
+            boundaries=self.__boundaries,
+            obstacles=self.__obstacles,
+            dead_spots=self.__dead_spots,
+            cell_size=2.0,
+            margin=self.__margin)
+        return super().setUp()
+
+    def __distance_outside (self, rect, x, y):
+        xmin, ymin, xmax, ymax = rect
+        return np.hypot(max(xmin - x, 0, x - xmax), max(ymin - y, 0, y - ymax))
+
+    def __distance_inside (self, rect, x, y):
+        xmin, ymin, xmax, ymax = rect
+        return min(x - xmin, xmax - x, y - ymin, ymax - y)
+
+    def test_definite_answers_are_correct (self):
+        # anything the grid answers on its own has to hold for any path width within the margin
+        rng = np.random.default_rng(3)
+        for x, y in zip(rng.uniform(-140, 160, 3000), rng.uniform(-120, 130, 3000)):
+            in_bounds = self.__grid.is_in_bounds(x, y)
+            if in_bounds == True:
+                self.assertGreaterEqual(self.__distance_inside(self.__boundaries, x, y), self.__margin)
+            elif in_bounds == False:
+                self.assertGreaterEqual(self.__distance_outside(self.__boundaries, x, y), self.__margin)
+
+            blocked = self.__grid.is_blocked(x, y)
+            if blocked == True:
+                self.assertTrue(any([self.__distance_inside(o, x, y) >= self.__margin for o in self.__obstacles]))
+            elif blocked == False:
+                self.assertTrue(all([self.__distance_outside(o, x, y) >= self.__margin for o in self.__obstacles]))
+
+            if self.__distance_outside(self.__dead_spots[0], x, y) == 0:
+                self.assertTrue(self.__grid.may_be_in_dead_spot(x, y))
+
+    def test_open_field_is_decided_by_grid (self):
+        self.assertTrue(self.__grid.is_in_bounds(-80, 60))
+        self.assertFalse(self.__grid.is_blocked(-80, 60))
+        self.assertTrue(self.__grid.is_blocked(55, 55))
+        self.assertFalse(self.__grid.is_in_bounds(300, 300))
+        self.assertIsNone(self.__grid.is_in_bounds(-100, 0))
+        self.assertFalse(self.__grid.may_be_in_dead_spot(-80, 60))
+
+    def test_path_clear (self):
+        self.assertTrue(self.__grid.is_path_clear(-80, 60, -20, 60))
+        # through an obstacle, or close to its edge, has to be left to the map
+        self.assertIsNone(self.__grid.is_path_clear(-80, -20, 0, -20))
+        self.assertIsNone(self.__grid.is_path_clear(-80, 22, 10, 22))
+        self.assertIsNone(self.__grid.is_path_clear(-80, 60, -150, 60))
+
+    def test_from_map_dict (self):
+        map_dict = {
+            'shape':'rectangle',
+            'boundaries':{'xmin':-100, 'ymin':-80, 'xmax':120, 'ymax':90},
+            'landmarks':{},
+            'obstacles':{
+                'O1':{'xmin':-60, 'ymin':-50, 'xmax':-10, 'ymax':10},
+                'O2':{'xmin':30, 'ymin':20, 'xmax':80, 'ymax':85}
+            },
+            'dead_spots':{
+                'D1':{'xmin':50, 'ymin':-70, 'xmax':70, 'ymax':-40}
+            }
+        }
+        from_dict = OccupancyGrid.from_map_dict(map_dict, cell_size=2.0, margin=self.__margin)
+        self.assertTrue(np.array_equal(self.__grid.get_cells(), from_dict.get_cells()))
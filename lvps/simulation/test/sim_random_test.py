@@ -0,0 +1,29 @@
+import unittest
+from lvps.simulation.sim_random import SimRandom
+
+class SimRandomTest(unittest.TestCase):
+    def test_same_seed_same_stream (self):
+        a = SimRandom(seed=12)
+        b = SimRandom(seed=12)
+        self.assertEqual([a.randrange(0, 100) for _ in range(50)], [b.randrange(0, 100) for _ in range(50)])
+
+    def test_state_continues_stream (self):
+        random = SimRandom(seed=4, block_size=16)
+        for _ in range(20):
+            random.uniform()
+        state = random.get_state()
+        expected = [random.uniform() for _ in range(40)]
+
+        restored = SimRandom(seed=99, block_size=16)
+        restored.set_state(state)
+        self.assertEqual(expected, [restored.uniform() for _ in range(40)])
+        self.assertEqual(random.get_generator().random(), restored.get_generator().random())
+
+    def test_state_before_first_draw (self):
+        random = SimRandom(seed=4)
+        restored = SimRandom()
+        restored.set_state(random.get_state())
+        self.assertEqual(random.choice(['a', 'b', 'c', 'd']), restored.choice(['a', 'b', 'c', 'd']))
+
+if __name__ == '__main__':
+    unittest.main()
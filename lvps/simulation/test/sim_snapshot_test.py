@@ -0,0 +1,68 @@
+import unittest
+import os
+import shutil
+import tempfile
+from lvps.simulation.lvps_sim_environment import LvpsSimEnvironment
+from lvps.simulation.simulated_agent import SimulatedAgent
+from lvps.simulation.agent_types import AgentTypes
+from lvps.simulation.null_field_renderer import NullFieldRenderer
+from lvps.simulation.sim_snapshot import SimSnapshot
+
+class SimSnapshotTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.mkdtemp()
+        self.__env = LvpsSimEnvironment(seed=21)
+        renderer = NullFieldRenderer(self.__env.get_field_image_scaler())
+        for agent_id in [1, 2]:
+            agent = SimulatedAgent(agent_id=agent_id, agent_type=AgentTypes.Tank, field_renderer=renderer, lvps_env=self.__env)
+            x, y = self.__env.get_random_traversable_coords()
+            self.__env.add_agent(agent, x, y, 45.0)
+
+        self.__target_x, self.__target_y = self.__env.get_random_traversable_coords()
+        self.__env.add_target(target_id=3, target_name='coin_3', target_type='coin', target_x=self.__target_x, target_y=self.__target_y)
+        self.__env.report_target_found(1, self.__target_x, self.__target_y)
+
+        for _ in range(4):
+            for agent_id in [1, 2]:
+                agent = self.__env.get_agent(agent_id)
+                agent.estimate_position()
+                agent.look()
+                agent.go_forward_short()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.__dir)
+        return super().tearDown()
+
+    def __play (self, lvps_env):
+        poses = []
+        for _ in range(5):
+            for agent_id in [1, 2]:
+                agent = lvps_env.get_agent(agent_id)
+                agent.estimate_position()
+                agent.rotate_right_medium()
+                agent.go_forward_medium()
+                poses.append(lvps_env.get_agent_position(agent_id))
+        return poses
+
+    def test_restore_from_file (self):
+        file_name = os.path.join(self.__dir, 'sim.snapshot')
+        SimSnapshot.save(self.__env, file_name)
+        restored = SimSnapshot.load(file_name)
+
+        self.assertEqual(self.__env.get_map_dict(), restored.get_map_dict())
+        self.assertEqual(1, restored.get_num_found_targets())
+        for agent_id in [1, 2]:
+            self.assertEqual(self.__env.get_agent_position(agent_id), restored.get_agent_position(agent_id))
+            self.assertEqual(self.__env.get_agent(agent_id).get_look_history(), restored.get_agent(agent_id).get_look_history())
+            self.assertEqual(self.__env.get_agent(agent_id).get_last_coords_and_heading(), restored.get_agent(agent_id).get_last_coords_and_heading())
+
+        # both continue the same way, random stream included
+        self.assertEqual(self.__play(self.__env), self.__play(restored))
+
+    def test_restore_from_bytes (self):
+        restored = SimSnapshot.from_bytes(SimSnapshot.to_bytes(self.__env))
+        self.assertEqual(self.__play(self.__env), self.__play(restored))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from lvps.simulation.spatial_index import UniformGridIndex
+import numpy as np
+import math
+
+class UniformGridIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(1)
+        self.__points = {}
+        self.__index = UniformGridIndex(cell_size=25.0)
+        for i in range(200):
+            self.__points[i] = (rng.uniform(-300, 300), rng.uniform(-300, 300))
+            self.__index.insert(i, *self.__points[i])
+
+        # move some of them, so cell changes are covered
+        for i in range(0, 200, 3):
+            self.__points[i] = (rng.uniform(-300, 300), rng.uniform(-300, 300))
+            self.__index.move(i, *self.__points[i])
+        return super().setUp()
+
+    def test_query_radius (self):
+        for x, y, radius in [(0, 0, 45), (-290, 280, 80), (500, 500, 10), (12.5, -12.5, 0)]:
+            expected = sorted([i for i, p in self.__points.items() if math.dist(p, (x, y)) <= radius])
+            found = sorted([i for i, _ in self.__index.query_radius(x, y, radius)])
+            self.assertEqual(expected, found)
+
+    def test_nearest (self):
+        for x, y in [(0, 0), (-400, 400), (299, -299)]:
+            distances = {i:math.dist(p, (x, y)) for i, p in self.__points.items()}
+            nearest_id, nearest_dist = self.__index.nearest(x, y)
+            self.assertAlmostEqual(min(distances.values()), nearest_dist)
+            self.assertAlmostEqual(distances[nearest_id], nearest_dist)
+
+    def test_nearest_within_distance (self):
+        distances = {i:math.dist(p, (0, 0)) for i, p in self.__points.items()}
+        closest = min(distances.values())
+        self.assertEqual((None, None), self.__index.nearest(0, 0, max_distance=closest * 0.99))
+        self.assertIsNotNone(self.__index.nearest(0, 0, max_distance=closest)[0])
+
+    def test_nearest_excludes_self (self):
+        nearest_id, _ = self.__index.nearest(*self.__points[5], exclude_id=5)
+        self.assertNotEqual(5, nearest_id)
+
+    def test_remove (self):
+        self.__index.remove(7)
+        self.assertNotIn(7, self.__index)
+        self.assertNotIn(7, [i for i, _ in self.__index.query_radius(*self.__points[7], 1.0)])
@@ -0,0 +1,114 @@
+import unittest
+import shutil
+import tempfile
+import numpy as np
+from lvps.simulation.trajectory_recorder import TrajectoryRecorder, TrajectoryReplayer, TrajectoryRecordType
+from lvps.simulation.sim_events import SimEventType
+
+# action codes, the recorder stores whatever it is given
+GoForward, Look, ReportFound = 5, 1, 3
+
+# stands in for LvpsSimEnvironment, with just what the recorder reads
+class FakeSimEnvironment:
+    def __init__(self):
+        self.__poses = {0:[-50.0, -50.0, 0.0], 1:[60.0, 40.0, 90.0]}
+        self.__listeners = {}
+
+    def get_map_dict (self):
+        return {
+            'shape':'rectangle',
+            'boundaries':{'xmin':-100, 'ymin':-100, 'xmax':100, 'ymax':100},
+            'landmarks':{},
+            'obstacles':{'o1':{'xmin':10, 'ymin':10, 'xmax':30, 'ymax':30}},
+            'dead_spots':{'d1':{'xmin':-80, 'ymin':50, 'xmax':-60, 'ymax':70}}
+        }
+
+    def get_targets (self):
+        return {7:{'id':7, 'name':'coin_7', 'type':'coin', 'x':-20.0, 'y':75.0}}
+
+    def get_agent_positions (self):
+        agent_ids = list(self.__poses.keys())
+        return agent_ids, np.array([p[0] for p in self.__poses.values()]), np.array([p[1] for p in self.__poses.values()]), np.array([p[2] for p in self.__poses.values()])
+
+    def get_agent_position (self, agent_id):
+        return tuple(self.__poses[agent_id]) + (None,)
+
+    def add_event_subscription (self, event_type, listener):
+        self.__listeners.setdefault(event_type, []).append(listener)
+
+    def move (self, agent_id, x, y, heading):
+        self.__poses[agent_id] = [x, y, heading]
+
+    def notify (self, event_type, details):
+        for l in self.__listeners.get(event_type, []):
+            l.handle_event(event_type, details)
+
+class TrajectoryRecorderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.mkdtemp()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.__dir)
+        return super().tearDown()
+
+    def __record_episode (self, recorder):
+        env = FakeSimEnvironment()
+        recorder.begin_episode(env)
+
+        env.move(0, -40.0, -50.0, 0.0)
+        recorder.record_action(0, GoForward, True)
+
+        env.notify(SimEventType.AgentLooked, {'agent_id':1, 'look':(60.0, 40.0, 90.0, -150, 150, 35.0)})
+        recorder.record_action(1, Look, True)
+
+        env.notify(SimEventType.TargetFound, {'agent_id':1, 'target_id':7, 'x':-21.0, 'y':74.0})
+        recorder.record_action(1, ReportFound, True)
+
+    def test_record_and_replay (self):
+        recorder = TrajectoryRecorder(self.__dir, buffer_size=4)
+        self.__record_episode(recorder)
+        self.__record_episode(recorder)
+        recorder.close()
+
+        replayer = TrajectoryReplayer(self.__dir)
+        self.assertEqual(2, replayer.get_num_episodes())
+        self.assertEqual(3, replayer.get_num_steps(1))
+
+        map_dict = replayer.get_map_dict(0)
+        self.assertEqual({'xmin':-100.0, 'ymin':-100.0, 'xmax':100.0, 'ymax':100.0}, map_dict['boundaries'])
+        self.assertEqual(1, len(map_dict['obstacles']))
+        self.assertEqual(1, len(map_dict['dead_spots']))
+
+        actions = replayer.get_actions(0)
+        self.assertEqual([GoForward, Look, ReportFound], list(actions['code']))
+        self.assertEqual([0, 1, 1], list(actions['agent_id']))
+        self.assertAlmostEqual(-40.0, actions[0]['values'][0])
+
+        states = list(replayer.iterate_states(0))
+        self.assertEqual([0, 1, 2, 3], [s[0] for s in states])
+        _, positions, looks, found_targets = states[-1]
+        self.assertEqual((-40.0, -50.0, 0.0), positions[0])
+        self.assertEqual([(60.0, 40.0, 90.0, -150.0, 150.0, 35.0)], looks[1])
+        self.assertEqual([(1, 'coin', -21.0, 74.0)], found_targets)
+
+        records = replayer.get_records(0)
+        self.assertEqual(2, records[records['type'] == TrajectoryRecordType.Look][0]['step'])
+
+    def test_render_frames (self):
+        recorder = TrajectoryRecorder(self.__dir)
+        self.__record_episode(recorder)
+        recorder.close()
+
+        replayer = TrajectoryReplayer(self.__dir)
+        frames = dict(replayer.iterate_frames(0, width_inches=2, height_inches=2))
+        self.assertEqual([0, 1, 2, 3], sorted(frames.keys()))
+        self.assertEqual((200, 200, 1), frames[0].shape)
+        self.assertFalse(np.array_equal(frames[0], frames[1]))
+
+        self.assertTrue(np.array_equal(frames[2], replayer.render_frame(0, 2, width_inches=2, height_inches=2)))
+        with self.assertRaises(ValueError):
+            replayer.render_frame(0, 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,258 @@
+import glob
+import json
+import logging
+import os
+import uuid
+import numpy as np
+from lvps.simulation.sim_events import SimEventType
+from lvps.gym.field_rasterizer import FieldRasterizer
+
+# compact logs of simulation episodes, a few dozen bytes per action instead of an image.
+#
+# a trajectory dir holds a trajectory.json and any number of chunk files, named {writer}_{chunk}.bin, so several
+# environments (processes) can record into the same dir. A chunk is a plain array of fixed size records (RecordDtype),
+# and every episode is contained in a single chunk. An episode is written as:
+#   EpisodeStart               code = episode number (per writer)
+#   MapBoundary                values = xmin, ymin, xmax, ymax
+#   MapObstacle / MapDeadSpot  values = xmin, ymin, xmax, ymax, one record each
+#   Target                     code = target id, values = x, y
+#   AgentPlaced                agent_id, values = x, y, heading (true pose)
+# then, as the simulation runs:
+#   Look                       agent_id, values = x, y, heading, relative begin, relative end, distance
+#   TargetFound                agent_id, code = target id, values = reported x, y
+#   Action                     agent_id, code = action, success, values = x, y, heading (true pose after the action)
+# every record after the placements carries the number of the action it happened during (starting at 1)
+
+class TrajectoryRecordType:
+    EpisodeStart = 0
+    MapBoundary = 1
+    MapObstacle = 2
+    MapDeadSpot = 3
+    Target = 4
+    AgentPlaced = 5
+    Look = 6
+    TargetFound = 7
+    Action = 8
+
+class TrajectoryFormat:
+    Version = 1
+    IndexFile = 'trajectory.json'
+    RecordDtype = np.dtype([
+        ('type', np.uint8),
+        ('step', np.uint32),
+        ('agent_id', np.int32),
+        ('code', np.int32),
+        ('success', np.uint8),
+        ('values', np.float32, (6,))
+    ])
+
+# subscribes to a simulation's events and writes its episodes out.
+# LvpsSimEnvironment.set_trajectory_recorder starts an episode, and record_action is called once per action taken
+class TrajectoryRecorder:
+    def __init__(self, trajectory_dir, chunk_size = 100000, buffer_size = 1024):
+        os.makedirs(trajectory_dir, exist_ok=True)
+        index_file = os.path.join(trajectory_dir, TrajectoryFormat.IndexFile)
+        if os.path.exists(index_file):
+            with open(index_file, 'r') as f:
+                if json.load(f)['version'] != TrajectoryFormat.Version:
+                    raise ValueError(f"Trajectory dir {trajectory_dir} holds a different trajectory format version")
+        else:
+            with open(index_file, 'w') as f:
+                json.dump({'version':TrajectoryFormat.Version, 'record_size':TrajectoryFormat.RecordDtype.itemsize}, f)
+
+        self.__trajectory_dir = trajectory_dir
+        self.__writer_id = uuid.uuid4().hex[:12]
+        self.__chunk_size = chunk_size
+        self.__chunk_num = 0
+        self.__chunk_records = 0
+        self.__file = None
+
+        self.__buffer = np.zeros(buffer_size, dtype=TrajectoryFormat.RecordDtype)
+        self.__buffered = 0
+
+        self.__lvps_env = None
+        self.__episode_num = -1
+        self.__step = 0
+
+    def get_num_episodes (self):
+        return self.__episode_num + 1
+
+    # starts a new episode for the (fully set up) simulation: its map, targets and agent placements are written first
+    def begin_episode (self, lvps_env):
+        self.flush()
+        # episodes stay within one chunk, so a new chunk is only started between them
+        if self.__file is not None and self.__chunk_records >= self.__chunk_size:
+            self.__file.close()
+            self.__file = None
+            self.__chunk_num += 1
+            self.__chunk_records = 0
+
+        subscribe = self.__lvps_env is not lvps_env
+        self.__lvps_env = lvps_env
+        self.__episode_num += 1
+        self.__step = 0
+
+        self.__append(TrajectoryRecordType.EpisodeStart, code=self.__episode_num)
+
+        map_dict = lvps_env.get_map_dict()
+        b = map_dict['boundaries']
+        self.__append(TrajectoryRecordType.MapBoundary, values=(b['xmin'], b['ymin'], b['xmax'], b['ymax']))
+        for key, record_type in [('obstacles', TrajectoryRecordType.MapObstacle), ('dead_spots', TrajectoryRecordType.MapDeadSpot)]:
+            if key in map_dict and map_dict[key] is not None:
+                for r in map_dict[key].values():
+                    self.__append(record_type, values=(r['xmin'], r['ymin'], r['xmax'], r['ymax']))
+
+        for target_id, target in lvps_env.get_targets().items():
+            self.__append(TrajectoryRecordType.Target, code=target_id, values=(target['x'], target['y']))
+
+        agent_ids, xs, ys, headings = lvps_env.get_agent_positions()
+        for i, agent_id in enumerate(agent_ids):
+            self.__append(TrajectoryRecordType.AgentPlaced, agent_id=agent_id, values=(xs[i], ys[i], headings[i]))
+
+        if subscribe:
+            lvps_env.add_event_subscription(event_type=SimEventType.AgentLooked, listener=self)
+            lvps_env.add_event_subscription(event_type=SimEventType.TargetFound, listener=self)
+
+    def record_action (self, agent_id, action, success):
+        self.__step += 1
+        x, y, heading = self.__lvps_env.get_agent_position(agent_id)[:3]
+        self.__append(TrajectoryRecordType.Action, agent_id=agent_id, code=int(action), success=bool(success), values=(x, y, heading), step=self.__step)
+
+    def handle_event (self, event_type, event_details):
+        # events happen during the action that is recorded next
+        if event_type == SimEventType.AgentLooked:
+            self.__append(TrajectoryRecordType.Look, agent_id=event_details['agent_id'], values=event_details['look'], step=self.__step + 1)
+        elif event_type == SimEventType.TargetFound:
+            self.__append(TrajectoryRecordType.TargetFound, agent_id=event_details['agent_id'], code=event_details['target_id'], values=(event_details['x'], event_details['y']), step=self.__step + 1)
+
+    def __append (self, record_type, agent_id = -1, code = -1, success = False, values = (), step = 0):
+        record = self.__buffer[self.__buffered]
+        record['type'] = record_type
+        record['step'] = step
+        record['agent_id'] = agent_id
+        record['code'] = code
+        record['success'] = success
+        record['values'] = np.nan
+        record['values'][:len(values)] = [np.nan if v is None else v for v in values]
+
+        self.__buffered += 1
+        if self.__buffered == len(self.__buffer):
+            self.flush()
+
+    def flush (self):
+        if self.__buffered == 0:
+            return
+        if self.__file is None:
+            self.__file = open(os.path.join(self.__trajectory_dir, f'{self.__writer_id}_{self.__chunk_num:05d}.bin'), 'ab')
+        self.__file.write(self.__buffer[:self.__buffered].tobytes())
+        self.__chunk_records += self.__buffered
+        self.__buffered = 0
+
+    def close (self):
+        self.flush()
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+# reads the episodes in a trajectory dir, and draws any point of them again with a FieldRasterizer.
+# frames show every agent at its true pose, with the looks and found targets up to that point
+class TrajectoryReplayer:
+    def __init__(self, trajectory_dir, grayscale = True):
+        with open(os.path.join(trajectory_dir, TrajectoryFormat.IndexFile), 'r') as f:
+            index = json.load(f)
+        if index['version'] != TrajectoryFormat.Version:
+            raise ValueError(f"Unsupported trajectory format version: {index['version']}")
+
+        self.__grayscale = grayscale
+        self.__episodes = []
+        for chunk_file in sorted(glob.glob(os.path.join(trajectory_dir, '*.bin'))):
+            # a chunk still being written may end part way through a record, only whole records are read
+            num_records = os.path.getsize(chunk_file) // TrajectoryFormat.RecordDtype.itemsize
+            if num_records == 0:
+                continue
+            records = np.memmap(chunk_file, dtype=TrajectoryFormat.RecordDtype, mode='r', shape=(num_records,))
+            starts = np.flatnonzero(records['type'] == TrajectoryRecordType.EpisodeStart)
+            ends = np.append(starts[1:], len(records))
+            self.__episodes.extend([(records, start, end) for start, end in zip(starts, ends)])
+
+        logging.getLogger(__name__).info(f"Found {len(self.__episodes)} recorded episode(s) in {trajectory_dir}")
+
+    def get_num_episodes (self):
+        return len(self.__episodes)
+
+    # all records of the episode, as a structured array (view into the memory mapped chunk)
+    def get_records (self, episode_num):
+        records, start, end = self.__episodes[episode_num]
+        return records[start:end]
+
+    # the action records of the episode: agent_id, code (action), success, values[:, :3] (pose after the action)
+    def get_actions (self, episode_num):
+        records = self.get_records(episode_num)
+        return records[records['type'] == TrajectoryRecordType.Action]
+
+    def get_num_steps (self, episode_num):
+        return len(self.get_actions(episode_num))
+
+    def get_map_dict (self, episode_num):
+        records = self.get_records(episode_num)
+        def rects (record_type, prefix):
+            return {f'{prefix}_{i}':self.__to_rect(r['values']) for i, r in enumerate(records[records['type'] == record_type])}
+
+        return {
+            'shape':'rectangle',
+            'boundaries':self.__to_rect(records[records['type'] == TrajectoryRecordType.MapBoundary][0]['values']),
+            'landmarks':{},
+            'obstacles':rects(TrajectoryRecordType.MapObstacle, 'obstacle'),
+            'dead_spots':rects(TrajectoryRecordType.MapDeadSpot, 'ds')
+        }
+
+    def __to_rect (self, values):
+        return {'xmin':float(values[0]), 'ymin':float(values[1]), 'xmax':float(values[2]), 'ymax':float(values[3])}
+
+    # yields (step, positions, looks, found targets) after each step of the episode, step 0 being the starting positions
+    def iterate_states (self, episode_num):
+        positions = {}
+        looks = {}
+        found_targets = []
+
+        step = 0
+        for r in self.get_records(episode_num):
+            if r['step'] > step:
+                yield step, positions, looks, found_targets
+                step = int(r['step'])
+
+            record_type = r['type']
+            values = r['values']
+            if record_type == TrajectoryRecordType.AgentPlaced or record_type == TrajectoryRecordType.Action:
+                positions[int(r['agent_id'])] = (float(values[0]), float(values[1]), float(values[2]))
+            elif record_type == TrajectoryRecordType.Look:
+                looks.setdefault(int(r['agent_id']), []).append(tuple(None if np.isnan(v) else float(v) for v in values))
+            elif record_type == TrajectoryRecordType.TargetFound:
+                found_targets.append((int(r['agent_id']), 'coin', float(values[0]), float(values[1])))
+
+        yield step, positions, looks, found_targets
+
+    # yields (step, frame) for the given steps of the episode (all of them by default)
+    def iterate_frames (self, episode_num, steps = None, agent_id = None, width_inches = 4, height_inches = 4, dpi = 100):
+        renderer = FieldRasterizer(self.get_map_dict(episode_num), grayscale=self.__grayscale)
+        steps = None if steps is None else set(steps)
+
+        for step, positions, looks, found_targets in self.iterate_states(episode_num):
+            if steps is not None and step not in steps:
+                continue
+
+            # the renderer expects new look lists whenever they change
+            renderer.set_render_state(positions, {aid:list(l) for aid, l in looks.items()}, list(found_targets))
+            yield step, renderer.render_field_image_to_array(
+                add_game_state=True,
+                agent_id=agent_id,
+                other_agents_visible=True,
+                width_inches=width_inches,
+                height_inches=height_inches,
+                dpi=dpi)
+
+    # draws the episode as it was after the given step
+    def render_frame (self, episode_num, step, agent_id = None, width_inches = 4, height_inches = 4, dpi = 100):
+        for _, frame in self.iterate_frames(episode_num, steps=[step], agent_id=agent_id, width_inches=width_inches, height_inches=height_inches, dpi=dpi):
+            return frame
+        raise ValueError(f"Episode {episode_num} has no step {step}")
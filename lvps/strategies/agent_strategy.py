@@ -7,6 +7,11 @@ class AgentStrategy:
     def __init__(self):
         pass
 
+    # called for each agent that is about to choose an action, before any agent acts in the step,
+    # so strategies can get ready together (batched model inference, etc)
+    def prepare_next_action (self, lvps_agent, step_count):
+        pass
+
     def get_next_action (self, lvps_agent, last_action, last_action_result, step_count):
         logging.getLogger(__name__).error("AgentStrategy should be subclassed!")
         return AgentActions.Nothing, {}
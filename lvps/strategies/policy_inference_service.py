@@ -0,0 +1,59 @@
+import logging
+import numpy as np
+from stable_baselines3 import DQN
+
+# holds one loaded model for any number of RL driven agents, and runs their observations through it together.
+# agents submit an observation, then ask for their action. The first ask runs a single forward pass over every
+# observation submitted so far, and the rest of the agents pick their actions up from that batch.
+#
+# get_shared returns one service per model file (and device) in the process, so the model is only loaded once
+
+class PolicyInferenceService:
+    __shared = {}
+
+    def __init__(self, model_file, model_class = DQN, device = 'cpu'):
+        self.__model = model_class.load(model_file, device=device)
+        self.__pending = {}
+        self.__actions = {}
+        self.__num_batches = 0
+        self.__num_inferences = 0
+
+    @staticmethod
+    def get_shared (model_file, model_class = DQN, device = 'cpu'):
+        key = (model_file, model_class, device)
+        if key not in PolicyInferenceService.__shared:
+            logging.getLogger(__name__).info(f"Loading shared policy from {model_file}")
+            PolicyInferenceService.__shared[key] = PolicyInferenceService(model_file, model_class=model_class, device=device)
+        return PolicyInferenceService.__shared[key]
+
+    # queues an observation for the agent, replacing any action it hasn't picked up yet
+    def submit (self, agent_id, observation):
+        self.__actions.pop(agent_id, None)
+        self.__pending[agent_id] = observation
+
+    # returns the agent's action for its submitted observation, running the pending batch if needed
+    def get_action (self, agent_id):
+        if agent_id not in self.__actions:
+            if agent_id not in self.__pending:
+                raise ValueError(f"No observation was submitted for agent {agent_id}")
+            self.__run_batch()
+        return self.__actions.pop(agent_id)
+
+    def get_num_batches (self):
+        return self.__num_batches
+
+    def get_num_inferences (self):
+        return self.__num_inferences
+
+    def __run_batch (self):
+        agent_ids = list(self.__pending.keys())
+        observations = np.stack([self.__pending[a] for a in agent_ids])
+        self.__pending = {}
+
+        actions, _ = self.__model.predict(observations, deterministic=True)
+        for agent_id, action in zip(agent_ids, np.asarray(actions).reshape(-1)):
+            self.__actions[agent_id] = int(action)
+
+        self.__num_batches += 1
+        self.__num_inferences += len(agent_ids)
+        logging.getLogger(__name__).debug(f"Ran batch of {len(agent_ids)} observation(s), {self.__num_inferences} over {self.__num_batches} batches so far")
@@ -2,15 +2,19 @@ import math
 import logging
 from lvps.strategies.agent_actions import AgentActions
 from lvps.strategies.agent_strategy import AgentStrategy
-import numpy as np
+from lvps.visual.frame_capture import FrameCapture
 from trig.trig import BasicTrigCalc
 
 # this is a truly random strategy. it is aweful, but calls all the same methods that will be used by training
 
 class RandomSearchStrategy(AgentStrategy):
-    def __init__(self):
+    # render_field saves each decision's field image, through frame_capture (by default the process wide FrameCapture)
+    def __init__(self, render_field = True, frame_capture : FrameCapture = None):
         super().__init__()
         self.__trig_calc = BasicTrigCalc()
+        self.__frame_capture = None
+        if render_field:
+            self.__frame_capture = frame_capture if frame_capture is not None else FrameCapture.get_shared()
 
     def get_next_action (self, lvps_agent, last_action, last_action_result, step_count):
         action_params = {
@@ -20,11 +24,14 @@ class RandomSearchStrategy(AgentStrategy):
         lvps_x, lvps_y, lvps_heading, lvps_confidence = lvps_agent.get_last_coords_and_heading()
         obstacle_bound = lvps_agent.is_in_obstacle()
 
-        lvps_agent.get_field_renderer().save_field_image(
-            f'/tmp/lvpssim/agent_{lvps_agent.get_id()}_step_{step_count}.png',
-            add_game_state=True,
-            agent_id=lvps_agent.get_id(),
-            other_agents_visible=True)
+        if self.__frame_capture is not None:
+            self.__frame_capture.capture_simulation(
+                lvps_agent.get_lvps_environment(),
+                f'agent_{lvps_agent.get_id()}_step_{step_count}.png',
+                step_count=step_count,
+                add_game_state=True,
+                agent_id=lvps_agent.get_id(),
+                other_agents_visible=True)
 
         # if we don't know where we are, need to figure that out
         if (lvps_x is None or lvps_y is None) and last_action != AgentActions.EstimatePosition:
@@ -66,4 +73,4 @@ class RandomSearchStrategy(AgentStrategy):
             AgentActions.Nothing
         ]
 
-        return np.random.choice(action_space), action_params
+        return lvps_agent.get_lvps_environment().get_random().choice(action_space), action_params
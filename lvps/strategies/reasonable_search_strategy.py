@@ -2,17 +2,21 @@ import math
 import logging
 from lvps.strategies.agent_actions import AgentActions
 from lvps.strategies.agent_strategy import AgentStrategy
+from lvps.visual.frame_capture import FrameCapture
 from lvps.simulation.simulated_agent import SimulatedAgent
 from trig.trig import BasicTrigCalc
-import numpy as np
 
 class ReasonableSearchStrategy(AgentStrategy):
-    def __init__(self, render_field = True):
+    # render_field saves each decision's field image, through frame_capture (by default the process wide FrameCapture)
+    def __init__(self, render_field = True, frame_capture : FrameCapture = None):
         super().__init__()
         self.__consecutive_position_fails = 0
         self.__max_position_fails = 2
         self.__trig_calc = BasicTrigCalc()
         self.__render_field = render_field
+        self.__frame_capture = None
+        if render_field:
+            self.__frame_capture = frame_capture if frame_capture is not None else FrameCapture.get_shared()
 
     def get_next_action (self, lvps_agent : SimulatedAgent, last_action, last_action_result, step_count):
         action_params = {
@@ -24,8 +28,10 @@ class ReasonableSearchStrategy(AgentStrategy):
 
         # render the field as an image
         if self.__render_field:
-            lvps_agent.get_field_renderer().save_field_image(
-                f'/tmp/lvpssim/agent_{lvps_agent.get_id()}_step_{step_count}.png',
+            self.__frame_capture.capture_simulation(
+                lvps_agent.get_lvps_environment(),
+                f'agent_{lvps_agent.get_id()}_step_{step_count}.png',
+                step_count=step_count,
                 add_game_state=True,
                 agent_id=lvps_agent.get_id(),
                 other_agents_visible=True,
@@ -95,7 +101,7 @@ class ReasonableSearchStrategy(AgentStrategy):
     
     def __queue_go_to_safe_place (self, lvps_agent : SimulatedAgent, action_params):
         logging.getLogger(__name__).info(f"Going to safe place")
-        safe_x, safe_y = lvps_agent.get_field_renderer().get_map_scaler().get_random_traversable_coords()
+        safe_x, safe_y = lvps_agent.get_lvps_environment().get_random_traversable_coords()
         action_params['x'] = safe_x
         action_params['y'] = safe_y
         return AgentActions.Go, action_params
@@ -115,8 +121,9 @@ class ReasonableSearchStrategy(AgentStrategy):
         while (chosen_x is None and attempts < max_attempts):
             attempts += 1
             # travel the sight distance
-            desired_slope = np.random.choice([-4, -2, -1, -1.5, -.5, 0, .5, 1, 1.5, 2, 4])
-            desired_direction = np.random.choice([-1, 1]) # x go left or right
+            # drawn from the simulation's random stream, so seeded simulations play out the same
+            desired_slope = lvps_agent.get_lvps_environment().get_random().choice([-4, -2, -1, -1.5, -.5, 0, .5, 1, 1.5, 2, 4])
+            desired_direction = lvps_agent.get_lvps_environment().get_random().choice([-1, 1]) # x go left or right
 
             x_travel = desired_direction * lvps_agent.get_sight_distance()
             far_x = lvps_x + x_travel
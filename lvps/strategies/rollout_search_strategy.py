@@ -0,0 +1,129 @@
+import logging
+import numpy as np
+from .agent_actions import AgentActions
+from .agent_strategy import AgentStrategy
+from lvps.simulation.simulated_agent import SimulatedAgent
+from lvps.gym.lvps_gym_rewards import LvpsGymRewards
+
+# plans by looking ahead: every trainable action is tried in a number of forked simulations (see LvpsSimEnvironment.fork),
+# each followed by random actions for the rest of the rollout, and scored with the training rewards (LvpsGymRewards).
+# the action with the best average (discounted) return is taken.
+#
+# rollouts play out the way a training step does: position is refreshed after each action, and a successful photograph
+# is followed by a found report. Other agents stay where they are during a rollout
+class RolloutSearchStrategy(AgentStrategy):
+    # rollouts_per_action rollouts of rollout_depth actions are run for each candidate action on every decision
+    def __init__(self, rollouts_per_action = 16, rollout_depth = 6, gamma = 0.95, candidate_actions = None):
+        super().__init__()
+        if rollouts_per_action < 1 or rollout_depth < 1:
+            raise ValueError(f"Need at least one rollout of at least one action, got {rollouts_per_action} x {rollout_depth}")
+
+        self.__rollouts_per_action = rollouts_per_action
+        self.__rollout_depth = rollout_depth
+        self.__gamma = gamma
+        self.__candidate_actions = candidate_actions if candidate_actions is not None else list(range(AgentActions.NumTrainableActions))
+        self.__rollout_actions = list(range(AgentActions.NumTrainableActions))
+        self.__max_report_retries = 5
+
+    def get_next_action (self, lvps_agent : SimulatedAgent, last_action, last_action_result, step_count):
+        # a successful photograph is reported right away, the way training does it
+        if last_action == AgentActions.Photograph and last_action_result == True:
+            return AgentActions.ReportFound, {}
+
+        # every candidate action needs a known position to be worth anything
+        lvps_x, lvps_y, _, _ = lvps_agent.get_last_coords_and_heading()
+        if lvps_x is None or lvps_y is None:
+            return AgentActions.EstimatePosition, {}
+
+        # a single draw from the simulation seeds all of this decision's rollouts, so seeded simulations still play out the same
+        rng = np.random.default_rng(lvps_agent.get_lvps_environment().get_random().randrange(0, 2**31 - 1))
+
+        returns = self.evaluate_actions(lvps_agent, rng)
+        selected_action = max(self.__candidate_actions, key=lambda a: returns[a])
+        logging.getLogger(__name__).info(f"Agent {lvps_agent.get_id()} selected {AgentActions.Names[selected_action]}, expected return {round(returns[selected_action], 2)}")
+
+        return selected_action, {}
+
+    # returns the average rollout return of each candidate action, by action
+    def evaluate_actions (self, lvps_agent : SimulatedAgent, rng):
+        lvps_env = lvps_agent.get_lvps_environment()
+        returns = {}
+        for action in self.__candidate_actions:
+            total = 0.0
+            for _ in range(self.__rollouts_per_action):
+                forked_env = lvps_env.fork(seed=int(rng.integers(0, 2**63 - 1)))
+                total += self.__rollout(forked_env, forked_env.get_agent(lvps_agent.get_id()), action, rng)
+            returns[action] = total / self.__rollouts_per_action
+        return returns
+
+    def __rollout (self, lvps_env, agent : SimulatedAgent, first_action, rng):
+        rewards = LvpsGymRewards(agent)
+        num_targets = len(lvps_env.get_targets())
+
+        total = 0.0
+        discount = 1.0
+        action = first_action
+        for _ in range(self.__rollout_depth):
+            reward, done = self.__step(lvps_env, agent, rewards, action, num_targets)
+            total += discount * reward
+            discount *= self.__gamma
+            if done:
+                break
+            action = self.__rollout_actions[int(rng.integers(0, len(self.__rollout_actions)))]
+        return total
+
+    # one action, rewarded the way LvpsGymEnv.step rewards it. returns reward, and whether the rollout is over
+    def __step (self, lvps_env, agent : SimulatedAgent, rewards : LvpsGymRewards, action, num_targets):
+        if agent.get_last_coords_and_heading()[0] is None:
+            agent.estimate_position()
+
+        beginning_targets_found = lvps_env.get_num_found_targets()
+        beg_nearest_id, beg_nearest_dist, _ = agent.get_nearest_unfound_target_distance()
+
+        action_result = self.__perform(agent, action)
+        if action == AgentActions.Photograph and action_result == True:
+            retries = 0
+            while agent.report_found() == False and retries < self.__max_report_retries:
+                retries += 1
+
+        agent.estimate_position()
+        end_nearest_id, end_nearest_dist, _ = agent.get_nearest_unfound_target_distance()
+        targets_found = lvps_env.get_num_found_targets()
+
+        reward = rewards.calculate_reward(
+            action_performed=action,
+            action_result=action_result,
+            target_found=targets_found > beginning_targets_found,
+            target_found_by_this_agent=targets_found > beginning_targets_found,
+            all_targets_found=targets_found == num_targets,
+            beg_nearest_unfound_target_id=beg_nearest_id,
+            beg_nearest_unfound_target_dist=beg_nearest_dist,
+            end_nearest_unfound_target_id=end_nearest_id,
+            end_nearest_unfound_target_dist=end_nearest_dist,
+            is_within_photo_distance=end_nearest_dist is not None and end_nearest_dist <= agent.get_photo_distance()
+        )
+
+        done = targets_found == num_targets or agent.is_out_of_bounds() or agent.is_in_obstacle()
+        return reward, done
+
+    def __perform (self, agent : SimulatedAgent, action):
+        action_map = {
+            AgentActions.Look : agent.look,
+            AgentActions.Photograph : agent.photograph,
+            AgentActions.Nothing : agent.do_nothing,
+            AgentActions.ReportFound : agent.report_found,
+            AgentActions.EstimatePosition : agent.estimate_position,
+            AgentActions.GoForwardShort : agent.go_forward_short,
+            AgentActions.GoForwardMedium : agent.go_forward_medium,
+            AgentActions.GoForwardFar : agent.go_forward_far,
+            AgentActions.GoReverseShort : agent.go_reverse_short,
+            AgentActions.GoReverseMedium : agent.go_reverse_medium,
+            AgentActions.GoReverseFar : agent.go_reverse_far,
+            AgentActions.RotateLeftSmall : agent.rotate_left_small,
+            AgentActions.RotateLeftMedium : agent.rotate_left_medium,
+            AgentActions.RotateLeftBig : agent.rotate_left_big,
+            AgentActions.RotateRightSmall : agent.rotate_right_small,
+            AgentActions.RotateRightMedium : agent.rotate_right_medium,
+            AgentActions.RotateRightBig : agent.rotate_right_big
+        }
+        return action_map[action]()
@@ -0,0 +1,181 @@
+import os
+import gymnasium
+import numpy as np
+from PIL import Image, GifImagePlugin
+
+# records field images into a single animated GIF or WebP, rather than a PNG per step.
+# GIF frames are encoded and appended to the file as they come in, so memory use doesn't grow with the episode.
+# Pillow has no way to append to a WebP, so WebP frames are kept (after skipping and downscaling) and encoded on close.
+#
+# every_n_frames keeps every Nth frame handed in, scale shrinks each kept frame (0.5 = half width and height)
+
+class EpisodeRecorder:
+    Formats = ['gif', 'webp']
+
+    def __init__(self, file_name, every_n_frames = 1, scale = 1.0, frame_duration_ms = 100, loop = 0, image_format = None):
+        if image_format is None:
+            image_format = os.path.splitext(file_name)[1].lstrip('.').lower()
+        if image_format not in EpisodeRecorder.Formats:
+            raise ValueError(f"Unsupported episode recording format: {image_format}")
+        if every_n_frames < 1:
+            raise ValueError(f"every_n_frames must be at least 1, got {every_n_frames}")
+        if scale <= 0 or scale > 1:
+            raise ValueError(f"scale must be within (0, 1], got {scale}")
+
+        self.__file_name = file_name
+        self.__format = image_format
+        self.__every_n_frames = every_n_frames
+        self.__scale = scale
+        self.__frame_duration_ms = frame_duration_ms
+        self.__loop = loop
+
+        self.__file = None
+        self.__frame_size = None
+        self.__webp_frames = []
+        self.__num_offered = 0
+        self.__num_frames = 0
+        self.__closed = False
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_file_name (self):
+        return self.__file_name
+
+    def get_num_frames (self):
+        return self.__num_frames
+
+    # adds a rendered field image (h, w, 1 or 3 uint8), unless it's one of the skipped frames
+    def add_frame (self, image):
+        if self.__closed:
+            raise ValueError(f"Episode recording {self.__file_name} is already closed")
+
+        self.__num_offered += 1
+        if (self.__num_offered - 1) % self.__every_n_frames != 0:
+            return False
+
+        frame = self.__to_frame(image)
+        if self.__format == 'gif':
+            self.__append_gif_frame(frame)
+        else:
+            self.__webp_frames.append(frame)
+
+        self.__num_frames += 1
+        return True
+
+    def close (self):
+        if self.__closed:
+            return
+        self.__closed = True
+
+        if self.__format == 'gif':
+            if self.__file is not None:
+                self.__file.write(b';')
+                self.__file.close()
+        elif len(self.__webp_frames) > 0:
+            self.__webp_frames[0].save(
+                self.__file_name,
+                format='WEBP',
+                save_all=True,
+                append_images=self.__webp_frames[1:],
+                duration=self.__frame_duration_ms,
+                loop=self.__loop)
+            self.__webp_frames = []
+
+    def __to_frame (self, image):
+        image = np.asarray(image)
+        if image.ndim == 3 and image.shape[2] == 1:
+            image = image[:,:,0]
+        frame = Image.fromarray(image)
+
+        if self.__frame_size is None:
+            self.__frame_size = (max(1, round(frame.width * self.__scale)), max(1, round(frame.height * self.__scale)))
+        if frame.size != self.__frame_size:
+            frame = frame.resize(self.__frame_size, Image.Resampling.BOX)
+        return frame
+
+    def __append_gif_frame (self, frame):
+        # every frame shares the global palette, so color frames are all mapped onto the same fixed palette
+        if frame.mode != 'L':
+            frame = frame.convert('RGB').convert('P', palette=Image.Palette.WEB)
+
+        if self.__file is None:
+            self.__file = open(self.__file_name, 'wb')
+            header, _ = GifImagePlugin.getheader(frame, info={'loop':self.__loop, 'duration':self.__frame_duration_ms})
+            for chunk in header:
+                self.__file.write(chunk)
+
+        for chunk in GifImagePlugin.getdata(frame, duration=self.__frame_duration_ms):
+            self.__file.write(chunk)
+
+# records every episode of an LvpsGymEnv (the training agent's observations) to {output_dir}/{name_prefix}_{n}.{image_format}
+class RecordEpisodesWrapper(gymnasium.Wrapper):
+    def __init__(self, env, output_dir, name_prefix = 'episode', image_format = 'gif', every_n_frames = 1, scale = 1.0, frame_duration_ms = 100):
+        super().__init__(env)
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.__output_dir = output_dir
+        self.__name_prefix = name_prefix
+        self.__image_format = image_format
+        self.__every_n_frames = every_n_frames
+        self.__scale = scale
+        self.__frame_duration_ms = frame_duration_ms
+
+        self.__recorder = None
+        self.__episode_count = 0
+
+    def reset (self, **kwargs):
+        self.__close_recorder()
+        observation, info = self.env.reset(**kwargs)
+
+        self.__recorder = EpisodeRecorder(
+            os.path.join(self.__output_dir, f'{self.__name_prefix}_{self.__episode_count}.{self.__image_format}'),
+            every_n_frames=self.__every_n_frames,
+            scale=self.__scale,
+            frame_duration_ms=self.__frame_duration_ms)
+        self.__episode_count += 1
+        self.__recorder.add_frame(observation)
+
+        return observation, info
+
+    def step (self, action):
+        observation, reward, terminated, truncated, info = self.env.step(action)
+        if self.__recorder is not None:
+            self.__recorder.add_frame(observation)
+            if terminated or truncated:
+                self.__close_recorder()
+
+        return observation, reward, terminated, truncated, info
+
+    def close (self):
+        self.__close_recorder()
+        return super().close()
+
+    def __close_recorder (self):
+        if self.__recorder is not None:
+            self.__recorder.close()
+            self.__recorder = None
+
+# runs an AutonomousSearch (mesa model) for up to step_count steps, recording an overview of the field after each one
+def record_autonomous_search (search_model, file_name, step_count = 200, every_n_frames = 1, scale = 1.0, frame_duration_ms = 100, width_inches = 4, height_inches = 4, dpi = 100):
+    def render ():
+        return search_model.get_field_renderer().render_field_image_to_array(
+            add_game_state=True,
+            agent_id=None,
+            other_agents_visible=True,
+            width_inches=width_inches,
+            height_inches=height_inches,
+            dpi=dpi)
+
+    with EpisodeRecorder(file_name, every_n_frames=every_n_frames, scale=scale, frame_duration_ms=frame_duration_ms) as recorder:
+        recorder.add_frame(render())
+        for i in range(step_count):
+            if search_model.is_search_complete():
+                break
+            search_model.step()
+            recorder.add_frame(render())
+
+    return recorder
@@ -0,0 +1,169 @@
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+from lvps.gym.field_rasterizer import FieldRasterizer
+
+# writes debugging frames (field images) from a background thread, so saving them doesn't hold up the simulation.
+# capture_simulation only snapshots the simulation's render state on the caller's thread, the drawing (with the
+# thread's own FieldRasterizer per map), the PNG encoding and the file writes all happen on the thread, a batch at a time.
+# The queue is bounded, and when it is full new frames are dropped rather than waited on.
+# every_n_steps keeps only the frames of every Nth step.
+#
+# get_shared returns one capture for the process, writing to /tmp/lvpssim like the strategies always have,
+# keeping every SharedEveryNSteps-th step
+
+class FrameCapture:
+    DefaultOutputDir = '/tmp/lvpssim'
+    SharedEveryNSteps = 10
+    __shared = None
+
+    def __init__(self, output_dir = DefaultOutputDir, every_n_steps = 1, max_queued = 64, batch_size = 8, grayscale = True, start = True):
+        if every_n_steps < 1:
+            raise ValueError(f"every_n_steps must be at least 1, got {every_n_steps}")
+
+        self.__output_dir = output_dir
+        self.__every_n_steps = every_n_steps
+        self.__batch_size = batch_size
+        self.__grayscale = grayscale
+        self.__queue = queue.Queue(maxsize=max_queued)
+        self.__stop_event = threading.Event()
+        self.__worker = None
+        self.__get_timeout = 0.25
+
+        # only touched by the writer thread: map dict id -> (map dict, rasterizer)
+        self.__rasterizers = OrderedDict()
+        self.__max_cached_rasterizers = 4
+
+        self.__num_captures = 0
+        self.__num_written = 0
+        self.__num_dropped = 0
+
+        if start:
+            self.start()
+
+    @staticmethod
+    def get_shared ():
+        if FrameCapture.__shared is None:
+            FrameCapture.__shared = FrameCapture(every_n_steps=FrameCapture.SharedEveryNSteps)
+        return FrameCapture.__shared
+
+    def start (self):
+        if self.__worker is None or not self.__worker.is_alive():
+            self.__stop_event.clear()
+            self.__worker = threading.Thread(target=self.__write_frames, name='lvps-frame-capture', daemon=True)
+            self.__worker.start()
+
+    # stops the writer once everything already queued is written
+    def stop (self):
+        self.flush()
+        self.__stop_event.set()
+        if self.__worker is not None:
+            self.__worker.join()
+            self.__worker = None
+
+    # waits until every queued frame is written
+    def flush (self):
+        if self.__worker is not None and self.__worker.is_alive():
+            self.__queue.join()
+
+    def get_num_written (self):
+        return self.__num_written
+
+    def get_num_dropped (self):
+        return self.__num_dropped
+
+    # whether a frame for this step would be kept. With no step count, every call counts as a step
+    def is_capture_step (self, step_count = None):
+        if step_count is None:
+            step_count = self.__num_captures
+            self.__num_captures += 1
+        return step_count % self.__every_n_steps == 0
+
+    # snapshots the simulation's render state and queues it to be drawn, the way save_field_image would,
+    # to file_name (within the output dir). Nothing is snapshotted on steps that aren't kept
+    def capture_simulation (self, lvps_env, file_name, step_count = None, add_game_state = True, agent_id = None, other_agents_visible = True, width_inches = 4, height_inches = 4, dpi = 100):
+        if not self.is_capture_step(step_count):
+            return False
+
+        drawing = {
+            'map_dict':lvps_env.get_map_dict(),
+            'render_state':lvps_env.get_render_state(),
+            'add_game_state':add_game_state,
+            'agent_id':agent_id,
+            'other_agents_visible':other_agents_visible,
+            'width_inches':width_inches,
+            'height_inches':height_inches,
+            'dpi':dpi
+        }
+        return self.__enqueue((file_name, None, drawing))
+
+    # queues an image that was already rendered (an observation, etc)
+    def capture_array (self, file_name, image, step_count = None):
+        if not self.is_capture_step(step_count):
+            return False
+        # renderers may hand back the same buffer every time, so the frame is copied before it's queued
+        return self.__enqueue((file_name, np.array(image, copy=True), None))
+
+    def __enqueue (self, frame):
+        try:
+            self.__queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            self.__num_dropped += 1
+            return False
+
+    def __get_rasterizer (self, map_dict):
+        key = id(map_dict)
+        if key in self.__rasterizers and self.__rasterizers[key][0] is map_dict:
+            self.__rasterizers.move_to_end(key)
+        else:
+            self.__rasterizers[key] = (map_dict, FieldRasterizer(map_dict, grayscale=self.__grayscale))
+            if len(self.__rasterizers) > self.__max_cached_rasterizers:
+                self.__rasterizers.popitem(last=False)
+        return self.__rasterizers[key][1]
+
+    def __draw (self, drawing):
+        rasterizer = self.__get_rasterizer(drawing['map_dict'])
+        render_state = drawing['render_state']
+        rasterizer.set_render_state(render_state['positions'], render_state['looks'], render_state['found_targets'][:render_state['num_found_targets']])
+        return rasterizer.render_field_image_to_array(
+            add_game_state=drawing['add_game_state'],
+            agent_id=drawing['agent_id'],
+            other_agents_visible=drawing['other_agents_visible'],
+            width_inches=drawing['width_inches'],
+            height_inches=drawing['height_inches'],
+            dpi=drawing['dpi'])
+
+    def __next_batch (self):
+        try:
+            batch = [self.__queue.get(timeout=self.__get_timeout)]
+        except queue.Empty:
+            return []
+
+        while len(batch) < self.__batch_size:
+            try:
+                batch.append(self.__queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def __write_frames (self):
+        os.makedirs(self.__output_dir, exist_ok=True)
+        while not self.__stop_event.is_set():
+            batch = self.__next_batch()
+            for file_name, image, drawing in batch:
+                try:
+                    if image is None:
+                        image = self.__draw(drawing)
+                    if image.ndim == 3 and image.shape[2] == 1:
+                        image = image[:,:,0]
+                    Image.fromarray(image).save(os.path.join(self.__output_dir, file_name))
+                    self.__num_written += 1
+                except Exception:
+                    logging.getLogger(__name__).exception(f"Frame capture failed to write {file_name}")
+                finally:
+                    self.__queue.task_done()
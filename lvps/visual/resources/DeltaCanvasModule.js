@@ -0,0 +1,142 @@
+// browser side of DeltaCanvasGrid. Frames are deltas: {full, background, agents, removed, looks, found}.
+// agents (portrayals by id, with x and y) and the accumulated look cones and found targets are kept here,
+// and redrawn on every frame. The background and the look cones go into offscreen canvases (one pixel per cell),
+// so they are drawn only once and scaled onto the grid canvas.
+const DeltaCanvasModule = function (canvas_width, canvas_height, grid_width, grid_height) {
+  const canvas = document.createElement("canvas");
+  Object.assign(canvas, {
+    width: canvas_width,
+    height: canvas_height,
+    style: "border:1px dotted",
+  });
+  document.getElementById("elements").appendChild(canvas);
+
+  const interactionCanvas = document.createElement("canvas");
+  Object.assign(interactionCanvas, {
+    width: canvas_width,
+    height: canvas_height,
+    style: "position:absolute;left:0;top:0;z-index:1;pointer-events:none",
+  });
+
+  const context = canvas.getContext("2d");
+  const interactionHandler = new InteractionHandler(
+    canvas_width,
+    canvas_height,
+    grid_width,
+    grid_height,
+    interactionCanvas.getContext("2d")
+  );
+  const canvasDraw = new GridVisualization(
+    canvas_width,
+    canvas_height,
+    grid_width,
+    grid_height,
+    context,
+    interactionHandler
+  );
+
+  // grid y points up, so rows are flipped onto the canvas
+  const cellWidth = canvas_width / grid_width;
+  const cellHeight = canvas_height / grid_height;
+  const toCanvasX = (x) => (x + 0.5) * cellWidth;
+  const toCanvasY = (y) => (grid_height - y - 0.5) * cellHeight;
+
+  const backgroundCanvas = document.createElement("canvas");
+  const looksCanvas = document.createElement("canvas");
+  Object.assign(looksCanvas, { width: canvas_width, height: canvas_height });
+  const looksContext = looksCanvas.getContext("2d");
+
+  let hasBackground = false;
+  let agents = {};
+  let found = [];
+
+  const setBackground = function (background) {
+    backgroundCanvas.width = background.width;
+    backgroundCanvas.height = background.height;
+    const backgroundContext = backgroundCanvas.getContext("2d");
+    backgroundContext.clearRect(0, 0, background.width, background.height);
+    background.rows.forEach(function (row, y) {
+      for (let x = 0; x < row.length; x++) {
+        const color = background.colors[row[x]];
+        if (color !== undefined) {
+          backgroundContext.fillStyle = color;
+          backgroundContext.fillRect(x, y, 1, 1);
+        }
+      }
+    });
+    hasBackground = true;
+  };
+
+  // look cones are (x, y, radius, start, end), angles in degrees clockwise from north
+  const addLook = function (look) {
+    const [x, y, radius, start, end] = look;
+    const cx = toCanvasX(x);
+    const cy = toCanvasY(y);
+    looksContext.fillStyle = "rgba(255, 200, 0, 0.15)";
+    looksContext.beginPath();
+    looksContext.moveTo(cx, cy);
+    looksContext.arc(
+      cx,
+      cy,
+      radius * cellWidth,
+      ((start - 90) * Math.PI) / 180,
+      ((end - 90) * Math.PI) / 180
+    );
+    looksContext.closePath();
+    looksContext.fill();
+  };
+
+  const drawFound = function () {
+    context.strokeStyle = "#FF1111";
+    context.lineWidth = 2;
+    for (const [x, y] of found) {
+      context.beginPath();
+      context.arc(toCanvasX(x), toCanvasY(y), 2 * cellWidth, 0, 2 * Math.PI);
+      context.stroke();
+    }
+  };
+
+  const clearState = function () {
+    agents = {};
+    found = [];
+    looksContext.clearRect(0, 0, canvas_width, canvas_height);
+  };
+
+  this.render = function (data) {
+    if (data.background) {
+      setBackground(data.background);
+    }
+    if (data.full) {
+      clearState();
+    }
+    for (const id of data.removed) {
+      delete agents[id];
+    }
+    Object.assign(agents, data.agents);
+    data.looks.forEach(addLook);
+    found = found.concat(data.found);
+
+    canvasDraw.resetCanvas();
+    context.imageSmoothingEnabled = false;
+    if (hasBackground) {
+      context.drawImage(backgroundCanvas, 0, 0, canvas_width, canvas_height);
+    }
+    context.drawImage(looksCanvas, 0, 0);
+
+    const layers = {};
+    for (const id in agents) {
+      const layer = agents[id].Layer || 0;
+      (layers[layer] = layers[layer] || []).push(agents[id]);
+    }
+    for (const layer of Object.keys(layers).sort((a, b) => a - b)) {
+      canvasDraw.drawLayer(layers[layer]);
+    }
+    drawFound();
+    canvasDraw.drawGridLines("#eee");
+  };
+
+  this.reset = function () {
+    clearState();
+    canvasDraw.resetCanvas();
+  };
+};
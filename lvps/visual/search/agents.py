@@ -119,12 +119,31 @@ class SearchAgent(mesa.Agent):
     def do_nothing (self, action_params):
         return self.__lvps_sim_agent.do_nothing()
 
+    # the current action is done by the given step, and the agent can choose another
+    def __is_ready_for_next_action (self, step_count):
+        return AgentActions.StepCost[self.__curr_action] <= step_count - self.__curr_action_start_time
+
+    # the time (tick) this agent has its next decision to make, once the current action has taken its steps.
+    # the model's EventScheduler steps the agent then, and not in between
+    def get_next_step_time (self):
+        if self.__is_target_found:
+            return None
+        return self.__curr_action_start_time + AgentActions.StepCost[self.__curr_action]
+
+    # called before any agent steps at the given time, lets the strategy prepare if this agent will be choosing an action
+    def prepare_step (self, step_count):
+        if self.__is_target_found:
+            return
+
+        if self.__is_ready_for_next_action(step_count):
+            self.__agent_strategy.prepare_next_action(self.__lvps_sim_agent, step_count)
+
     def step(self):
         if self.__is_target_found:
             # we are done
             return
         
-        self.__step_count += 1
+        self.__step_count = self.model.schedule.time
         action_map = {
             AgentActions.EstimatePosition : self.estimate_position,
             AgentActions.Go : self.go,
@@ -151,7 +170,7 @@ class SearchAgent(mesa.Agent):
         }
         
         # check if current operation takes more steps
-        if AgentActions.StepCost[self.__curr_action] > self.__step_count - self.__curr_action_start_time:
+        if not self.__is_ready_for_next_action(self.__step_count):
             #logging.getLogger(__name__).info("Action takes more time, waiting")
             pass
         else:
@@ -174,19 +193,3 @@ class Target(mesa.Agent):
 
     def step(self):
         pass # if target is allowed to move, this is where to do it
-
-class Obstacle(mesa.Agent):
-    def __init__(self, unique_id, pos, model):
-        super().__init__(unique_id, model)
-        #logging.getLogger(__name__).info(f"Obstacle added at {pos}")
-
-    def step(self):
-        pass
-
-class Boundary(mesa.Agent):
-    def __init__(self, unique_id, pos, model):
-        super().__init__(unique_id, model)
-        #logging.getLogger(__name__).info(f"Boundary added at {pos}")
-
-    def step(self):
-        pass
@@ -0,0 +1,155 @@
+import argparse
+import csv
+import itertools
+import logging
+import os
+import time
+from lvps.gym.rbean_utils import RunningStats
+from lvps.gym.batch_utils import iterate_pool_results, format_stat
+
+# runs AutonomousSearch headless (no server, nothing rendered) over a sweep of robots, targets, strategies and seeds,
+# spread across a pool of processes. each run comes back as one row, and all rows make up one table (csv),
+# along with a summary per strategy / robots / targets.
+#
+# e.g. comparing strategies over 1000 seeds:
+#   python lvps/visual/search/batch_run.py --strategies random reasonable rl --seeds 1000 --output results.csv
+
+Columns = ['strategy', 'num_robots', 'num_targets', 'seed', 'complete', 'steps', 'events', 'targets_found', 'total_distance', 'seconds']
+
+# runs one search model to completion (or max_ticks), keeping only the summary of it
+def run_search (run_args):
+    strategy, num_robots, num_targets, seed, max_ticks, rl_model_file = run_args
+
+    from lvps.visual.search.model import AutonomousSearch
+
+    started = time.time()
+    model = AutonomousSearch(
+        num_robots=num_robots,
+        num_targets=num_targets,
+        strategy=strategy,
+        rl_model_file=rl_model_file,
+        render_field=False,
+        seed=seed)
+    model.run_model(step_count=max_ticks)
+
+    complete = model.is_search_complete()
+    distances = model.datacollector.model_vars['TotalDistance']
+    return {
+        'strategy':strategy,
+        'num_robots':num_robots,
+        'num_targets':num_targets,
+        'seed':seed,
+        'complete':complete,
+        'steps':model.schedule.time if complete else None,
+        'events':model.schedule.steps,
+        'targets_found':model.get_lvps_environment().get_num_found_targets(),
+        'total_distance':float(distances[-1]) if len(distances) > 0 else 0.0,
+        'seconds':time.time() - started
+    }
+
+class SearchBatchRunner:
+    # max_ticks is how long a search gets before it's counted as incomplete
+    # num_workers defaults to one per cpu
+    def __init__(self, max_ticks = 1000, rl_model_file = None, num_workers = None, start_method = 'spawn'):
+        if rl_model_file is None:
+            from lvps.visual.search.model import AutonomousSearch
+            rl_model_file = AutonomousSearch.DefaultRLModelFile
+
+        self.__max_ticks = max_ticks
+        self.__rl_model_file = rl_model_file
+        self.__num_workers = num_workers if num_workers is not None else os.cpu_count()
+        self.__start_method = start_method
+
+    # every combination of the given values
+    def get_runs (self, strategies, num_robots, num_targets, seeds):
+        return [(s, r, t, int(seed), self.__max_ticks, self.__rl_model_file) for s, r, t, seed in itertools.product(strategies, num_robots, num_targets, seeds)]
+
+    # yields each run's result as soon as a worker finishes it (in completion order)
+    def iterate_results (self, runs):
+        yield from iterate_pool_results(run_search, runs, num_workers=self.__num_workers, start_method=self.__start_method)
+
+    # runs the sweep, returns the table of results (sorted by strategy, robots, targets, seed), saved as csv to table_file if given
+    def run (self, strategies, num_robots, num_targets, seeds, table_file = None, show_report = True):
+        results = []
+        for result in self.iterate_results(self.get_runs(strategies, num_robots, num_targets, seeds)):
+            logging.getLogger(__name__).debug(f"Run finished: {result}")
+            results.append(result)
+        results.sort(key=lambda r: (r['strategy'], r['num_robots'], r['num_targets'], r['seed']))
+
+        if table_file is not None:
+            SearchBatchRunner.save_table(results, table_file)
+        if show_report:
+            self.print_report(SearchBatchRunner.summarize(results))
+
+        return results
+
+    @staticmethod
+    def save_table (results, table_file):
+        with open(table_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=Columns)
+            writer.writeheader()
+            writer.writerows(results)
+
+    # per (strategy, robots, targets) statistics of the results. steps are only over the completed searches
+    @staticmethod
+    def summarize (results):
+        groups = {}
+        for result in results:
+            key = (result['strategy'], result['num_robots'], result['num_targets'])
+            if key not in groups:
+                groups[key] = {'runs':0, 'complete':0, 'steps':RunningStats(), 'targets_found':RunningStats(), 'total_distance':RunningStats(), 'seconds':RunningStats()}
+            group = groups[key]
+            group['runs'] += 1
+            if result['complete']:
+                group['complete'] += 1
+                group['steps'].push(result['steps'])
+            group['targets_found'].push(result['targets_found'])
+            group['total_distance'].push(result['total_distance'])
+            group['seconds'].push(result['seconds'])
+
+        summary = []
+        for (strategy, robots, targets), group in sorted(groups.items()):
+            summary.append({
+                'strategy':strategy,
+                'num_robots':robots,
+                'num_targets':targets,
+                'runs':group['runs'],
+                'completion_rate':group['complete'] / group['runs'],
+                'mean_steps':group['steps'].get_mean(),
+                'stdev_steps':group['steps'].get_stdev(),
+                'mean_targets_found':group['targets_found'].get_mean(),
+                'mean_total_distance':group['total_distance'].get_mean(),
+                'mean_seconds':group['seconds'].get_mean()
+            })
+        return summary
+
+    def print_report (self, summary):
+        fmt = lambda value: format_stat(value, digits=2)
+
+        print(f"{'Strategy':<12}{'Robots':>8}{'Targets':>9}{'Runs':>7}{'Complete':>10}{'Steps':>9}{'StdDev':>9}{'Found':>8}{'Distance':>11}{'Secs':>8}")
+        for s in summary:
+            print(f"{s['strategy']:<12}{s['num_robots']:>8}{s['num_targets']:>9}{s['runs']:>7}{fmt(s['completion_rate']):>10}{fmt(s['mean_steps']):>9}{fmt(s['stdev_steps']):>9}{fmt(s['mean_targets_found']):>8}{fmt(s['mean_total_distance']):>11}{fmt(s['mean_seconds']):>8}")
+
+if __name__ == '__main__':
+    from lvps.visual.search.model import SearchStrategies
+
+    parser = argparse.ArgumentParser(description='Runs AutonomousSearch headless over a sweep of settings, in parallel')
+    parser.add_argument('--strategies', nargs='+', default=[SearchStrategies.Random, SearchStrategies.Reasonable, SearchStrategies.RL], choices=SearchStrategies.All)
+    parser.add_argument('--robots', nargs='+', type=int, default=[1])
+    parser.add_argument('--targets', nargs='+', type=int, default=[1])
+    parser.add_argument('--seeds', type=int, default=1000, help='number of seeds, per combination of settings')
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--max-ticks', type=int, default=1000)
+    parser.add_argument('--rl-model-file', default=None)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to one per cpu')
+    parser.add_argument('--output', default='search_batch_results.csv')
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s [%(levelname)s] %(module)s:%(message)s', level=logging.INFO)
+    runner = SearchBatchRunner(max_ticks=args.max_ticks, rl_model_file=args.rl_model_file, num_workers=args.workers)
+    runner.run(
+        strategies=args.strategies,
+        num_robots=args.robots,
+        num_targets=args.targets,
+        seeds=range(args.first_seed, args.first_seed + args.seeds),
+        table_file=args.output)
@@ -0,0 +1,49 @@
+import mesa
+from .field_background import FieldBackgroundCells
+from .frame_delta_encoder import FrameDeltaEncoder
+
+# grid visualization that streams deltas instead of re-sending every portrayal on every frame, over mesa's usual websocket.
+# the field background (see FieldBackground) is sent once per model, after that a frame only carries the agents that
+# moved or changed, and the look cones and found targets since the previous frame (see FrameDeltaEncoder).
+# the browser side is DeltaCanvasModule.js, which keeps the state and redraws it. The module is served by mesa
+# from the working directory, so the server has to be launched from the repo root.
+#
+# the model needs get_field_background(), get_looks() and get_found_locations()
+class DeltaCanvasGrid(mesa.visualization.VisualizationElement):
+    package_includes = ["GridDraw.js", "InteractionHandler.js"]
+    local_includes = ["lvps/visual/resources/DeltaCanvasModule.js"]
+
+    Colors = {
+        FieldBackgroundCells.Clear : None,
+        FieldBackgroundCells.OutOfBounds : "#F1F1F1",
+        FieldBackgroundCells.Obstacle : "#1111EE"
+    }
+
+    def __init__(self, portrayal_method, grid_width, grid_height, canvas_width=500, canvas_height=500):
+        super().__init__()
+        self.portrayal_method = portrayal_method
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.canvas_width = canvas_width
+        self.canvas_height = canvas_height
+        self.js_code = f"elements.push(new DeltaCanvasModule({canvas_width}, {canvas_height}, {grid_width}, {grid_height}));"
+        self.__encoder = FrameDeltaEncoder(portrayal_method)
+        self.__model = None
+
+    def render(self, model):
+        background = None
+        if model is not self.__model:
+            # a new model (mesa's reset), start over with a full frame
+            self.__model = model
+            self.__encoder.reset()
+            field_background = model.get_field_background()
+            background = {
+                'width':field_background.get_width(),
+                'height':field_background.get_height(),
+                'rows':field_background.to_rows(),
+                'colors':{str(k):v for k, v in DeltaCanvasGrid.Colors.items() if v is not None}
+            }
+
+        frame = self.__encoder.encode(model.schedule.agents, model.get_looks(), model.get_found_locations())
+        frame['background'] = background
+        return frame
@@ -0,0 +1,98 @@
+import heapq
+
+# discrete event scheduler for the mesa model. Instead of stepping every agent on every tick, each agent is stepped
+# only at the time it has a decision to make, and the clock jumps straight from one decision time to the next.
+# so the cost of a run follows the number of decisions, not ticks x agents.
+#
+# agents that take part implement get_next_step_time(), called after each of their steps: the time (tick) of their
+# next step, or None to not be stepped again. Agents without it (targets, etc) are only kept track of, never stepped.
+# agents due at the same time are stepped in random order (model.random), as mesa's random activation does.
+#
+# time is the tick of the most recent event, steps counts the events processed
+
+class EventScheduler:
+    def __init__(self, model, start_time = 0):
+        self.model = model
+        self.time = start_time
+        self.steps = 0
+        self.__agents = {} # unique id -> agent
+        self.__queue = [] # (time, sequence, unique id)
+        self.__scheduled = {} # unique id -> sequence of its live queue entry, any other entries for it are stale
+        self.__sequence = 0
+
+    # adds the agent, to be stepped first at first_step_time (by default, the next tick)
+    def add (self, agent, first_step_time = None):
+        if agent.unique_id in self.__agents:
+            raise ValueError(f"Agent {agent.unique_id} is already scheduled")
+        self.__agents[agent.unique_id] = agent
+        if hasattr(agent, 'get_next_step_time'):
+            self.__push(agent, self.time + 1 if first_step_time is None else first_step_time)
+
+    # removed agents drop out of the queue when their time comes up
+    def remove (self, agent):
+        del self.__agents[agent.unique_id]
+        self.__scheduled.pop(agent.unique_id, None)
+
+    @property
+    def agents (self):
+        return list(self.__agents.values())
+
+    def get_agent_count (self):
+        return len(self.__agents)
+
+    def get_type_count (self, type_class):
+        return sum(1 for a in self.__agents.values() if isinstance(a, type_class))
+
+    # time of the next event, or None if nothing is left to step
+    def get_next_event_time (self):
+        self.__discard_stale()
+        return self.__queue[0][0] if len(self.__queue) > 0 else None
+
+    # takes the agents due next off the queue, returns their time and the agents ((None, []) if nothing is left).
+    # callers that need the agents before they're stepped pop them, then hand them to step()
+    def pop_due_agents (self):
+        next_time = self.get_next_event_time()
+        if next_time is None:
+            return None, []
+
+        due = []
+        while len(self.__queue) > 0 and self.__queue[0][0] == next_time:
+            _, seq, uid = heapq.heappop(self.__queue)
+            if self.__is_live(seq, uid):
+                del self.__scheduled[uid]
+                due.append(self.__agents[uid])
+        return next_time, due
+
+    # jumps to the next event time and steps every agent due then. due is what pop_due_agents returned,
+    # if the caller already popped them. returns False if there was nothing to step
+    def step (self, due = None):
+        next_time, due_agents = self.pop_due_agents() if due is None else due
+        if next_time is None:
+            return False
+
+        self.time = next_time
+        self.model.random.shuffle(due_agents)
+        for agent in due_agents:
+            # an earlier agent may have removed this one during the step
+            if agent.unique_id not in self.__agents:
+                continue
+            agent.step()
+            next_step_time = agent.get_next_step_time()
+            if next_step_time is not None:
+                # an agent can't be stepped twice at the same time
+                self.__push(agent, max(next_step_time, self.time + 1))
+
+        self.steps += 1
+        return True
+
+    def __push (self, agent, step_time):
+        heapq.heappush(self.__queue, (step_time, self.__sequence, agent.unique_id))
+        self.__scheduled[agent.unique_id] = self.__sequence
+        self.__sequence += 1
+
+    def __is_live (self, sequence, unique_id):
+        return self.__scheduled.get(unique_id) == sequence
+
+    def __discard_stale (self):
+        while len(self.__queue) > 0 and not self.__is_live(self.__queue[0][1], self.__queue[0][2]):
+            heapq.heappop(self.__queue)
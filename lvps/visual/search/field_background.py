@@ -0,0 +1,54 @@
+import numpy as np
+
+# values of the background raster cells
+class FieldBackgroundCells:
+    Clear = 0
+    OutOfBounds = 1
+    Obstacle = 2
+
+# the static part of the field (boundaries and obstacles) as one raster over the mesa grid, computed once per map.
+# cells are indexed [x, y], the same way as mesa grid positions
+class FieldBackground:
+    def __init__(self, cells):
+        self.__cells = cells
+
+    # rasterizes the map over a width x height grid. sim_scaler is the FieldScaler between lvps coords and grid positions,
+    # it is assumed to be linear on each axis (which FieldScaler is)
+    @staticmethod
+    def from_map_dict (map_dict, sim_scaler, width, height):
+        b = map_dict['boundaries']
+        sx0, sy0 = sim_scaler.get_scaled_coords(lvps_x=b['xmin'], lvps_y=b['ymin'])
+        sx1, sy1 = sim_scaler.get_scaled_coords(lvps_x=b['xmax'], lvps_y=b['ymax'])
+
+        # lvps coords of every grid position
+        xs = b['xmin'] + (np.arange(width, dtype=np.float64) - sx0) * (b['xmax'] - b['xmin']) / (sx1 - sx0)
+        ys = b['ymin'] + (np.arange(height, dtype=np.float64) - sy0) * (b['ymax'] - b['ymin']) / (sy1 - sy0)
+        lvps_x, lvps_y = np.meshgrid(xs, ys, indexing='ij')
+
+        cells = np.full((width, height), FieldBackgroundCells.OutOfBounds, dtype=np.uint8)
+        cells[FieldBackground.__inside(lvps_x, lvps_y, b)] = FieldBackgroundCells.Clear
+        if 'obstacles' in map_dict and map_dict['obstacles'] is not None:
+            for o in map_dict['obstacles'].values():
+                cells[FieldBackground.__inside(lvps_x, lvps_y, o) & (cells == FieldBackgroundCells.Clear)] = FieldBackgroundCells.Obstacle
+
+        return FieldBackground(cells)
+
+    @staticmethod
+    def __inside (lvps_x, lvps_y, rect):
+        return (lvps_x >= rect['xmin']) & (lvps_x <= rect['xmax']) & (lvps_y >= rect['ymin']) & (lvps_y <= rect['ymax'])
+
+    def get_cells (self):
+        return self.__cells
+
+    def get_width (self):
+        return self.__cells.shape[0]
+
+    def get_height (self):
+        return self.__cells.shape[1]
+
+    def is_blocked (self, x, y):
+        return self.__cells[x, y] != FieldBackgroundCells.Clear
+
+    # the raster as one string of cell values per row, top row (highest y) first, the way the canvas draws it
+    def to_rows (self):
+        return [''.join(str(v) for v in self.__cells[:, y]) for y in range(self.get_height() - 1, -1, -1)]
@@ -0,0 +1,52 @@
+# turns the state of the visual simulation into per-frame deltas for the browser, so a frame costs what changed
+# instead of the whole grid. Agents are sent only when their portrayal (which includes their position) changed,
+# and removed agents by id. Looks and found targets only ever accumulate, so only the ones since the last frame are sent.
+#
+# the first frame after a reset is a full frame ('full' is True), and the browser drops what it had.
+# the browser keeps the state and redraws it from there, see DeltaCanvasModule.js
+class FrameDeltaEncoder:
+    def __init__(self, portrayal_method):
+        self.__portrayal_method = portrayal_method
+        self.reset()
+
+    # the next frame will carry everything
+    def reset (self):
+        self.__sent_agents = {} # unique id -> portrayal last sent
+        self.__sent_looks = 0
+        self.__sent_found = 0
+        self.__full = True
+
+    # agents are the mesa agents (anything with unique_id and pos), looks and found_locations are the lists
+    # kept by the model, in grid coords: looks are (x, y, radius, start angle, end angle), found locations are (x, y)
+    def encode (self, agents, looks, found_locations):
+        # lists that got shorter belong to something new, start over
+        if len(looks) < self.__sent_looks or len(found_locations) < self.__sent_found:
+            self.reset()
+
+        frame = {
+            'full':self.__full,
+            'agents':{},
+            'removed':[],
+            'looks':[list(l) for l in looks[self.__sent_looks:]],
+            'found':[list(f) for f in found_locations[self.__sent_found:]]
+        }
+
+        current = {}
+        for agent in agents:
+            if agent.pos is None:
+                continue
+            portrayal = self.__portrayal_method(agent)
+            if not portrayal:
+                continue
+            portrayal = dict(portrayal, x=agent.pos[0], y=agent.pos[1])
+            current[agent.unique_id] = portrayal
+            if self.__sent_agents.get(agent.unique_id) != portrayal:
+                frame['agents'][str(agent.unique_id)] = portrayal
+
+        frame['removed'] = [str(uid) for uid in self.__sent_agents if uid not in current]
+
+        self.__sent_agents = current
+        self.__sent_looks = len(looks)
+        self.__sent_found = len(found_locations)
+        self.__full = False
+        return frame
@@ -1,25 +1,43 @@
 import mesa
-import random
 import logging
 
-from .agents import SearchAgent, Target, Obstacle, Boundary
+from .agents import SearchAgent, Target
+from .field_background import FieldBackground
+from .event_scheduler import EventScheduler
 from lvps.simulation.lvps_sim_environment import LvpsSimEnvironment
 from field.field_scaler import FieldScaler
 from field.field_renderer import FieldRenderer
 from lvps.simulation.simulated_agent import SimulatedAgent
 from lvps.simulation.sim_events import SimEventType
 from lvps.simulation.agent_types import AgentTypes
+from lvps.simulation.null_field_renderer import NullFieldRenderer
 from ...strategies.reasonable_search_strategy import ReasonableSearchStrategy
 from ...strategies.rl_search_strategy import RLSearchStrategy
 from ...strategies.random_search_strategy import RandomSearchStrategy
+from ...strategies.rollout_search_strategy import RolloutSearchStrategy
 
 import numpy as np
 
+# the strategies search agents can be given
+class SearchStrategies:
+    Random = 'random'
+    Reasonable = 'reasonable'
+    Rollout = 'rollout'
+    RL = 'rl'
+
+    All = [Random, Reasonable, Rollout, RL]
+
 class AutonomousSearch(mesa.Model):
     num_robots = 1
     num_targets = 1
 
-    def __init__(self, width=120, height=120, num_robots=1, num_targets=1):
+    DefaultRLModelFile = '/home/matt/projects/lvps_rl_models/three_million_steps/model.zip'
+
+    # seed makes a run repeatable (both mesa's random and the lvps simulation's), it has to be given by keyword.
+    # without render_field, nothing is rendered or captured (headless runs), except the RL strategy's observations
+    def __init__(self, width=120, height=120, num_robots=1, num_targets=1, strategy=SearchStrategies.RL, rl_model_file=DefaultRLModelFile, render_field=True, seed=None):
+        if strategy not in SearchStrategies.All:
+            raise ValueError(f"Unknown search strategy: {strategy}")
 
         # Set parameters
         self.__field_scaler = None
@@ -31,24 +49,36 @@ class AutonomousSearch(mesa.Model):
         self.__lvps_env = None
         self.__next_agent_id = 0
         self.__grayscale = True
+        self.__field_renderer = None
+        self.__field_background = None
+        self.__strategy = strategy
+        self.__rl_model_file = rl_model_file
+        self.__render_field = render_field
+        self.__seed = seed
 
         logging.getLogger(__name__).info(f"AutonomousSearch mesa model height: {height}, width: {width}")
 
         self.__found_targets = []
 
-        self.schedule = mesa.time.RandomActivationByType(self)
+        # look cones and found target locations in grid coords, only ever appended to (see DeltaCanvasGrid)
+        self.__looks = []
+        self.__found_locations = []
+
+        # agents are only stepped when they have a decision to make, see EventScheduler
+        self.schedule = EventScheduler(self)
         self.grid = mesa.space.MultiGrid(self.width, self.height, torus=False)
         self.datacollector = mesa.DataCollector({
             "TotalDistance": lambda m: m.get_total_distance_traveled()
             },
         )
 
-        self.add_obstacles_and_boundaries()
+        self.create_field_background()
         self.add_targets()
         self.add_search_agents()
 
         self.get_lvps_environment().add_event_subscription (event_type = SimEventType.AgentMoved, listener = self)
         self.get_lvps_environment().add_event_subscription (event_type = SimEventType.TargetFound, listener = self)
+        self.get_lvps_environment().add_event_subscription (event_type = SimEventType.AgentLooked, listener = self)
 
         self.running = True
         self.datacollector.collect(self)
@@ -57,31 +87,33 @@ class AutonomousSearch(mesa.Model):
         self.__next_agent_id += 1
         return self.__next_agent_id
 
-    def add_obstacles_and_boundaries (self):
-        sim_scaler = self.get_field_sim_scaler()
-        for _, (x, y) in self.grid.coord_iter():
-            # if there's a barrier here, add it
-            if not sim_scaler.is_in_bounds(x,y):
-                boundary = Boundary(self.__get_unique_id(), (x,y), self)
-                self.grid.place_agent(boundary, (x, y))
-            elif sim_scaler.is_obstacle(x,y):
-                obstacle = Obstacle(self.__get_unique_id(), (x,y), self)
-                self.grid.place_agent(obstacle, (x, y))
+    # boundaries and obstacles don't change during a run, so they are one raster drawn behind the agents
+    # instead of an agent on every blocked cell
+    def create_field_background (self):
+        self.__field_background = FieldBackground.from_map_dict(
+            map_dict=self.get_lvps_environment().get_map_dict(),
+            sim_scaler=self.get_field_sim_scaler(),
+            width=self.width,
+            height=self.height
+        )
+
+    def get_field_background (self):
+        return self.__field_background
 
     def add_search_agents (self):
         # Create search agents, drop onto random spots
 
         # the agents get a common field renderer, which allows them to export PNG files of the sim, with optional awareness of other agents' location
-        field_renderer = FieldRenderer(field_map = self.get_lvps_environment().get_map(), map_scaler=self.get_lvps_environment().get_field_image_scaler(), grayscale=self.__grayscale)
+        field_renderer = self.get_field_renderer()
         for i in range(self.num_robots):
-            lvps_x,lvps_y = self.get_field_sim_scaler().get_random_traversable_coords()
-            lvps_heading = random.randrange(-1800,1800)/10 # pick a random starting heading
+            lvps_x,lvps_y = self.get_lvps_environment().get_random_traversable_coords()
+            lvps_heading = self.get_lvps_environment().get_random().randrange(-1800,1800)/10 # pick a random starting heading
             new_agent_id = self.__get_unique_id()
 
             # this agent receives a paired agent simulation
             lvps_agent = SimulatedAgent(
                 agent_id=new_agent_id, 
-                agent_type=np.random.choice([AgentTypes.MecCar, AgentTypes.Tank]),
+                agent_type=self.get_lvps_environment().get_random().choice([AgentTypes.MecCar, AgentTypes.Tank]),
                 field_renderer=field_renderer,
                 lvps_env=self.get_lvps_environment())
 
@@ -110,7 +142,7 @@ class AutonomousSearch(mesa.Model):
     def add_targets (self):
         # create targets
         for i in range(self.num_targets):
-            lvps_x,lvps_y = self.get_field_sim_scaler().get_random_traversable_coords()
+            lvps_x,lvps_y = self.get_lvps_environment().get_random_traversable_coords()
             x,y = self.get_field_sim_scaler().get_scaled_coords(lvps_x=lvps_x, lvps_y=lvps_y)
             x = round(x)
             y = round(y)
@@ -135,6 +167,17 @@ class AutonomousSearch(mesa.Model):
             total += agent.get_lvps_agent().get_total_distance_traveled()
         return total
 
+    # the renderer shared by all search agents
+    def get_field_renderer (self):
+        if self.__field_renderer is None and not self.__render_field and self.__strategy != SearchStrategies.RL:
+            self.__field_renderer = NullFieldRenderer(map_scaler=self.get_lvps_environment().get_field_image_scaler())
+        elif self.__field_renderer is None:
+            self.__field_renderer = FieldRenderer(field_map = self.get_lvps_environment().get_map(), map_scaler=self.get_lvps_environment().get_field_image_scaler(), grayscale=self.__grayscale)
+        return self.__field_renderer
+
+    def is_search_complete (self):
+        return len(self.__found_targets) >= self.num_targets
+
     def get_field_sim_scaler (self):
         if self.__field_scaler is None:
             self.__field_scaler = FieldScaler(
@@ -148,7 +191,7 @@ class AutonomousSearch(mesa.Model):
     
     def get_lvps_environment (self):
         if self.__lvps_env is None:
-            self.__lvps_env = LvpsSimEnvironment()
+            self.__lvps_env = LvpsSimEnvironment(seed=self.__seed)
         return self.__lvps_env
 
     def handle_event (self, event_type, event_details):
@@ -180,26 +223,55 @@ class AutonomousSearch(mesa.Model):
             target_id = event_details['target_id']
             if target_id not in self.__found_targets:
                 self.__found_targets.append(target_id)
+                sim_x, sim_y = self.__field_scaler.get_scaled_coords(lvps_x=event_details['x'], lvps_y=event_details['y'])
+                self.__found_locations.append((round(sim_x, 2), round(sim_y, 2)))
 
             if len(self.__found_targets) >= self.num_targets:
                 logging.getLogger(__name__).info("All targets found. search is complete")
+        elif event_type == SimEventType.AgentLooked:
+            lvps_x, lvps_y, heading, relative_begin, relative_end, distance = event_details['look']
+            sim_x, sim_y = self.__field_scaler.get_scaled_coords(lvps_x=lvps_x, lvps_y=lvps_y)
+            edge_x, _ = self.__field_scaler.get_scaled_coords(lvps_x=lvps_x + distance, lvps_y=lvps_y)
+            self.__looks.append((round(sim_x, 2), round(sim_y, 2), round(abs(edge_x - sim_x), 2), round(heading + relative_begin, 1), round(heading + relative_end, 1)))
 
-    def __get_agent_strategy (self):
-        #return RandomSearchStrategy()
-        #return ReasonableSearchStrategy(render_field=False)
-        return RLSearchStrategy(environment=self.__lvps_env, model_file='/home/matt/projects/lvps_rl_models/three_million_steps/model.zip')
-        #return RLSearchStrategy(environment=self.__lvps_env, model_file='/home/matt/projects/LVPS_Simulation/models/final/model.zip')
+    # look cones as (x, y, radius, start angle, end angle), grid coords, angles in degrees clockwise from north
+    def get_looks (self):
+        return self.__looks
+
+    def get_found_locations (self):
+        return self.__found_locations
 
+    def __get_agent_strategy (self):
+        if self.__strategy == SearchStrategies.Random:
+            return RandomSearchStrategy(render_field=self.__render_field)
+        elif self.__strategy == SearchStrategies.Reasonable:
+            return ReasonableSearchStrategy(render_field=self.__render_field)
+        elif self.__strategy == SearchStrategies.Rollout:
+            return RolloutSearchStrategy(rollouts_per_action=16, rollout_depth=6)
+        return RLSearchStrategy(environment=self.__lvps_env, model_file=self.__rl_model_file, render_field=self.__render_field)
+
+    def get_strategy (self):
+        return self.__strategy
+
+    # advances to the next time any agent has a decision to make
     def step(self):
         if len(self.__found_targets) < self.num_targets:
-            self.schedule.step()
-            self.datacollector.collect(self)
-
+            # strategies of the agents deciding now get ready together first, so RL agents share one batched inference
+            step_time, due_agents = self.schedule.pop_due_agents()
+            for search_agent in due_agents:
+                search_agent.prepare_step(step_time)
+            if self.schedule.step(due=(step_time, due_agents)):
+                self.datacollector.collect(self)
+            else:
+                self.running = False
+
+    # runs until step_count ticks have passed (or the search is complete)
     def run_model(self, step_count=200):
         logging.getLogger(__name__).info(f"Search Agents: {self.schedule.get_type_count(SearchAgent)}")
 
-        for i in range(step_count):
-            if len(self.__found_targets) >= self.num_targets:
+        while self.running and len(self.__found_targets) < self.num_targets:
+            next_time = self.schedule.get_next_event_time()
+            if next_time is None or next_time > step_count:
                 return
 
             self.step()
@@ -1,6 +1,7 @@
 import mesa
 
-from .agents import SearchAgent, Obstacle, Boundary, Target
+from .agents import SearchAgent, Target
+from .delta_canvas_grid import DeltaCanvasGrid
 from .model import AutonomousSearch
 
 color_dic = {4: "#005C00", 3: "#008300", 2: "#00AA00", 1: "#00F800"}
@@ -21,26 +22,6 @@ def SearchAgent_portrayal(agent):
             "h": 2,
         }
 
-    elif type(agent) is Boundary:
-        return {
-            "Color": "#F1F1F1",
-            "Shape": "rect",
-            "Filled": "true",
-            "Layer": 0,
-            "w": 1,
-            "h": 1,
-        }
-    
-    elif type(agent) is Obstacle:
-        return {
-            "Color": "#1111EE",
-            "Shape": "rect",
-            "Filled": "true",
-            "Layer": 0,
-            "w": 1,
-            "h": 1,
-        }
-
     elif type(agent) is Target:
         return {
             "Color": "#FF1111",
@@ -54,7 +35,7 @@ def SearchAgent_portrayal(agent):
     return {}
 
 
-canvas_element = mesa.visualization.CanvasGrid(SearchAgent_portrayal, 120, 120, 500, 500)
+canvas_element = DeltaCanvasGrid(SearchAgent_portrayal, 120, 120, 500, 500)
 chart_element = mesa.visualization.ChartModule(
     [{"Label": "TotalDistance", "Color": "#AA0000"}]
 )
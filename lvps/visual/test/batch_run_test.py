@@ -0,0 +1,50 @@
+import csv
+import os
+import tempfile
+import unittest
+from lvps.visual.search.batch_run import SearchBatchRunner
+
+def result (strategy, seed, complete, steps, distance):
+    return {
+        'strategy':strategy, 'num_robots':1, 'num_targets':1, 'seed':seed, 'complete':complete,
+        'steps':steps if complete else None, 'events':10, 'targets_found':1 if complete else 0,
+        'total_distance':distance, 'seconds':0.5
+    }
+
+class SearchBatchRunnerTest(unittest.TestCase):
+    def test_runs_cover_sweep (self):
+        runner = SearchBatchRunner(max_ticks=50, rl_model_file='model.zip', num_workers=2)
+        runs = runner.get_runs(strategies=['random', 'reasonable'], num_robots=[1, 2], num_targets=[1], seeds=range(3))
+
+        self.assertEqual(len(runs), 12)
+        self.assertEqual(len(set(runs)), 12)
+        self.assertEqual(runs[0], ('random', 1, 1, 0, 50, 'model.zip'))
+
+    def test_summary_per_strategy (self):
+        results = [
+            result('random', 0, True, 100, 40.0),
+            result('random', 1, False, None, 60.0),
+            result('reasonable', 0, True, 20, 10.0),
+            result('reasonable', 1, True, 40, 30.0)
+        ]
+        summary = SearchBatchRunner.summarize(results)
+
+        self.assertEqual([s['strategy'] for s in summary], ['random', 'reasonable'])
+        self.assertEqual(summary[0]['completion_rate'], 0.5)
+        self.assertEqual(summary[0]['mean_steps'], 100)
+        self.assertEqual(summary[0]['mean_total_distance'], 50.0)
+        self.assertEqual(summary[1]['completion_rate'], 1.0)
+        self.assertEqual(summary[1]['mean_steps'], 30)
+
+    def test_table_saved (self):
+        results = [result('random', 0, True, 100, 40.0), result('random', 1, False, None, 60.0)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            table_file = os.path.join(temp_dir, 'results.csv')
+            SearchBatchRunner.save_table(results, table_file)
+            with open(table_file, newline='') as f:
+                rows = list(csv.DictReader(f))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['steps'], '100')
+        self.assertEqual(rows[1]['steps'], '')
+        self.assertEqual(rows[1]['complete'], 'False')
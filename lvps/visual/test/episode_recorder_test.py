@@ -0,0 +1,51 @@
+import unittest
+import os
+import tempfile
+from lvps.visual.episode_recorder import EpisodeRecorder
+from PIL import Image
+import numpy as np
+
+class EpisodeRecorderTest(unittest.TestCase):
+    def __record (self, file_name, images, **kwargs):
+        with EpisodeRecorder(file_name, **kwargs) as recorder:
+            for image in images:
+                recorder.add_frame(image)
+        return recorder
+
+    def test_gif_skips_and_scales (self):
+        images = [np.full((40, 60, 1), i * 10, dtype=np.uint8) for i in range(10)]
+        with tempfile.TemporaryDirectory() as output_dir:
+            file_name = os.path.join(output_dir, 'episode.gif')
+            recorder = self.__record(file_name, images, every_n_frames=3, scale=0.5)
+            self.assertEqual(recorder.get_num_frames(), 4)
+
+            with Image.open(file_name) as gif:
+                self.assertEqual(gif.n_frames, 4)
+                self.assertEqual(gif.size, (30, 20))
+                gif.seek(2)
+                self.assertEqual(np.array(gif.convert('L'))[0,0], 60)
+
+    def test_color_gif (self):
+        colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+        images = [np.zeros((8, 8, 3), dtype=np.uint8) + np.array(c, dtype=np.uint8) for c in colors]
+        with tempfile.TemporaryDirectory() as output_dir:
+            file_name = os.path.join(output_dir, 'episode.gif')
+            self.__record(file_name, images)
+
+            with Image.open(file_name) as gif:
+                for i, c in enumerate(colors):
+                    gif.seek(i)
+                    self.assertEqual(tuple(np.array(gif.convert('RGB'))[0,0]), c)
+
+    def test_webp (self):
+        images = [np.full((16, 16, 1), i * 40, dtype=np.uint8) for i in range(5)]
+        with tempfile.TemporaryDirectory() as output_dir:
+            file_name = os.path.join(output_dir, 'episode.webp')
+            self.__record(file_name, images, every_n_frames=2)
+
+            with Image.open(file_name) as webp:
+                self.assertEqual(webp.n_frames, 3)
+
+    def test_unknown_format (self):
+        with self.assertRaises(ValueError):
+            EpisodeRecorder('/tmp/episode.mp4')
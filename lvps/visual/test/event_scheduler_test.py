@@ -0,0 +1,85 @@
+import unittest
+import random
+from lvps.visual.search.event_scheduler import EventScheduler
+
+class FakeModel:
+    def __init__(self):
+        self.random = random.Random(1)
+        self.schedule = EventScheduler(self)
+
+# steps every `interval` ticks, a set number of times
+class IntervalAgent:
+    def __init__(self, unique_id, model, interval, num_steps):
+        self.unique_id = unique_id
+        self.model = model
+        self.interval = interval
+        self.remaining = num_steps
+        self.step_times = []
+
+    def step (self):
+        self.step_times.append(self.model.schedule.time)
+        self.remaining -= 1
+
+    def get_next_step_time (self):
+        return self.model.schedule.time + self.interval if self.remaining > 0 else None
+
+class PassiveAgent:
+    def __init__(self, unique_id):
+        self.unique_id = unique_id
+
+class EventSchedulerTest(unittest.TestCase):
+    def test_jumps_between_events (self):
+        model = FakeModel()
+        fast = IntervalAgent(1, model, interval=2, num_steps=4)
+        slow = IntervalAgent(2, model, interval=5, num_steps=2)
+        model.schedule.add(fast)
+        model.schedule.add(slow)
+        model.schedule.add(PassiveAgent(3))
+
+        while model.schedule.step():
+            pass
+
+        self.assertEqual([1, 3, 5, 7], fast.step_times)
+        self.assertEqual([1, 6], slow.step_times)
+        # times 1, 3, 5, 6, 7 rather than 7 ticks
+        self.assertEqual(5, model.schedule.steps)
+        self.assertEqual(7, model.schedule.time)
+        self.assertEqual(3, model.schedule.get_agent_count())
+        self.assertEqual(2, model.schedule.get_type_count(IntervalAgent))
+
+    def test_due_agents (self):
+        model = FakeModel()
+        a = IntervalAgent(1, model, interval=3, num_steps=5)
+        b = IntervalAgent(2, model, interval=3, num_steps=5)
+        model.schedule.add(a)
+        model.schedule.add(b, first_step_time=2)
+
+        due = model.schedule.pop_due_agents()
+        self.assertEqual((1, [a]), due)
+        # popped agents are only stepped through step(due=...)
+        self.assertEqual(2, model.schedule.get_next_event_time())
+        model.schedule.step(due=due)
+        self.assertEqual([1], a.step_times)
+
+        due = model.schedule.pop_due_agents()
+        self.assertEqual((2, [b]), due)
+        model.schedule.step(due=due)
+        self.assertEqual(4, model.schedule.get_next_event_time())
+
+    def test_removed_agents_are_not_stepped (self):
+        model = FakeModel()
+        a = IntervalAgent(1, model, interval=1, num_steps=10)
+        model.schedule.add(a)
+        model.schedule.step()
+        model.schedule.remove(a)
+        self.assertIsNone(model.schedule.get_next_event_time())
+        self.assertFalse(model.schedule.step())
+
+        # added back, it's stepped once per event again
+        model.schedule.add(a)
+        model.schedule.step()
+        model.schedule.step()
+        self.assertEqual([1, 2, 3], a.step_times)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from lvps.visual.search.field_background import FieldBackground, FieldBackgroundCells
+
+# linear mapping of the map onto a width x height grid, the way FieldScaler maps it
+class FakeSimScaler:
+    def __init__(self, map_dict, width, height):
+        self.boundaries = map_dict['boundaries']
+        self.width = width
+        self.height = height
+
+    def get_scaled_coords (self, lvps_x, lvps_y):
+        b = self.boundaries
+        return (
+            round((lvps_x - b['xmin']) * (self.width - 1) / (b['xmax'] - b['xmin'])),
+            round((lvps_y - b['ymin']) * (self.height - 1) / (b['ymax'] - b['ymin']))
+        )
+
+class FieldBackgroundTest(unittest.TestCase):
+    def setUp(self):
+        self.map_dict = {
+            'boundaries':{'xmin':-50, 'ymin':-50, 'xmax':50, 'ymax':50},
+            'obstacles':{
+                'box':{'xmin':0, 'ymin':0, 'xmax':20, 'ymax':10}
+            }
+        }
+
+    def test_cells_match_map (self):
+        # grid wider than the map: the extra cells are out of bounds
+        scaler = FakeSimScaler(self.map_dict, 11, 11)
+        background = FieldBackground.from_map_dict(self.map_dict, scaler, width=15, height=12)
+
+        self.assertEqual(background.get_width(), 15)
+        self.assertEqual(background.get_height(), 12)
+        cells = background.get_cells()
+        self.assertEqual(cells[5, 5], FieldBackgroundCells.Obstacle)
+        self.assertEqual(cells[7, 6], FieldBackgroundCells.Obstacle)
+        self.assertEqual(cells[8, 6], FieldBackgroundCells.Clear)
+        self.assertEqual(cells[0, 0], FieldBackgroundCells.Clear)
+        self.assertEqual(cells[10, 10], FieldBackgroundCells.Clear)
+        self.assertEqual(cells[11, 3], FieldBackgroundCells.OutOfBounds)
+        self.assertEqual(cells[3, 11], FieldBackgroundCells.OutOfBounds)
+        self.assertTrue(background.is_blocked(6, 5))
+        self.assertFalse(background.is_blocked(2, 2))
+
+    def test_rows_are_top_down (self):
+        scaler = FakeSimScaler(self.map_dict, 11, 11)
+        background = FieldBackground.from_map_dict(self.map_dict, scaler, width=12, height=12)
+        rows = background.to_rows()
+
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[0], str(FieldBackgroundCells.OutOfBounds) * 12)
+        self.assertEqual(rows[-1][5], str(background.get_cells()[5, 0]))
+        self.assertEqual(rows[11 - 5][5], str(FieldBackgroundCells.Obstacle))
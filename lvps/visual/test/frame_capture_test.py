@@ -0,0 +1,66 @@
+import unittest
+import os
+import tempfile
+from lvps.visual.frame_capture import FrameCapture
+from PIL import Image
+import numpy as np
+
+class FakeSimulation:
+    def __init__(self):
+        self.num_snapshots = 0
+        self.map_dict = {
+            'boundaries':{'xmin':-100, 'ymin':-100, 'xmax':100, 'ymax':100},
+            'obstacles':{'center':{'xmin':-10, 'ymin':-10, 'xmax':10, 'ymax':10}}
+        }
+
+    def get_map_dict (self):
+        return self.map_dict
+
+    def get_render_state (self):
+        self.num_snapshots += 1
+        return {'positions':{1:None}, 'looks':{1:[]}, 'found_targets':[], 'num_found_targets':0}
+
+class FrameCaptureTest(unittest.TestCase):
+    def test_writes_sampled_frames (self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            capture = FrameCapture(output_dir=output_dir, every_n_steps=3)
+            image = np.zeros((20, 30, 1), dtype=np.uint8)
+            for step in range(10):
+                image[:] = step
+                capture.capture_array(f'step_{step}.png', image, step_count=step)
+            capture.stop()
+
+            self.assertEqual(sorted(os.listdir(output_dir)), ['step_0.png', 'step_3.png', 'step_6.png', 'step_9.png'])
+            self.assertEqual(capture.get_num_written(), 4)
+
+            # frames are copied when queued, so later changes to the buffer don't leak into them
+            written = np.array(Image.open(os.path.join(output_dir, 'step_3.png')))
+            self.assertEqual(written.shape, (20, 30))
+            self.assertTrue((written == 3).all())
+
+    def test_drops_when_full (self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            capture = FrameCapture(output_dir=output_dir, max_queued=2, start=False)
+            image = np.zeros((5, 5, 3), dtype=np.uint8)
+            self.assertEqual([capture.capture_array(f'{i}.png', image) for i in range(4)], [True, True, False, False])
+            self.assertEqual(capture.get_num_dropped(), 2)
+
+            capture.start()
+            capture.stop()
+            self.assertEqual(capture.get_num_written(), 2)
+
+    def test_draws_simulation_frames_on_writer (self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            capture = FrameCapture(output_dir=output_dir, every_n_steps=2)
+            simulation = FakeSimulation()
+            for step in range(4):
+                capture.capture_simulation(simulation, f'step_{step}.png', step_count=step, agent_id=1, width_inches=2, height_inches=2, dpi=50)
+            capture.stop()
+
+            # the state is only snapshotted for kept steps
+            self.assertEqual(simulation.num_snapshots, 2)
+            self.assertEqual(sorted(os.listdir(output_dir)), ['step_0.png', 'step_2.png'])
+
+            written = np.array(Image.open(os.path.join(output_dir, 'step_2.png')))
+            self.assertEqual(written.shape, (100, 100))
+            self.assertNotEqual(written[50, 50], written[50, 20])
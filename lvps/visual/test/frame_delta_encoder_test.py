@@ -0,0 +1,56 @@
+import unittest
+from lvps.visual.search.frame_delta_encoder import FrameDeltaEncoder
+
+class FakeAgent:
+    def __init__(self, unique_id, pos, color):
+        self.unique_id = unique_id
+        self.pos = pos
+        self.color = color
+
+def portrayal (agent):
+    return {'Color':agent.color, 'Shape':'rect', 'Layer':0}
+
+class FrameDeltaEncoderTest(unittest.TestCase):
+    def test_only_changes_are_sent (self):
+        encoder = FrameDeltaEncoder(portrayal)
+        robot = FakeAgent(1, (3, 4), '#11FF11')
+        target = FakeAgent(2, (10, 10), '#FF1111')
+        looks = []
+        found = []
+
+        frame = encoder.encode([robot, target], looks, found)
+        self.assertTrue(frame['full'])
+        self.assertEqual(set(frame['agents'].keys()), {'1', '2'})
+        self.assertEqual(frame['agents']['1']['x'], 3)
+
+        # nothing happened
+        frame = encoder.encode([robot, target], looks, found)
+        self.assertFalse(frame['full'])
+        self.assertEqual(frame['agents'], {})
+        self.assertEqual(frame['removed'], [])
+        self.assertEqual(frame['looks'], [])
+
+        robot.pos = (4, 4)
+        looks.append((4, 4, 5.0, -30.0, 30.0))
+        frame = encoder.encode([robot, target], looks, found)
+        self.assertEqual(list(frame['agents'].keys()), ['1'])
+        self.assertEqual(frame['agents']['1']['x'], 4)
+        self.assertEqual(frame['looks'], [[4, 4, 5.0, -30.0, 30.0]])
+
+        found.append((10, 10))
+        frame = encoder.encode([robot], looks, found)
+        self.assertEqual(frame['looks'], [])
+        self.assertEqual(frame['found'], [[10, 10]])
+        self.assertEqual(frame['removed'], ['2'])
+
+    def test_reset_sends_everything (self):
+        encoder = FrameDeltaEncoder(portrayal)
+        robot = FakeAgent(1, (3, 4), '#11FF11')
+        looks = [(3, 4, 5.0, 0.0, 60.0)]
+        encoder.encode([robot], looks, [])
+
+        encoder.reset()
+        frame = encoder.encode([robot], looks, [])
+        self.assertTrue(frame['full'])
+        self.assertEqual(list(frame['agents'].keys()), ['1'])
+        self.assertEqual(len(frame['looks']), 1)
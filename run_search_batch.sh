@@ -0,0 +1,2 @@
+export PYTHONPATH=/home/matt/projects/LVPS_Simulation/:/home/matt/projects/Pilot/
+python lvps/visual/search/batch_run.py "$@"
@@ -3,11 +3,16 @@ from gymnasium.envs.registration import register
 from stable_baselines3.common.env_checker import check_env
 from stable_baselines3 import DQN
 from stable_baselines3.dqn.policies import CnnPolicy
-from stable_baselines3.common.callbacks import EvalCallback
+from stable_baselines3.common.callbacks import EvalCallback, CallbackList
 from gymnasium.wrappers.time_limit import TimeLimit
 from gymnasium.wrappers.autoreset import AutoResetWrapper
 from stable_baselines3.common.env_util import make_vec_env
-from lvps.gym.rbean_utils import evaluate, SB3Agent
+from stable_baselines3.common.vec_env import VecMonitor
+from lvps.gym.lvps_evaluator import LvpsEvaluator
+from lvps.gym.lvps_vector_env import LvpsVectorEnv, LvpsSb3VecEnv
+from lvps.simulation.map_pool import MapPool
+from lvps.gym.state_replay_buffer import LvpsStateReplayBuffer
+from lvps.gym.memmap_replay_buffer import LvpsMemmapReplayBuffer, MemmapReplayBufferCheckpoint
 from stable_baselines3.common.type_aliases import PyTorchObs, Schedule
 import warnings
 warnings.filterwarnings('ignore')
@@ -28,6 +33,19 @@ class Train:
         self.__max_test_steps = 1000 # max steps per episode
         self.__max_total_steps = 10_000_000
         self.__test_episodes = 3
+        self.__test_workers = 4 # test episodes are spread across this many processes
+        self.__num_training_envs = 4 # simulations stepped together by the training vector env
+        self.__map_pool = MapPool(size=2 * self.__num_training_envs) # training env resets take maps from here
+
+        # 'memory' - SB3 ReplayBuffer, keeps every observation image
+        # 'state' - LvpsStateReplayBuffer, keeps the state behind each observation and redraws it when sampled (numpy renderer only)
+        # 'disk' - LvpsMemmapReplayBuffer, keeps the observation images in files under the model dir, continue_training picks the buffer back up
+        self.__replay_buffer = 'memory'
+        self.__replay_buffer_dir = f'{self.__model_dir}/replay_buffer/'
+        self.__replay_buffer_save_freq = 20000
+        self.__env_kwargs = {}
+        if self.__replay_buffer == 'state':
+            self.__env_kwargs = {'observation_renderer':'numpy'}
 
         # create new instances of the environment
         self.__create_environments('lvps/Search-v0')
@@ -35,9 +53,26 @@ class Train:
         self.__eval_callback = None
 
     def __create_environments (self, env_id):
-        self.__base_env = AutoResetWrapper(TimeLimit(gymnasium.make(env_id), self.__max_episode_steps))
-        self.__eval_env = AutoResetWrapper(TimeLimit(gymnasium.make(env_id), self.__max_episode_steps))
-        self.__test_env = AutoResetWrapper(TimeLimit(gymnasium.make(env_id), self.__max_episode_steps))
+        #self.__base_env = AutoResetWrapper(TimeLimit(gymnasium.make(env_id), self.__max_episode_steps))
+        self.__base_env = VecMonitor(LvpsSb3VecEnv(LvpsVectorEnv(
+            num_envs=self.__num_training_envs,
+            max_episode_steps=self.__max_episode_steps,
+            map_pool=self.__map_pool,
+            render_state_info=self.__replay_buffer == 'state',
+            **self.__env_kwargs)))
+        self.__eval_env = AutoResetWrapper(TimeLimit(gymnasium.make(env_id, **self.__env_kwargs), self.__max_episode_steps))
+
+    def __get_replay_buffer_args (self):
+        if self.__replay_buffer == 'state':
+            return {'replay_buffer_class':LvpsStateReplayBuffer}
+        if self.__replay_buffer == 'disk':
+            return {'replay_buffer_class':LvpsMemmapReplayBuffer, 'replay_buffer_kwargs':{'storage_dir':self.__replay_buffer_dir}}
+        return {}
+
+    def __get_callback (self):
+        if self.__replay_buffer == 'disk':
+            return CallbackList([self.__eval_callback, MemmapReplayBufferCheckpoint(save_freq=self.__replay_buffer_save_freq)])
+        return self.__eval_callback
 
     def __create_empty_model (self, base_env):
 
@@ -62,16 +97,20 @@ class Train:
             policy_kwargs = dict(net_arch=[128,128,64]),
             verbose=1,
             seed=1,
-            tensorboard_log=f'{self.__model_dir}/tensorboard_log/'
+            tensorboard_log=f'{self.__model_dir}/tensorboard_log/',
+            **self.__get_replay_buffer_args()
         )
 
     def continue_training(self):
-        model = DQN.load(f'{self.__model_dir}/evaluation/best_model.zip')
+        # the replay buffer settings are overridden, so a model saved with a different buffer still picks up the current one
+        model = DQN.load(f'{self.__model_dir}/evaluation/best_model.zip', env=self.__base_env, custom_objects=self.__get_replay_buffer_args())
+        if self.__replay_buffer == 'disk':
+            model.replay_buffer.resume()
         self.__recreate_eval_callback(self.__eval_env)
 
         model.learn(
             total_timesteps=self.__max_total_steps,
-            callback=self.__eval_callback,
+            callback=self.__get_callback(),
             log_interval=50,
             progress_bar=True,
             reset_num_timesteps=True
@@ -86,27 +125,27 @@ class Train:
             shutil.rmtree(f'{self.__model_dir}/evaluation/')
         if os.path.exists(f'{self.__model_dir}/final/'):
             shutil.rmtree(f'{self.__model_dir}/final/')
+        if os.path.exists(self.__replay_buffer_dir):
+            shutil.rmtree(self.__replay_buffer_dir)
 
         # create a new empty model
         model = self.__create_empty_model(self.__base_env)
         self.__recreate_eval_callback(self.__eval_env)
 
-        model = model.learn(total_timesteps=self.__max_total_steps, callback=self.__eval_callback, log_interval=50, progress_bar=True)
+        model = model.learn(total_timesteps=self.__max_total_steps, callback=self.__get_callback(), log_interval=50, progress_bar=True)
         model.save(f'{self.__model_dir}/final/model')
 
     def test_best (self):
         logging.getLogger(__name__).info ("Testing agent...")
-        best_model = DQN.load(f'{self.__model_dir}/evaluation/best_model.zip', env=self.__test_env)
-        sb3_agent = SB3Agent(best_model)
-
-        _ = evaluate(self.__test_env, sb3_agent, gamma=1.0, episodes=self.__test_episodes, max_steps=self.__max_test_steps, seed=1, show_report=True)
+        self.__test_model(f'{self.__model_dir}/evaluation/best_model.zip')
 
     def test_final (self):
         logging.getLogger(__name__).info ("Testing final agent...")
-        best_model = DQN.load(f'{self.__model_dir}/final/model', env=self.__test_env)
-        sb3_agent = SB3Agent(best_model)
+        self.__test_model(f'{self.__model_dir}/final/model.zip')
 
-        _ = evaluate(self.__test_env, sb3_agent, gamma=1.0, episodes=self.__test_episodes, max_steps=self.__max_test_steps, seed=1, show_report=True)
+    def __test_model (self, model_path):
+        evaluator = LvpsEvaluator(model_path, model_class=DQN, env_kwargs=self.__env_kwargs, num_workers=self.__test_workers)
+        _ = evaluator.evaluate(episodes=self.__test_episodes, max_steps=self.__max_test_steps, gamma=1.0, seed=1, show_report=True)
 
     def __recreate_eval_callback(self, environment):
         self.__eval_callback = EvalCallback(
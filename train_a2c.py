@@ -6,9 +6,11 @@ from stable_baselines3.common.callbacks import EvalCallback
 from gymnasium.wrappers.time_limit import TimeLimit
 from gymnasium.wrappers.autoreset import AutoResetWrapper
 from stable_baselines3.common.env_util import make_vec_env
-from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecMonitor
 from stable_baselines3.common.utils import set_random_seed
 from lvps.gym.rbean_utils import evaluate, SB3Agent
+from lvps.gym.lvps_vector_env import LvpsVectorEnv, LvpsSb3VecEnv
+from lvps.simulation.map_pool import MapPool
 import warnings
 warnings.filterwarnings('ignore')
 import logging
@@ -37,8 +39,12 @@ class TrainA2C:
 
     def __create_environments (self, env_id):
         num_cpu = 1
+        num_training_envs = 4
         #self.__base_env = SubprocVecEnv([(self.__wrap_env(gymnasium.make(env_id), i), i) for i in range(num_cpu)])
-        self.__base_env = make_vec_env('lvps/Search-v0', n_envs=num_cpu, wrapper_class=self.__wrap_env)
+        #self.__base_env = make_vec_env('lvps/Search-v0', n_envs=num_cpu, wrapper_class=self.__wrap_env)
+
+        # training envs are all stepped in this process by a single vector env (time limit and auto-reset included)
+        self.__base_env = VecMonitor(LvpsSb3VecEnv(LvpsVectorEnv(num_envs=num_training_envs, max_episode_steps=self.__max_episode_steps, map_pool=MapPool(size=2 * num_training_envs))))
         self.__eval_env = make_vec_env('lvps/Search-v0', n_envs=num_cpu, wrapper_class=self.__wrap_env)
         #self.__eval_env = SubprocVecEnv([(self.__wrap_env(gymnasium.make(env_id), i + 10), i) for i in range(num_cpu)])
         self.__test_env = self.__wrap_env(gymnasium.make(env_id))